@@ -107,6 +107,8 @@ class Address(db.Model):
     alert_history = db.relationship('AlertHistory', backref='address', lazy='dynamic',
                                     cascade='all, delete-orphan')
     waste_zone = db.relationship('WasteZone', backref='addresses')
+    waste_sectors = db.relationship('WasteSectorAssignment', backref='address', lazy='dynamic',
+                                    cascade='all, delete-orphan')
 
     def __repr__(self):
         city_label = f"[{self.city}]" if self.city else ""
@@ -182,6 +184,70 @@ class WasteZone(db.Model):
         }
 
 
+class WasteSector(db.Model):
+    """Montreal waste collection sector from the current version of its GeoJSON dataset."""
+    __tablename__ = 'waste_sectors'
+
+    id = db.Column(db.Integer, primary_key=True)
+    collection_type = db.Column(db.String(20), nullable=False)  # 'garbage', 'recycling', etc.
+    sector_id = db.Column(db.Integer, nullable=False)  # Feature position in the dataset
+    dataset_version = db.Column(db.String(64), nullable=False)
+
+    # Schedule information (see waste.parse_collection_schedule)
+    day_of_week = db.Column(db.String(20))
+    frequency = db.Column(db.String(20))
+    start_time = db.Column(db.String(20))
+    notes = db.Column(db.Text)
+
+    __table_args__ = (
+        db.UniqueConstraint('collection_type', 'sector_id', name='uq_waste_sector'),
+    )
+
+    def __repr__(self):
+        return f'<WasteSector {self.collection_type} #{self.sector_id}: {self.day_of_week}>'
+
+
+class WasteSectorAssignment(db.Model):
+    """Montreal waste sector containing an address, per collection type."""
+    __tablename__ = 'waste_sector_assignments'
+
+    id = db.Column(db.Integer, primary_key=True)
+    address_id = db.Column(db.Integer, db.ForeignKey('addresses.id'), nullable=False)
+    collection_type = db.Column(db.String(20), nullable=False)
+    sector_id = db.Column(db.Integer, nullable=False)
+    dataset_version = db.Column(db.String(64), nullable=False)
+    assigned_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # One sector per address and type; schedule lookups join on the sector
+    __table_args__ = (
+        db.UniqueConstraint('address_id', 'collection_type', name='uq_waste_assignment'),
+        db.Index('idx_waste_assignment_sector', 'collection_type', 'sector_id'),
+    )
+
+    def __repr__(self):
+        return f'<WasteSectorAssignment address {self.address_id} {self.collection_type} #{self.sector_id}>'
+
+
+class CollectionCalendar(db.Model):
+    """Materialized waste collection dates for the next 12 months (see services.waste_calendar)."""
+    __tablename__ = 'collection_calendar'
+
+    id = db.Column(db.Integer, primary_key=True)
+    scheme = db.Column(db.String(10), nullable=False)  # 'sector' (Montreal), 'fsa' (Montreal), 'zone' (Quebec)
+    zone = db.Column(db.String(20), nullable=False)  # Sector ID, FSA or WasteZone.zone_code
+    collection_type = db.Column(db.String(20), nullable=False)
+    collection_date = db.Column(db.Date, nullable=False)
+
+    # Reminder runs look up one date and join on (scheme, collection_type, zone)
+    __table_args__ = (
+        db.UniqueConstraint('scheme', 'zone', 'collection_type', 'collection_date', name='uq_collection_calendar'),
+        db.Index('idx_collection_calendar_date', 'collection_date', 'scheme', 'collection_type', 'zone'),
+    )
+
+    def __repr__(self):
+        return f'<CollectionCalendar {self.scheme} {self.zone} {self.collection_type} {self.collection_date}>'
+
+
 class AlertHistory(db.Model):
     """Track all sent alerts for deduplication and analytics."""
     __tablename__ = 'alert_history'
@@ -205,8 +271,11 @@ class AlertHistory(db.Model):
     delivered = db.Column(db.Boolean, default=True)
     error_message = db.Column(db.Text)
 
-    # Composite index for deduplication
+    # Covering index for deduplication: the per-run preload is a single
+    # range scan on sent_at that never touches the table rows. The
+    # per-address index serves should_send_alert outside alert runs.
     __table_args__ = (
+        db.Index('idx_alert_dedup_recent', 'sent_at', 'city', 'address_id', 'alert_type', 'reference_date'),
         db.Index('idx_alert_dedup', 'address_id', 'city', 'alert_type', 'reference_date'),
     )
 
@@ -226,6 +295,12 @@ class AlertHistory(db.Model):
         }
 
 
+def default_street_match_key(context):
+    """Column default: nom_voie normalized the way street lookups normalize queries."""
+    from app.services.montreal.geobase import street_match_key
+    return street_match_key(context.get_current_parameters()['nom_voie'])
+
+
 class GeobaseCache(db.Model):
     """Cache for Geobase Double data (address to COTE_RUE_ID mapping)."""
     __tablename__ = 'geobase_cache'
@@ -235,6 +310,7 @@ class GeobaseCache(db.Model):
 
     # Street information
     nom_voie = db.Column(db.String(255), nullable=False, index=True)
+    nom_voie_norm = db.Column(db.String(255), default=default_street_match_key)  # See street_match_key
     type_voie = db.Column(db.String(50))  # Rue, Avenue, etc.
 
     # Address range
@@ -246,14 +322,38 @@ class GeobaseCache(db.Model):
 
     # Location
     nom_ville = db.Column(db.String(100))
+    geometry = db.Column(db.LargeBinary)  # Side line as packed float64 (lon, lat) pairs
 
     # Metadata
     last_updated = db.Column(db.DateTime, default=datetime.utcnow)
+    row_hash = db.Column(db.String(40))  # SHA-1 of the source row, for refresh diffs
 
     def __repr__(self):
         return f'<GeobaseCache {self.nom_voie} ({self.debut_adresse}-{self.fin_adresse})>'
 
 
+class DatasetVersion(db.Model):
+    """Last fetched version of an external dataset, for conditional downloads."""
+    __tablename__ = 'dataset_versions'
+
+    id = db.Column(db.Integer, primary_key=True)
+    dataset = db.Column(db.String(50), unique=True, nullable=False, index=True)
+
+    # HTTP validators sent back as If-None-Match / If-Modified-Since
+    etag = db.Column(db.String(255))
+    last_modified = db.Column(db.String(64))
+
+    # SHA-256 of the downloaded file, for servers without validators
+    content_hash = db.Column(db.String(64))
+
+    # Metadata
+    checked_at = db.Column(db.DateTime, default=datetime.utcnow)
+    changed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<DatasetVersion {self.dataset}: {self.etag or self.content_hash}>'
+
+
 class SnowStatusCache(db.Model):
     """Cache for Planif-Neige API responses."""
     __tablename__ = 'snow_status_cache'
@@ -278,3 +378,22 @@ class SnowStatusCache(db.Model):
             return True
         age = (datetime.utcnow() - self.fetched_at).total_seconds()
         return age > max_age_seconds
+
+
+class StationStreetCache(db.Model):
+    """Street name of each Quebec City flashing-light station (stations never move)."""
+    __tablename__ = 'station_street_cache'
+
+    id = db.Column(db.Integer, primary_key=True)
+    station_no = db.Column(db.String(50), unique=True, nullable=False, index=True)
+    street = db.Column(db.String(255), nullable=False)
+
+    # Station location used for the reverse geocode
+    latitude = db.Column(db.Float)
+    longitude = db.Column(db.Float)
+
+    # Metadata
+    geocoded_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<StationStreetCache {self.station_no}: {self.street}>'
@@ -432,6 +432,15 @@ def subscribe():
         db.session.add(address)
         db.session.commit()
 
+        # Store the address's waste sectors (the reminder run assigns any it misses)
+        if city == 'montreal' and latitude and longitude:
+            try:
+                from app.services.montreal.waste import assign_address_sectors
+                assign_address_sectors({address.id: (latitude, longitude)})
+            except Exception as e:
+                db.session.rollback()
+                logger.warning(f"Failed to assign waste sectors: {e}")
+
         # Send confirmation email
         try:
             from app.services.email import send_confirmation_email
@@ -546,6 +555,63 @@ def refresh_geobase():
         return jsonify({'error': str(e)}), 500
 
 
+@admin_bp.route('/refresh-waste')
+@require_admin_token
+def refresh_waste():
+    """Manually revalidate Montreal waste collection datasets."""
+    try:
+        from app.services.montreal.waste import refresh_waste_data
+        result = refresh_waste_data(force=True)
+
+        logger.info(f"Waste datasets refreshed: {result}")
+        return jsonify({
+            'success': result['success'],
+            'result': result
+        })
+
+    except Exception as e:
+        logger.error(f"Error refreshing waste datasets: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/rollback-geobase')
+@require_admin_token
+def rollback_geobase():
+    """Swap the previous Montreal Geobase generation back in."""
+    try:
+        from app.services.montreal.geobase import rollback_cache
+        result = rollback_cache()
+
+        logger.info(f"Geobase cache rollback: {result}")
+        return jsonify({
+            'success': result.get('success', False),
+            'result': result
+        })
+
+    except Exception as e:
+        logger.error(f"Error rolling back Geobase: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/warm-station-streets')
+@require_admin_token
+def warm_station_streets():
+    """Reverse geocode every Quebec City flashing-light station not yet cached."""
+    try:
+        from app.services.quebec.snow_checker import warm_station_streets as warm
+        result = warm()
+
+        logger.info(f"Quebec station street cache warmed: {result}")
+        return jsonify({
+            'success': result.get('success', False),
+            'result': result
+        })
+
+    except Exception as e:
+        logger.error(f"Error warming station street cache: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
 @admin_bp.route('/stats')
 @require_admin_token
 def get_stats():
@@ -78,6 +78,28 @@ def add_scheduled_jobs(app: Flask):
             except Exception as e:
                 logger.error(f"Geobase refresh job failed: {e}")
 
+    def address_revalidation_job():
+        """Re-resolve stored Montreal addresses against the Geobase."""
+        with app.app_context():
+            try:
+                from app.services.montreal.geobase import revalidate_addresses
+                logger.info("Running scheduled address re-validation")
+                result = revalidate_addresses()
+                logger.info(f"Address re-validation complete: {result}")
+            except Exception as e:
+                logger.error(f"Address re-validation job failed: {e}")
+
+    def collection_calendar_job():
+        """Roll the materialized waste collection calendar forward."""
+        with app.app_context():
+            try:
+                from app.services.waste_calendar import rebuild_collection_calendar
+                logger.info("Running scheduled collection calendar rebuild")
+                result = rebuild_collection_calendar()
+                logger.info(f"Collection calendar rebuild complete: {result}")
+            except Exception as e:
+                logger.error(f"Collection calendar job failed: {e}")
+
     # Add jobs using add_job method
     # Snow checks every 10 minutes for both cities
     scheduler.add_job(snow_check_montreal_job, 'cron', minute='*/10', id='snow_check_montreal', replace_existing=True)
@@ -89,7 +111,13 @@ def add_scheduled_jobs(app: Flask):
     # Montreal Geobase refresh weekly on Sunday at 3 AM
     scheduler.add_job(geobase_refresh_job, 'cron', day_of_week='sun', hour=3, id='geobase_refresh', replace_existing=True)
 
-    logger.info("Scheduled jobs configured: snow_check_montreal (10min), snow_check_quebec (10min), waste_reminder (daily 6PM), geobase_refresh (weekly)")
+    # Montreal address re-validation nightly at 4 AM (after any Geobase refresh)
+    scheduler.add_job(address_revalidation_job, 'cron', hour=4, minute=0, id='address_revalidation', replace_existing=True)
+
+    # Waste collection calendar rebuilt nightly at 4:30 AM (ahead of the 6 PM reminders)
+    scheduler.add_job(collection_calendar_job, 'cron', hour=4, minute=30, id='collection_calendar', replace_existing=True)
+
+    logger.info("Scheduled jobs configured: snow_check_montreal (10min), snow_check_quebec (10min), waste_reminder (daily 6PM), geobase_refresh (weekly), address_revalidation (nightly), collection_calendar (nightly)")
 
 
 def shutdown_scheduler():
@@ -7,22 +7,72 @@ Supports both Montreal and Quebec City.
 
 import logging
 from datetime import datetime, timedelta, date
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+from flask import current_app
 
 from app import db
 from app.models import Subscriber, Address, AlertHistory
+from app.services.email import EmailDeliveryPool, BatchEmailDelivery, clear_render_cache
 
 logger = logging.getLogger(__name__)
 
+# Deduplication window for alerts
+DEDUP_WINDOW_HOURS = 24
+
+# (address_id, alert_type, reference_date) key identifying a sent alert
+AlertKey = Tuple[int, str, Optional[date]]
+
+# Attempts at writing a batch of alert history rows before the run fails
+ALERT_LOG_FLUSH_ATTEMPTS = 3
+
+
+class AlertLogError(Exception):
+    """Alert history rows could not be saved; the run must stop sending."""
+
+
+def load_recent_alert_keys(city: str = None) -> Set[AlertKey]:
+    """
+    Preload the keys of all alerts sent within the deduplication window.
+
+    Runs a single range scan on sent_at (idx_alert_dedup_recent) so a whole
+    snow or waste run can deduplicate with in-memory set lookups.
+
+    Args:
+        city: Optional filter for 'montreal' or 'quebec' (None = both)
 
-def should_send_alert(address_id: int, alert_type: str, reference_date: date = None) -> bool:
+    Returns:
+        Set of (address_id, alert_type, reference_date) tuples.
+    """
+    cutoff = datetime.utcnow() - timedelta(hours=DEDUP_WINDOW_HOURS)
+
+    query = db.session.query(
+        AlertHistory.address_id,
+        AlertHistory.alert_type,
+        AlertHistory.reference_date
+    ).filter(AlertHistory.sent_at >= cutoff)
+
+    if city:
+        query = query.filter(AlertHistory.city == city)
+
+    return {tuple(row) for row in query}
+
+
+def should_send_alert(address_id: int, alert_type: str, reference_date: date = None,
+                      sent_keys: Optional[Set[AlertKey]] = None) -> bool:
     """
     Check if we should send an alert (deduplication).
 
     For snow alerts: Prevents sending the same type within 24 hours.
     For waste alerts: Prevents sending duplicate for same collection date.
+
+    If sent_keys (from load_recent_alert_keys) is given, the check is a set
+    lookup instead of a database query.
     """
-    cutoff = datetime.utcnow() - timedelta(hours=24)
+    if sent_keys is not None:
+        return (address_id, alert_type, reference_date) not in sent_keys
+
+    cutoff = datetime.utcnow() - timedelta(hours=DEDUP_WINDOW_HOURS)
 
     query = AlertHistory.query.filter(
         AlertHistory.address_id == address_id,
@@ -36,9 +86,105 @@ def should_send_alert(address_id: int, alert_type: str, reference_date: date = N
     return query.first() is None
 
 
+class AlertLogBuffer:
+    """
+    Collects AlertHistory rows during an alert run and writes them in batches.
+
+    Each flush is one multi-row INSERT committed in a single transaction
+    (together with any pending Address status updates), so a batch is either
+    fully recorded or not at all. A retried run therefore never sees half a
+    batch: everything committed is deduplicated. A batch that still fails
+    after ALERT_LOG_FLUSH_ATTEMPTS raises AlertLogError, since sending more
+    alerts that cannot be recorded would resend them on the next run.
+    Pending status updates are re-applied after a failed attempt's
+    rollback, so a retried flush commits them along with the batch.
+    """
+
+    def __init__(self, batch_size: int = None):
+        if batch_size is None:
+            batch_size = current_app.config.get('ALERT_LOG_BATCH_SIZE', 500)
+        self.batch_size = batch_size
+        self.pending: List[Dict[str, Any]] = []
+        self.flushed = 0
+
+    def add(self, **row):
+        """Queue an AlertHistory row, flushing once the batch is full."""
+        row.setdefault('sent_at', datetime.utcnow())
+        self.pending.append(row)
+
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Insert all queued rows in one transaction. Returns rows written.
+
+        Raises:
+            AlertLogError: If the rows could not be written after
+                ALERT_LOG_FLUSH_ATTEMPTS attempts (they stay queued).
+        """
+        if not self.pending:
+            return 0
+
+        rows = self.pending
+        changes = _pending_changes()
+        for attempt in range(1, ALERT_LOG_FLUSH_ATTEMPTS + 1):
+            try:
+                db.session.execute(db.insert(AlertHistory), rows)
+                db.session.commit()
+                break
+            except Exception as e:
+                db.session.rollback()
+                for obj, values in changes:
+                    for key, value in values.items():
+                        setattr(obj, key, value)
+                logger.error(f"Failed to flush {len(rows)} alert log rows "
+                             f"(attempt {attempt}/{ALERT_LOG_FLUSH_ATTEMPTS}): {e}")
+                if attempt == ALERT_LOG_FLUSH_ATTEMPTS:
+                    raise AlertLogError(f"{len(rows)} alert log rows could not be saved: {e}") from e
+
+        self.pending = []
+        self.flushed += len(rows)
+        return len(rows)
+
+
+def _pending_changes() -> List[Tuple[Any, Dict[str, Any]]]:
+    """Changed column values of the session's dirty objects (e.g. Address statuses)."""
+    changes = []
+    for obj in db.session.dirty:
+        state = db.inspect(obj)
+        values = {key: state.attrs[key].value for key in state.mapper.column_attrs.keys()
+                  if state.attrs[key].history.has_changes()}
+        if values:
+            changes.append((obj, values))
+    return changes
+
+
 def log_alert(address_id: int, city: str, alert_type: str, status: str,
-              reference_date: date = None, delivered: bool = True, error: str = None):
-    """Log an alert to history."""
+              reference_date: date = None, delivered: bool = True, error: str = None,
+              sent_keys: Optional[Set[AlertKey]] = None,
+              alert_log: Optional[AlertLogBuffer] = None):
+    """
+    Log an alert to history (and to the run's dedup set, if given).
+
+    With an alert_log buffer the row is queued for a batched insert instead
+    of being committed immediately.
+    """
+    if sent_keys is not None:
+        sent_keys.add((address_id, alert_type, reference_date))
+
+    if alert_log is not None:
+        alert_log.add(
+            address_id=address_id,
+            city=city,
+            alert_type=alert_type,
+            status=status,
+            reference_date=reference_date,
+            delivered=delivered,
+            error_message=error
+        )
+        return
+
     alert = AlertHistory(
         address_id=address_id,
         city=city,
@@ -52,6 +198,46 @@ def log_alert(address_id: int, city: str, alert_type: str, status: str,
     db.session.commit()
 
 
+def _alert_tag(address_id: int, city: str, alert_type: str, status: str,
+               reference_date: date = None) -> Dict[str, Any]:
+    """Build the log_alert arguments carried with a queued email."""
+    return {
+        'address_id': address_id,
+        'city': city,
+        'alert_type': alert_type,
+        'status': status,
+        'reference_date': reference_date
+    }
+
+
+def _log_deliveries(delivery: EmailDeliveryPool, results: Dict[str, Any], sent_field: str,
+                    sent_keys: Optional[Set[AlertKey]] = None,
+                    alert_log: Optional[AlertLogBuffer] = None, wait: bool = True):
+    """
+    Log the outcome of queued emails and add them to the run totals.
+
+    Each chunk of outcomes is committed as soon as it is logged, so a run
+    that stops midway has recorded every alert delivered so far.
+
+    Args:
+        wait: Wait for every queued email; otherwise only log the ones
+            already delivered
+    """
+    outcomes = delivery.results() if wait else delivery.completed()
+    for tag, email_result in outcomes:
+        if email_result.get('success'):
+            results[sent_field] += 1
+            results['by_city'][tag['city']] += 1
+            log_alert(**tag, delivered=True, sent_keys=sent_keys, alert_log=alert_log)
+        else:
+            results['errors'] += 1
+            log_alert(**tag, delivered=False, error=email_result.get('error'),
+                      sent_keys=sent_keys, alert_log=alert_log)
+
+    if outcomes and alert_log is not None:
+        alert_log.flush()
+
+
 def check_all_snow_statuses(city: str = None) -> Dict[str, Any]:
     """
     Check snow status for all subscribed addresses and send alerts.
@@ -61,6 +247,10 @@ def check_all_snow_statuses(city: str = None) -> Dict[str, Any]:
 
     Returns:
         Summary of checks and alerts sent.
+
+    Raises:
+        AlertLogError: If sent alerts could not be recorded; the run stops
+            and emails not yet sent are dropped.
     """
     # Get all active addresses with snow alerts enabled
     query = Address.query.join(Subscriber).filter(
@@ -72,9 +262,18 @@ def check_all_snow_statuses(city: str = None) -> Dict[str, Any]:
         query = query.filter(Address.city == city)
 
     addresses = query.all()
+    clear_render_cache()
+
+    # Resolve each distinct Montreal street segment once per cycle
+    segment_statuses = _resolve_montreal_segments(addresses)
+    # Quebec lights are resolved from the local station registry
+    location_statuses = _resolve_quebec_locations(addresses)
+    sent_keys = load_recent_alert_keys(city)
+    alert_log = AlertLogBuffer()
 
     results = {
         'addresses_checked': 0,
+        'segments_checked': len(segment_statuses),
         'status_changes': 0,
         'alerts_sent': 0,
         'alerts_skipped': 0,
@@ -82,41 +281,115 @@ def check_all_snow_statuses(city: str = None) -> Dict[str, Any]:
         'by_city': {'montreal': 0, 'quebec': 0}
     }
 
-    for address in addresses:
-        try:
-            results['addresses_checked'] += 1
-            address_city = address.city or 'montreal'  # Default to montreal for legacy
+    with EmailDeliveryPool() as delivery:
+        for address in addresses:
+            try:
+                results['addresses_checked'] += 1
+                address_city = address.city or 'montreal'  # Default to montreal for legacy
+
+                if address_city == 'montreal':
+                    check_result = _check_montreal_snow(
+                        address, segment_statuses.get(address.cote_rue_id),
+                        sent_keys, alert_log, delivery
+                    )
+                else:
+                    check_result = _check_quebec_snow(
+                        address, location_statuses.get(address.id),
+                        sent_keys, alert_log, delivery
+                    )
+
+                if check_result.get('status_changed'):
+                    results['status_changes'] += 1
 
-            if address_city == 'montreal':
-                check_result = _check_montreal_snow(address)
-            else:
-                check_result = _check_quebec_snow(address)
+                if check_result.get('alert_sent'):
+                    results['alerts_sent'] += 1
+                    results['by_city'][address_city] += 1
 
-            if check_result.get('status_changed'):
-                results['status_changes'] += 1
+                if check_result.get('alert_skipped'):
+                    results['alerts_skipped'] += 1
 
-            if check_result.get('alert_sent'):
-                results['alerts_sent'] += 1
-                results['by_city'][address_city] += 1
+                if check_result.get('error'):
+                    results['errors'] += 1
 
-            if check_result.get('alert_skipped'):
-                results['alerts_skipped'] += 1
+                _log_deliveries(delivery, results, 'alerts_sent', sent_keys, alert_log, wait=False)
 
-            if check_result.get('error'):
+            except AlertLogError:
+                raise
+            except Exception as e:
+                logger.error(f"Error checking address {address.id}: {e}")
                 results['errors'] += 1
 
-        except Exception as e:
-            logger.error(f"Error checking address {address.id}: {e}")
-            results['errors'] += 1
+        _log_deliveries(delivery, results, 'alerts_sent', sent_keys, alert_log)
 
+    # Alert rows and address status updates are committed together
+    alert_log.flush()
     db.session.commit()
 
     logger.info(f"Snow status check complete: {results}")
     return results
 
 
-def _check_montreal_snow(address: Address) -> Dict[str, Any]:
-    """Check snow status for a Montreal address."""
+def _resolve_montreal_segments(addresses: List[Address]) -> Dict[int, Dict[str, Any]]:
+    """
+    Group Montreal addresses by street segment and look up each segment once.
+
+    Returns:
+        Dict mapping cote_rue_id to its formatted Planif-Neige status.
+    """
+    from app.services.montreal.planif_neige import get_status_for_street
+
+    segment_ids = {
+        address.cote_rue_id for address in addresses
+        if (address.city or 'montreal') == 'montreal' and address.cote_rue_id
+    }
+
+    statuses = {}
+    for cote_rue_id in segment_ids:
+        try:
+            statuses[cote_rue_id] = get_status_for_street(cote_rue_id)
+        except Exception as e:
+            logger.error(f"Planif-Neige lookup error for segment {cote_rue_id}: {e}")
+
+    return statuses
+
+
+def _resolve_quebec_locations(addresses: List[Address]) -> Dict[int, Dict[str, Any]]:
+    """
+    Look up flashing-light status for all Quebec City addresses in one batch.
+
+    Returns:
+        Dict mapping address ID to its formatted snow removal status.
+    """
+    from app.services.quebec.snow_checker import get_statuses_for_locations
+
+    locations = {
+        address.id: (address.latitude, address.longitude) for address in addresses
+        if address.city == 'quebec' and address.latitude and address.longitude
+    }
+    if not locations:
+        return {}
+
+    try:
+        return get_statuses_for_locations(locations)
+    except Exception as e:
+        logger.error(f"Quebec snow batch lookup error: {e}")
+        return {}
+
+
+def _check_montreal_snow(address: Address, status: Optional[Dict[str, Any]] = None,
+                         sent_keys: Optional[Set[AlertKey]] = None,
+                         alert_log: Optional[AlertLogBuffer] = None,
+                         delivery: Optional[EmailDeliveryPool] = None) -> Dict[str, Any]:
+    """
+    Check snow status for a Montreal address.
+
+    Args:
+        address: Address to check
+        status: Pre-resolved segment status (looked up if not provided)
+        sent_keys: Preloaded dedup keys for this run
+        alert_log: Batched alert history writer for this run
+        delivery: Email delivery pool; queued alerts are logged by the run
+    """
     result = {'status_changed': False, 'alert_sent': False, 'alert_skipped': False}
 
     try:
@@ -130,7 +403,8 @@ def _check_montreal_snow(address: Address) -> Dict[str, Any]:
         if not address.cote_rue_id:
             return result
 
-        status = get_status_for_street(address.cote_rue_id)
+        if status is None:
+            status = get_status_for_street(address.cote_rue_id)
         current_etat = status.get('etat', 'unknown')
         previous_etat = address.last_snow_status
 
@@ -143,25 +417,33 @@ def _check_montreal_snow(address: Address) -> Dict[str, Any]:
                 previous_etat
             )
 
-            if alert_type and should_send_alert(address.id, alert_type):
+            if alert_type and should_send_alert(address.id, alert_type, sent_keys=sent_keys):
                 subscriber = address.subscriber
+                tag = _alert_tag(address.id, 'montreal', alert_type, current_etat)
 
                 if alert_type == 'snow_scheduled':
-                    email_result = send_snow_scheduled_alert(subscriber, address, status)
+                    email_result = send_snow_scheduled_alert(subscriber, address, status,
+                                                             delivery=delivery, tag=tag)
                 elif alert_type == 'snow_urgent':
-                    email_result = send_snow_urgent_alert(subscriber, address, status)
+                    email_result = send_snow_urgent_alert(subscriber, address, status,
+                                                          delivery=delivery, tag=tag)
                 elif alert_type == 'snow_cleared':
-                    email_result = send_snow_cleared_alert(subscriber, address)
+                    email_result = send_snow_cleared_alert(subscriber, address,
+                                                           delivery=delivery, tag=tag)
                 else:
                     email_result = {'success': False}
 
-                if email_result.get('success'):
+                if email_result.get('queued'):
+                    result['alert_queued'] = True
+                elif email_result.get('success'):
                     result['alert_sent'] = True
-                    log_alert(address.id, 'montreal', alert_type, current_etat, delivered=True)
+                    log_alert(address.id, 'montreal', alert_type, current_etat, delivered=True,
+                              sent_keys=sent_keys, alert_log=alert_log)
                 else:
                     result['error'] = email_result.get('error')
                     log_alert(address.id, 'montreal', alert_type, current_etat,
-                              delivered=False, error=result['error'])
+                              delivered=False, error=result['error'],
+                              sent_keys=sent_keys, alert_log=alert_log)
             elif alert_type:
                 result['alert_skipped'] = True
 
@@ -175,8 +457,20 @@ def _check_montreal_snow(address: Address) -> Dict[str, Any]:
     return result
 
 
-def _check_quebec_snow(address: Address) -> Dict[str, Any]:
-    """Check snow status for a Quebec City address."""
+def _check_quebec_snow(address: Address, status: Optional[Dict[str, Any]] = None,
+                       sent_keys: Optional[Set[AlertKey]] = None,
+                       alert_log: Optional[AlertLogBuffer] = None,
+                       delivery: Optional[EmailDeliveryPool] = None) -> Dict[str, Any]:
+    """
+    Check snow status for a Quebec City address.
+
+    Args:
+        address: Address to check
+        status: Pre-resolved location status (looked up if not provided)
+        sent_keys: Preloaded dedup keys for this run
+        alert_log: Batched alert history writer for this run
+        delivery: Email delivery pool; queued alerts are logged by the run
+    """
     result = {'status_changed': False, 'alert_sent': False, 'alert_skipped': False}
 
     try:
@@ -186,7 +480,8 @@ def _check_quebec_snow(address: Address) -> Dict[str, Any]:
         if not (address.latitude and address.longitude):
             return result
 
-        status = get_status_for_location(address.latitude, address.longitude)
+        if status is None:
+            status = get_status_for_location(address.latitude, address.longitude)
         has_operation = status.get('etat_deneig', 0) > 0
         current_etat = 'active' if has_operation else 'clear'
         previous_etat = address.last_snow_status
@@ -197,17 +492,23 @@ def _check_quebec_snow(address: Address) -> Dict[str, Any]:
             if has_operation:
                 alert_type = 'snow_active'
 
-                if should_send_alert(address.id, alert_type):
+                if should_send_alert(address.id, alert_type, sent_keys=sent_keys):
                     subscriber = address.subscriber
-                    email_result = send_snow_alert_quebec(subscriber, address, status)
+                    tag = _alert_tag(address.id, 'quebec', alert_type, current_etat)
+                    email_result = send_snow_alert_quebec(subscriber, address, status,
+                                                          delivery=delivery, tag=tag)
 
-                    if email_result.get('success'):
+                    if email_result.get('queued'):
+                        result['alert_queued'] = True
+                    elif email_result.get('success'):
                         result['alert_sent'] = True
-                        log_alert(address.id, 'quebec', alert_type, current_etat, delivered=True)
+                        log_alert(address.id, 'quebec', alert_type, current_etat, delivered=True,
+                                  sent_keys=sent_keys, alert_log=alert_log)
                     else:
                         result['error'] = email_result.get('error')
                         log_alert(address.id, 'quebec', alert_type, current_etat,
-                                  delivered=False, error=result['error'])
+                                  delivered=False, error=result['error'],
+                                  sent_keys=sent_keys, alert_log=alert_log)
                 else:
                     result['alert_skipped'] = True
 
@@ -225,24 +526,22 @@ def send_waste_reminders(city: str = None) -> Dict[str, Any]:
     """
     Send waste collection reminders for tomorrow's collections.
 
+    The addresses to remind come from one join against the materialized
+    collection calendar (see services.waste_calendar).
+
     Args:
         city: Optional filter for 'montreal' or 'quebec' (None = both)
 
     Returns:
         Summary of reminders sent.
-    """
-    # Get all active addresses with waste alerts enabled and coordinates
-    query = Address.query.join(Subscriber).filter(
-        Subscriber.is_active == True,
-        Address.waste_alerts == True,
-        Address.latitude.isnot(None),
-        Address.longitude.isnot(None)
-    )
 
-    if city:
-        query = query.filter(Address.city == city)
-
-    addresses = query.all()
+    Raises:
+        AlertLogError: If sent reminders could not be recorded; the run
+            stops and reminders not yet sent are dropped.
+    """
+    tomorrow = (datetime.utcnow() + timedelta(days=1)).date()
+    due = _resolve_due_collections(tomorrow, city)
+    clear_render_cache()
 
     results = {
         'addresses_checked': 0,
@@ -252,64 +551,153 @@ def send_waste_reminders(city: str = None) -> Dict[str, Any]:
         'by_city': {'montreal': 0, 'quebec': 0}
     }
 
-    tomorrow = (datetime.utcnow() + timedelta(days=1)).date()
+    sent_keys = load_recent_alert_keys(city)
+    alert_log = AlertLogBuffer()
+    quebec_schedules: Dict[int, Optional[Dict[str, Any]]] = {}
+
+    # Reminders go out through the provider batch endpoint
+    with BatchEmailDelivery() as delivery:
+        for address, collection_types in due:
+            try:
+                results['addresses_checked'] += 1
+                address_city = address.city or 'montreal'
+
+                if address_city == 'montreal':
+                    reminder_result = _send_montreal_waste_reminder(
+                        address, tomorrow, sent_keys, alert_log, delivery,
+                        collections=_montreal_collection_entries(collection_types, tomorrow)
+                    )
+                else:
+                    if address.waste_zone_id not in quebec_schedules:
+                        from app.services.quebec.waste import get_waste_schedule
+                        quebec_schedules[address.waste_zone_id] = get_waste_schedule(
+                            waste_zone_id=address.waste_zone_id
+                        )
+                    reminder_result = _send_quebec_waste_reminder(
+                        address, tomorrow, sent_keys, alert_log, delivery,
+                        collection_types=collection_types,
+                        schedule=quebec_schedules[address.waste_zone_id]
+                    )
+
+                if reminder_result.get('no_collection'):
+                    results['no_collection'] += 1
+
+                if reminder_result.get('reminder_sent'):
+                    results['reminders_sent'] += 1
+                    results['by_city'][address_city] += 1
+
+                if reminder_result.get('error'):
+                    results['errors'] += 1
+
+                _log_deliveries(delivery, results, 'reminders_sent', sent_keys, alert_log, wait=False)
+
+            except AlertLogError:
+                raise
+            except Exception as e:
+                logger.error(f"Error sending waste reminder for address {address.id}: {e}")
+                results['errors'] += 1
 
-    for address in addresses:
-        try:
-            results['addresses_checked'] += 1
-            address_city = address.city or 'montreal'
+        _log_deliveries(delivery, results, 'reminders_sent', sent_keys, alert_log)
 
-            if address_city == 'montreal':
-                reminder_result = _send_montreal_waste_reminder(address, tomorrow)
-            else:
-                reminder_result = _send_quebec_waste_reminder(address, tomorrow)
+    alert_log.flush()
 
-            if reminder_result.get('no_collection'):
-                results['no_collection'] += 1
+    logger.info(f"Waste reminders complete: {results}")
+    return results
 
-            if reminder_result.get('reminder_sent'):
-                results['reminders_sent'] += 1
-                results['by_city'][address_city] += 1
 
-            if reminder_result.get('error'):
-                results['errors'] += 1
+def _resolve_due_collections(collection_date: date, city: str = None) -> List[Tuple[Address, List[str]]]:
+    """
+    Addresses and their collection types for a date, from the collection calendar.
 
-        except Exception as e:
-            logger.error(f"Error sending waste reminder for address {address.id}: {e}")
-            results['errors'] += 1
+    Montreal datasets are loaded first (syncing sectors and their calendar
+    rows when a dataset changed) and addresses still missing a sector
+    assignment are assigned, so the calendar join sees every address.
+    """
+    from app.services.waste_calendar import ensure_collection_calendar, get_addresses_to_notify
 
-    logger.info(f"Waste reminders complete: {results}")
-    return results
+    if city in (None, 'montreal'):
+        try:
+            from app.services.montreal.waste import load_all_waste_data, assign_unassigned_addresses
+            load_all_waste_data()
+            assign_unassigned_addresses()
+        except Exception as e:
+            logger.error(f"Montreal waste sector update error: {e}")
 
+    try:
+        ensure_collection_calendar(collection_date)
+        return get_addresses_to_notify(collection_date, city)
+    except Exception as e:
+        logger.error(f"Collection calendar lookup error: {e}")
+        return []
+
+
+def _montreal_collection_entries(collection_types: List[str], collection_date: date) -> List[Dict[str, Any]]:
+    """Reminder entries for a Montreal address's collections on a date, in dataset order."""
+    from app.services.montreal.waste import WASTE_DATASETS
+
+    day_name = collection_date.strftime('%A')
+    return [
+        {
+            'type': collection_type,
+            'name': dataset['name'],
+            'name_fr': dataset['name_fr'],
+            'day_of_week': day_name,
+            'next_collection': collection_date.isoformat(),
+            'next_collection_display': 'Tomorrow'
+        }
+        for collection_type, dataset in WASTE_DATASETS.items() if collection_type in collection_types
+    ]
+
+
+def _send_montreal_waste_reminder(address: Address, collection_date: date,
+                                  sent_keys: Optional[Set[AlertKey]] = None,
+                                  alert_log: Optional[AlertLogBuffer] = None,
+                                  delivery: Optional[EmailDeliveryPool] = None,
+                                  collections: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    Send waste reminder for a Montreal address.
 
-def _send_montreal_waste_reminder(address: Address, collection_date: date) -> Dict[str, Any]:
-    """Send waste reminder for a Montreal address."""
+    Args:
+        address: Address to remind
+        collection_date: Date of the collections (tomorrow)
+        sent_keys: Preloaded dedup keys for this run
+        alert_log: Batched alert history writer for this run
+        delivery: Email delivery pool; queued reminders are logged by the run
+        collections: Pre-resolved collections for tomorrow (looked up if not provided)
+    """
     result = {'no_collection': False, 'reminder_sent': False}
 
     try:
         from app.services.montreal.waste import get_collections_for_tomorrow
         from app.services.email import send_waste_reminder
 
-        collections = get_collections_for_tomorrow(address.latitude, address.longitude)
+        if collections is None:
+            collections = get_collections_for_tomorrow(address.latitude, address.longitude)
 
         if not collections:
             result['no_collection'] = True
             return result
 
-        if not should_send_alert(address.id, 'waste_reminder', collection_date):
+        if not should_send_alert(address.id, 'waste_reminder', collection_date, sent_keys):
             return result
 
         subscriber = address.subscriber
-        email_result = send_waste_reminder(subscriber, address, collections)
+        tag = _alert_tag(address.id, 'montreal', 'waste_reminder', 'tomorrow', collection_date)
+        email_result = send_waste_reminder(subscriber, address, collections,
+                                           delivery=delivery, tag=tag)
 
-        if email_result.get('success'):
+        if email_result.get('queued'):
+            result['reminder_queued'] = True
+        elif email_result.get('success'):
             result['reminder_sent'] = True
             log_alert(address.id, 'montreal', 'waste_reminder', 'tomorrow',
-                      reference_date=collection_date, delivered=True)
+                      reference_date=collection_date, delivered=True,
+                      sent_keys=sent_keys, alert_log=alert_log)
         else:
             result['error'] = email_result.get('error')
             log_alert(address.id, 'montreal', 'waste_reminder', 'tomorrow',
-                      reference_date=collection_date, delivered=False, error=result['error'])
+                      reference_date=collection_date, delivered=False, error=result['error'],
+                      sent_keys=sent_keys, alert_log=alert_log)
 
     except Exception as e:
         logger.error(f"Montreal waste reminder error for address {address.id}: {e}")
@@ -318,8 +706,19 @@ def _send_montreal_waste_reminder(address: Address, collection_date: date) -> Di
     return result
 
 
-def _send_quebec_waste_reminder(address: Address, collection_date: date) -> Dict[str, Any]:
-    """Send waste reminder for a Quebec City address."""
+def _send_quebec_waste_reminder(address: Address, collection_date: date,
+                                sent_keys: Optional[Set[AlertKey]] = None,
+                                alert_log: Optional[AlertLogBuffer] = None,
+                                delivery: Optional[EmailDeliveryPool] = None,
+                                collection_types: Optional[List[str]] = None,
+                                schedule: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Send waste reminder for a Quebec City address.
+
+    Args:
+        collection_types: Pre-resolved collection types for tomorrow (looked up if not provided)
+        schedule: Pre-loaded schedule of the address's zone (looked up if not provided)
+    """
     result = {'no_collection': False, 'reminder_sent': False}
 
     try:
@@ -330,36 +729,42 @@ def _send_quebec_waste_reminder(address: Address, collection_date: date) -> Dict
             result['no_collection'] = True
             return result
 
-        # Check if there's a collection tomorrow
-        garbage_tomorrow = is_collection_tomorrow(address.waste_zone_id, 'garbage')
-        recycling_tomorrow = is_collection_tomorrow(address.waste_zone_id, 'recycling')
+        if collection_types is None:
+            # Check if there's a collection tomorrow
+            collection_types = [
+                collection_type for collection_type in ('garbage', 'recycling')
+                if is_collection_tomorrow(address.waste_zone_id, collection_type)
+            ]
 
-        if not garbage_tomorrow and not recycling_tomorrow:
+        if not collection_types:
             result['no_collection'] = True
             return result
 
-        if not should_send_alert(address.id, 'waste_reminder', collection_date):
+        if not should_send_alert(address.id, 'waste_reminder', collection_date, sent_keys):
             return result
 
-        schedule = get_waste_schedule(waste_zone_id=address.waste_zone_id)
+        if schedule is None:
+            schedule = get_waste_schedule(waste_zone_id=address.waste_zone_id)
         subscriber = address.subscriber
 
-        collections = []
-        if garbage_tomorrow:
-            collections.append('garbage')
-        if recycling_tomorrow:
-            collections.append('recycling')
+        collections = [c for c in ('garbage', 'recycling') if c in collection_types]
 
-        email_result = send_waste_reminder_quebec(subscriber, address, collections, schedule)
+        tag = _alert_tag(address.id, 'quebec', 'waste_reminder', 'tomorrow', collection_date)
+        email_result = send_waste_reminder_quebec(subscriber, address, collections, schedule,
+                                                  delivery=delivery, tag=tag)
 
-        if email_result.get('success'):
+        if email_result.get('queued'):
+            result['reminder_queued'] = True
+        elif email_result.get('success'):
             result['reminder_sent'] = True
             log_alert(address.id, 'quebec', 'waste_reminder', 'tomorrow',
-                      reference_date=collection_date, delivered=True)
+                      reference_date=collection_date, delivered=True,
+                      sent_keys=sent_keys, alert_log=alert_log)
         else:
             result['error'] = email_result.get('error')
             log_alert(address.id, 'quebec', 'waste_reminder', 'tomorrow',
-                      reference_date=collection_date, delivered=False, error=result['error'])
+                      reference_date=collection_date, delivered=False, error=result['error'],
+                      sent_keys=sent_keys, alert_log=alert_log)
 
     except Exception as e:
         logger.error(f"Quebec waste reminder error for address {address.id}: {e}")
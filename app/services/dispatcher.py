@@ -64,7 +64,6 @@ def _get_montreal_snow_status(postal_code: str = None, lat: float = None, lon: f
         # If we have coordinates, try to find the cote_rue_id
         if lat and lon:
             # For Montreal, we need to find the street segment from coordinates
-            # This is a simplified version - full implementation would use geobase
             cote_rue_id = lookup_cote_rue_id_from_coords(lat, lon)
             if cote_rue_id:
                 status = get_status_for_street(cote_rue_id)
@@ -314,7 +313,9 @@ def lookup_cote_rue_id_from_coords(lat: float, lon: float) -> Optional[int]:
     """
     Look up Montreal cote_rue_id from coordinates.
 
-    This is a placeholder - full implementation would query the geobase.
+    Snaps to the nearest Geobase street side (see geobase.lookup_by_coordinates).
     """
-    # TODO: Implement proper coordinate-to-cote_rue_id lookup
-    return None
+    from app.services.montreal.geobase import lookup_by_coordinates
+
+    entry = lookup_by_coordinates(lat, lon)
+    return entry['cote_rue_id'] if entry else None
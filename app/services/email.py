@@ -5,11 +5,18 @@ Handles sending alert emails via the Resend API.
 Supports both Montreal and Quebec City.
 """
 
+import hashlib
+import json
 import logging
+import random
+import threading
 import time
-from typing import Optional, Dict, Any, List
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Optional, Dict, Any, List, Tuple, Deque
 
 from flask import current_app, render_template
+from markupsafe import escape
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +24,16 @@ logger = logging.getLogger(__name__)
 MAX_RETRIES = 3
 RETRY_DELAY = 2  # seconds
 
+# Maximum messages per Resend batch request
+BATCH_MAX_SIZE = 100
+
+# Shared limiter for Resend API requests (created from config on first use)
+_send_limiter = None
+
+# Rendered alert bodies with per-recipient placeholders, cleared every alert run
+_render_cache: Dict[tuple, str] = {}
+RENDER_CACHE_MAX_ENTRIES = 1000
+
 
 def get_resend_client():
     """Initialize Resend client."""
@@ -27,6 +44,7 @@ def get_resend_client():
         raise ValueError("RESEND_API_KEY not configured")
 
     resend.api_key = api_key
+    resend.api_url = current_app.config.get('RESEND_API_URL', 'https://api.resend.com')
     return resend
 
 
@@ -37,13 +55,228 @@ def get_sender_name(city: str = 'montreal') -> str:
     return 'Alert Quebec'  # Unified branding
 
 
+class TokenBucket:
+    """Thread-safe token bucket limiting the rate of provider API requests."""
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1):
+        """Block until the requested tokens are available, then take them."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+
+                wait = (tokens - self._tokens) / self.rate
+
+            time.sleep(wait)
+
+
+def get_send_limiter() -> TokenBucket:
+    """Get the process-wide Resend request limiter (EMAIL_SEND_RATE per second)."""
+    global _send_limiter
+
+    if _send_limiter is None:
+        _send_limiter = TokenBucket(current_app.config.get('EMAIL_SEND_RATE', 2))
+
+    return _send_limiter
+
+
+def clear_render_cache():
+    """Drop all cached email bodies (called at the start of each alert run)."""
+    _render_cache.clear()
+
+
+def _placeholder(field: str) -> str:
+    """Marker left in a cached body where a per-recipient value goes."""
+    return f"@@ALERT_{field.upper()}@@"
+
+
+def render_email(template: str, personal: Dict[str, Any], **context) -> str:
+    """
+    Render an email body, reusing the shared part across recipients.
+
+    The template is rendered once per (template, language, city, payload hash)
+    with placeholders for the personal fields; each recipient then only costs
+    a few string substitutions.
+
+    Args:
+        template: Template path (e.g., 'email/snow_urgent.html')
+        personal: Per-recipient values such as address and unsubscribe_url
+        **context: Template variables shared by all recipients with this payload
+
+    Returns:
+        Rendered HTML body
+    """
+    payload = json.dumps(context, sort_keys=True, default=str)
+    key = (
+        template,
+        context.get('language'),
+        context.get('city'),
+        hashlib.sha1(payload.encode()).hexdigest()
+    )
+
+    body = _render_cache.get(key)
+    if body is None:
+        placeholders = {field: _placeholder(field) for field in personal}
+        body = render_template(template, **context, **placeholders)
+
+        if len(_render_cache) >= RENDER_CACHE_MAX_ENTRIES:
+            _render_cache.clear()
+        _render_cache[key] = body
+
+    for field, value in personal.items():
+        body = body.replace(_placeholder(field), str(escape(value)))
+
+    return body
+
+
+def get_retry_delay(retry_count: int) -> float:
+    """Exponential backoff delay with jitter (50-150% of 2s, 4s, 8s...)."""
+    return RETRY_DELAY * (2 ** retry_count) * random.uniform(0.5, 1.5)
+
+
+def message_key(params: Dict[str, Any]) -> str:
+    """
+    Idempotency key of a prepared message.
+
+    Derived from the message itself, so every attempt at sending the same
+    message (retries, or a single send after a failed batch) carries the
+    same key and the provider delivers it at most once.
+    """
+    content = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def deliver(resend, params: Dict[str, Any], retry_count: int = 0,
+            limiter: Optional[TokenBucket] = None) -> Dict[str, Any]:
+    """
+    Send a prepared message through Resend, retrying with jittered backoff.
+
+    Does not need an app context, so it can run on delivery pool threads.
+
+    Args:
+        resend: Configured Resend module (from get_resend_client)
+        params: Resend send parameters
+        retry_count: Number of attempts already made
+        limiter: Optional token bucket to take a token from before each attempt
+
+    Returns:
+        Dict with success status and message ID or error
+    """
+    to = params['to'][0]
+    options = {'idempotency_key': message_key(params)}
+
+    while True:
+        if limiter is not None:
+            limiter.acquire()
+
+        try:
+            response = resend.Emails.send(params, options)
+
+            logger.info(f"Email sent to {to}: {response.get('id', 'unknown')}")
+
+            return {
+                'success': True,
+                'message_id': response.get('id'),
+                'to': to
+            }
+
+        except Exception as e:
+            logger.error(f"Failed to send email to {to}: {e}")
+
+            if retry_count >= MAX_RETRIES:
+                return {
+                    'success': False,
+                    'error': str(e),
+                    'to': to
+                }
+
+            time.sleep(get_retry_delay(retry_count))
+            retry_count += 1
+
+
+class EmailDeliveryPool:
+    """
+    Bounded thread pool that delivers rendered emails off the alert loop.
+
+    Alert runs submit messages and carry on; retries and backoff happen on
+    the pool threads, and every request takes a token from the shared send
+    limiter. completed() returns the outcomes that are already known, so
+    a run can record them as it goes; results() waits for every remaining
+    message. Both return each outcome together with the tag it was
+    submitted with, once.
+    """
+
+    def __init__(self, max_workers: int = None, limiter: Optional[TokenBucket] = None):
+        if max_workers is None:
+            max_workers = current_app.config.get('EMAIL_DELIVERY_CONCURRENCY', 8)
+        self._max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='email-delivery')
+        self._limiter = limiter or get_send_limiter()
+        self._submitted: Deque[Tuple[Any, Future]] = deque()
+
+    def submit(self, resend, params: Dict[str, Any], tag: Any = None) -> Dict[str, Any]:
+        """Queue a message for delivery."""
+        future = self._executor.submit(deliver, resend, params, 0, self._limiter)
+        self._submitted.append((tag, future))
+
+        return {
+            'success': True,
+            'queued': True,
+            'to': params['to'][0]
+        }
+
+    def completed(self) -> List[Tuple[Any, Dict[str, Any]]]:
+        """Return (tag, result) pairs of messages delivered so far, in submission order, without waiting."""
+        done = []
+        while self._submitted and self._submitted[0][1].done():
+            tag, future = self._submitted.popleft()
+            done.append((tag, future.result()))
+        return done
+
+    def results(self) -> List[Tuple[Any, Dict[str, Any]]]:
+        """Wait for all queued messages and return (tag, result) pairs."""
+        submitted, self._submitted = self._submitted, deque()
+        return [(tag, future.result()) for tag, future in submitted]
+
+    def shutdown(self, cancel: bool = False):
+        """
+        Stop the worker threads once queued messages are delivered.
+
+        Args:
+            cancel: Drop messages that have not started sending
+        """
+        self._executor.shutdown(wait=True, cancel_futures=cancel)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # A failed run must not keep sending alerts it can no longer record
+        self.shutdown(cancel=exc_type is not None)
+
+
 def send_email(
     to: str,
     subject: str,
     html_content: str,
     text_content: Optional[str] = None,
     city: str = 'montreal',
-    retry_count: int = 0
+    retry_count: int = 0,
+    delivery: Optional[EmailDeliveryPool] = None,
+    tag: Any = None
 ) -> Dict[str, Any]:
     """
     Send an email via Resend.
@@ -55,9 +288,12 @@ def send_email(
         text_content: Plain text body (optional)
         city: City for sender branding
         retry_count: Current retry attempt
+        delivery: Optional pool to queue the message on instead of sending inline
+        tag: Caller data returned with the result by delivery.results()
 
     Returns:
         Dict with success status and message ID or error
+        ('queued': True if handed to a delivery pool)
     """
     try:
         resend = get_resend_client()
@@ -74,30 +310,19 @@ def send_email(
         if text_content:
             params["text"] = text_content
 
-        response = resend.Emails.send(params)
-
-        logger.info(f"Email sent to {to}: {response.get('id', 'unknown')}")
-
-        return {
-            'success': True,
-            'message_id': response.get('id'),
-            'to': to
-        }
-
     except Exception as e:
         logger.error(f"Failed to send email to {to}: {e}")
-
-        # Retry with exponential backoff
-        if retry_count < MAX_RETRIES:
-            time.sleep(RETRY_DELAY * (2 ** retry_count))
-            return send_email(to, subject, html_content, text_content, city, retry_count + 1)
-
         return {
             'success': False,
             'error': str(e),
             'to': to
         }
 
+    if delivery is not None:
+        return delivery.submit(resend, params, tag)
+
+    return deliver(resend, params, retry_count)
+
 
 def send_confirmation_email(subscriber, address) -> Dict[str, Any]:
     """Send subscription confirmation email."""
@@ -130,19 +355,22 @@ def send_confirmation_email(subscriber, address) -> Dict[str, Any]:
     )
 
 
-def send_snow_scheduled_alert(subscriber, address, status_data: Dict) -> Dict[str, Any]:
+def send_snow_scheduled_alert(subscriber, address, status_data: Dict,
+                              delivery: Optional[EmailDeliveryPool] = None, tag: Any = None) -> Dict[str, Any]:
     """Send alert when snow removal is scheduled (Montreal)."""
     app_url = current_app.config.get('APP_URL', 'http://localhost:5000')
     unsubscribe_url = f"{app_url}/unsubscribe/{subscriber.unsubscribe_token}"
     language = getattr(subscriber, 'language', 'en') or 'en'
 
-    html_content = render_template(
+    html_content = render_email(
         'email/snow_scheduled.html',
-        address=address.full_address(),
+        {
+            'address': address.full_address(),
+            'unsubscribe_url': unsubscribe_url
+        },
         city='montreal',
         city_display='Montreal',
         status=status_data,
-        unsubscribe_url=unsubscribe_url,
         language=language
     )
 
@@ -155,23 +383,28 @@ def send_snow_scheduled_alert(subscriber, address, status_data: Dict) -> Dict[st
         to=subscriber.email,
         subject=subject,
         html_content=html_content,
-        city='montreal'
+        city='montreal',
+        delivery=delivery,
+        tag=tag
     )
 
 
-def send_snow_urgent_alert(subscriber, address, status_data: Dict) -> Dict[str, Any]:
+def send_snow_urgent_alert(subscriber, address, status_data: Dict,
+                           delivery: Optional[EmailDeliveryPool] = None, tag: Any = None) -> Dict[str, Any]:
     """Send urgent alert when snow removal is in progress (Montreal)."""
     app_url = current_app.config.get('APP_URL', 'http://localhost:5000')
     unsubscribe_url = f"{app_url}/unsubscribe/{subscriber.unsubscribe_token}"
     language = getattr(subscriber, 'language', 'en') or 'en'
 
-    html_content = render_template(
+    html_content = render_email(
         'email/snow_urgent.html',
-        address=address.full_address(),
+        {
+            'address': address.full_address(),
+            'unsubscribe_url': unsubscribe_url
+        },
         city='montreal',
         city_display='Montreal',
         status=status_data,
-        unsubscribe_url=unsubscribe_url,
         language=language
     )
 
@@ -184,22 +417,27 @@ def send_snow_urgent_alert(subscriber, address, status_data: Dict) -> Dict[str,
         to=subscriber.email,
         subject=subject,
         html_content=html_content,
-        city='montreal'
+        city='montreal',
+        delivery=delivery,
+        tag=tag
     )
 
 
-def send_snow_cleared_alert(subscriber, address) -> Dict[str, Any]:
+def send_snow_cleared_alert(subscriber, address,
+                            delivery: Optional[EmailDeliveryPool] = None, tag: Any = None) -> Dict[str, Any]:
     """Send confirmation when street is cleared (Montreal)."""
     app_url = current_app.config.get('APP_URL', 'http://localhost:5000')
     unsubscribe_url = f"{app_url}/unsubscribe/{subscriber.unsubscribe_token}"
     language = getattr(subscriber, 'language', 'en') or 'en'
 
-    html_content = render_template(
+    html_content = render_email(
         'email/snow_cleared.html',
-        address=address.full_address(),
+        {
+            'address': address.full_address(),
+            'unsubscribe_url': unsubscribe_url
+        },
         city='montreal',
         city_display='Montreal',
-        unsubscribe_url=unsubscribe_url,
         language=language
     )
 
@@ -212,11 +450,14 @@ def send_snow_cleared_alert(subscriber, address) -> Dict[str, Any]:
         to=subscriber.email,
         subject=subject,
         html_content=html_content,
-        city='montreal'
+        city='montreal',
+        delivery=delivery,
+        tag=tag
     )
 
 
-def send_snow_alert_quebec(subscriber, address, status_data: Dict) -> Dict[str, Any]:
+def send_snow_alert_quebec(subscriber, address, status_data: Dict,
+                           delivery: Optional[EmailDeliveryPool] = None, tag: Any = None) -> Dict[str, Any]:
     """Send snow removal alert for Quebec City (flashing lights detected)."""
     app_url = current_app.config.get('APP_URL', 'http://localhost:5000')
     unsubscribe_url = f"{app_url}/unsubscribe/{subscriber.unsubscribe_token}"
@@ -226,17 +467,19 @@ def send_snow_alert_quebec(subscriber, address, status_data: Dict) -> Dict[str,
     lights = status_data.get('lights', [])
     nearest_light = lights[0] if lights else {}
 
-    html_content = render_template(
+    html_content = render_email(
         'email/snow_quebec.html',
-        address=address.full_address(),
-        postal_code=address.postal_code,
+        {
+            'address': address.full_address(),
+            'postal_code': address.postal_code,
+            'unsubscribe_url': unsubscribe_url
+        },
         city='quebec',
         city_display='Quebec City',
         lights_nearby=lights_nearby,
         nearest_street=nearest_light.get('street', 'Unknown'),
         nearest_distance=int(nearest_light.get('distance', 0)),
         status=status_data,
-        unsubscribe_url=unsubscribe_url,
         language=language
     )
 
@@ -249,11 +492,14 @@ def send_snow_alert_quebec(subscriber, address, status_data: Dict) -> Dict[str,
         to=subscriber.email,
         subject=subject,
         html_content=html_content,
-        city='quebec'
+        city='quebec',
+        delivery=delivery,
+        tag=tag
     )
 
 
-def send_waste_reminder(subscriber, address, collections: List[Dict]) -> Dict[str, Any]:
+def send_waste_reminder(subscriber, address, collections: List[Dict],
+                        delivery: Optional[EmailDeliveryPool] = None, tag: Any = None) -> Dict[str, Any]:
     """Send waste collection reminder (Montreal)."""
     app_url = current_app.config.get('APP_URL', 'http://localhost:5000')
     unsubscribe_url = f"{app_url}/unsubscribe/{subscriber.unsubscribe_token}"
@@ -262,13 +508,15 @@ def send_waste_reminder(subscriber, address, collections: List[Dict]) -> Dict[st
     collection_names = ', '.join([c['name'] for c in collections])
     collection_names_fr = ', '.join([c.get('name_fr', c['name']) for c in collections])
 
-    html_content = render_template(
+    html_content = render_email(
         'email/waste_reminder.html',
-        address=address.full_address(),
+        {
+            'address': address.full_address(),
+            'unsubscribe_url': unsubscribe_url
+        },
         city='montreal',
         city_display='Montreal',
         collections=collections,
-        unsubscribe_url=unsubscribe_url,
         language=language
     )
 
@@ -281,11 +529,14 @@ def send_waste_reminder(subscriber, address, collections: List[Dict]) -> Dict[st
         to=subscriber.email,
         subject=subject,
         html_content=html_content,
-        city='montreal'
+        city='montreal',
+        delivery=delivery,
+        tag=tag
     )
 
 
-def send_waste_reminder_quebec(subscriber, address, collection_types: List[str], schedule: Dict) -> Dict[str, Any]:
+def send_waste_reminder_quebec(subscriber, address, collection_types: List[str], schedule: Dict,
+                               delivery: Optional[EmailDeliveryPool] = None, tag: Any = None) -> Dict[str, Any]:
     """Send waste collection reminder for Quebec City."""
     app_url = current_app.config.get('APP_URL', 'http://localhost:5000')
     unsubscribe_url = f"{app_url}/unsubscribe/{subscriber.unsubscribe_token}"
@@ -303,17 +554,19 @@ def send_waste_reminder_quebec(subscriber, address, collection_types: List[str],
     collection_display = ' & '.join(collection_names)
     collection_display_fr = ' & '.join(collection_names_fr)
 
-    html_content = render_template(
+    html_content = render_email(
         'email/waste_reminder_quebec.html',
-        address=address.full_address(),
-        postal_code=address.postal_code,
+        {
+            'address': address.full_address(),
+            'postal_code': address.postal_code,
+            'unsubscribe_url': unsubscribe_url
+        },
         city='quebec',
         city_display='Quebec City',
         collection_types=collection_types,
         collection_display=collection_display,
         collection_display_fr=collection_display_fr,
         schedule=schedule,
-        unsubscribe_url=unsubscribe_url,
         language=language
     )
 
@@ -326,10 +579,156 @@ def send_waste_reminder_quebec(subscriber, address, collection_types: List[str],
         to=subscriber.email,
         subject=subject,
         html_content=html_content,
-        city='quebec'
+        city='quebec',
+        delivery=delivery,
+        tag=tag
     )
 
 
+def send_batch(resend, messages: List[Dict[str, Any]],
+               limiter: Optional[TokenBucket] = None) -> List[Dict[str, Any]]:
+    """
+    Send prepared messages through the Resend batch endpoint.
+
+    Messages are chunked to BATCH_MAX_SIZE and sent in permissive validation
+    mode, so one invalid message does not reject its whole chunk. Each chunk
+    carries an idempotency key derived from its messages' keys, so a chunk
+    request that failed in transit is retried without sending it twice.
+
+    Returns:
+        One result dict per message, in input order. Failed results have
+        'rejected' set when the provider refused that message, and unset
+        when the whole chunk request failed (it may still have been sent).
+    """
+    results = []
+
+    for start in range(0, len(messages), BATCH_MAX_SIZE):
+        chunk = messages[start:start + BATCH_MAX_SIZE]
+        chunk_key = hashlib.sha256(''.join(message_key(params) for params in chunk).encode()).hexdigest()
+        options = {'batch_validation': 'permissive', 'idempotency_key': chunk_key}
+
+        retry_count = 0
+        while True:
+            if limiter is not None:
+                limiter.acquire()
+
+            try:
+                response = resend.Batch.send(chunk, options)
+                break
+            except Exception as e:
+                logger.error(f"Batch send of {len(chunk)} emails failed: {e}")
+
+                if retry_count >= MAX_RETRIES:
+                    response = None
+                    break
+
+                time.sleep(get_retry_delay(retry_count))
+                retry_count += 1
+
+        if response is None:
+            results.extend({'success': False, 'error': 'Batch request failed', 'rejected': False,
+                            'to': params['to'][0]} for params in chunk)
+            continue
+
+        # Accepted messages are returned in order, rejected ones listed by index
+        errors = {error['index']: error.get('message') for error in response.get('errors') or []}
+        accepted = iter(response.get('data') or [])
+
+        for index, params in enumerate(chunk):
+            to = params['to'][0]
+            sent = None if index in errors else next(accepted, None)
+
+            if sent is None:
+                results.append({
+                    'success': False,
+                    'error': errors.get(index, 'No batch response for message'),
+                    'rejected': index in errors,
+                    'to': to
+                })
+            else:
+                results.append({'success': True, 'message_id': sent.get('id'), 'to': to})
+
+        logger.info(f"Batch sent {len(chunk) - len(errors)}/{len(chunk)} emails")
+
+    return results
+
+
+def _send_chunk(resend, messages: List[Dict[str, Any]],
+                limiter: Optional[TokenBucket] = None) -> List[Dict[str, Any]]:
+    """
+    Send one batch, retrying the messages the provider rejected one by one.
+
+    Messages of a chunk whose request failed are reported failed, not
+    resent individually: the provider may have accepted the chunk, and
+    only its chunk idempotency key would catch the duplicate.
+    """
+    outcomes = send_batch(resend, messages, limiter)
+    for index, outcome in enumerate(outcomes):
+        if outcome.get('rejected'):
+            outcomes[index] = deliver(resend, messages[index], 0, limiter)
+    return outcomes
+
+
+class BatchEmailDelivery(EmailDeliveryPool):
+    """
+    Delivery stage that sends queued messages through the batch endpoint.
+
+    submit() sends a batch on the pool threads as soon as BATCH_MAX_SIZE
+    messages are queued, so at most one batch of rendered bodies waits in
+    memory per pool thread; results() sends the remainder. A failed batch
+    request is retried under its chunk idempotency key; entries the provider
+    rejected are retried individually under their own message keys.
+    """
+
+    def __init__(self, max_workers: int = None, limiter: Optional[TokenBucket] = None):
+        super().__init__(max_workers, limiter)
+        self._resend = None
+        self._queued: List[Tuple[Any, Dict[str, Any]]] = []
+
+    def submit(self, resend, params: Dict[str, Any], tag: Any = None) -> Dict[str, Any]:
+        """Queue a message, sending the batch once it is full."""
+        self._resend = resend
+        self._queued.append((tag, params))
+
+        if len(self._queued) >= BATCH_MAX_SIZE:
+            self._send_queued()
+
+        return {
+            'success': True,
+            'queued': True,
+            'to': params['to'][0]
+        }
+
+    def _send_queued(self):
+        """Hand the queued messages to the pool, waiting while every thread is busy."""
+        queued, self._queued = self._queued, []
+        if not queued:
+            return
+
+        pending = [future for _, future in self._submitted if not future.done()]
+        while len(pending) >= self._max_workers:
+            wait(pending, return_when=FIRST_COMPLETED)
+            pending = [future for future in pending if not future.done()]
+
+        future = self._executor.submit(_send_chunk, self._resend,
+                                       [params for _, params in queued], self._limiter)
+        self._submitted.append(([tag for tag, _ in queued], future))
+
+    def completed(self) -> List[Tuple[Any, Dict[str, Any]]]:
+        """Return (tag, result) pairs of batches sent so far, without waiting."""
+        done = []
+        while self._submitted and self._submitted[0][1].done():
+            tags, future = self._submitted.popleft()
+            done.extend(zip(tags, future.result()))
+        return done
+
+    def results(self) -> List[Tuple[Any, Dict[str, Any]]]:
+        """Send the remaining queued messages and return all (tag, result) pairs."""
+        self._send_queued()
+        submitted, self._submitted = self._submitted, deque()
+        return [pair for tags, future in submitted for pair in zip(tags, future.result())]
+
+
 def send_batch_emails(emails: List[Dict[str, Any]]) -> Dict[str, Any]:
     """
     Send multiple emails in batch.
@@ -338,33 +737,42 @@ def send_batch_emails(emails: List[Dict[str, Any]]) -> Dict[str, Any]:
         emails: List of email configs, each with 'to', 'subject', 'html_content', optional 'city'
 
     Returns:
-        Summary of sent/failed emails
+        Summary of sent/failed emails with a per-recipient result list
     """
     results = {
         'sent': 0,
         'failed': 0,
-        'errors': []
+        'errors': [],
+        'results': []
     }
 
-    for email_config in emails:
-        result = send_email(
-            to=email_config['to'],
-            subject=email_config['subject'],
-            html_content=email_config['html_content'],
-            text_content=email_config.get('text_content'),
-            city=email_config.get('city', 'montreal')
-        )
+    outcomes = []
+    with BatchEmailDelivery() as delivery:
+        for email_config in emails:
+            result = send_email(
+                to=email_config['to'],
+                subject=email_config['subject'],
+                html_content=email_config['html_content'],
+                text_content=email_config.get('text_content'),
+                city=email_config.get('city', 'montreal'),
+                delivery=delivery
+            )
+
+            if not result.get('queued'):
+                outcomes.append(result)
+
+        outcomes.extend(result for _, result in delivery.results())
+
+    for result in outcomes:
+        results['results'].append(result)
 
         if result['success']:
             results['sent'] += 1
         else:
             results['failed'] += 1
             results['errors'].append({
-                'to': email_config['to'],
+                'to': result['to'],
                 'error': result.get('error')
             })
 
-        # Small delay between emails to avoid rate limiting
-        time.sleep(0.1)
-
     return results
@@ -1,6 +1,6 @@
 # Montreal-specific services
 from .planif_neige import get_status_for_street, get_all_statuses_for_date, detect_status_change
-from .geobase import lookup_address, lookup_by_coordinates, refresh_cache
+from .geobase import lookup_address, resolve_addresses, lookup_by_coordinates, refresh_cache
 from .waste import get_schedule_for_location, find_sector_for_point
 
 __all__ = [
@@ -8,6 +8,7 @@ __all__ = [
     'get_all_statuses_for_date',
     'detect_status_change',
     'lookup_address',
+    'resolve_addresses',
     'lookup_by_coordinates',
     'refresh_cache',
     'get_schedule_for_location',
@@ -7,16 +7,30 @@ for address to COTE_RUE_ID mapping.
 
 import re
 import csv
+import hashlib
+import heapq
 import io
+import json
+import math
+import os
 import logging
+import tempfile
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple, Iterable, Iterator
 
+import ijson
+import numpy as np
 import requests
+import shapely
 from flask import current_app
+from sqlalchemy import text
 
 from app import db
-from app.models import GeobaseCache
+from app.models import Address, GeobaseCache, DatasetVersion
 
 logger = logging.getLogger(__name__)
 
@@ -48,40 +62,298 @@ ABBREVIATIONS = {
     'mt-': 'mont-',
 }
 
+# Accent folding for street names (lowercase input)
+ACCENT_TABLE = str.maketrans('àâäçéèêëîïôöùûü', 'aaaceeeeiioouuu')
+
+# Leading abbreviation ('st', 'ste', 'mt') followed by a separator
+ABBREVIATION_PATTERN = re.compile(r'^(%s)(?=[\s-]|$)' % '|'.join(
+    sorted((abbrev for abbrev in ABBREVIATIONS if not abbrev.endswith('-')), key=len, reverse=True)
+))
+
+# Leading street type word ('rue ', 'av. ', ...)
+STREET_TYPE_PATTERN = re.compile(r'^(?:%s) ' % '|'.join(
+    re.escape(var.translate(ACCENT_TABLE))
+    for var in sorted({var for variations in STREET_TYPES.values() for var in variations},
+                      key=len, reverse=True)
+))
+
+# "<number> <street>" or "<street> <number>"
+ADDRESS_PATTERN = re.compile(
+    r'^(?:(?P<number>\d+)\s*[-,]?\s*(?P<street>.+)|(?P<street_last>.+?)\s+(?P<number_last>\d+))$'
+)
+
+# Street type variation at the start of the street part, tried in STREET_TYPES order
+STREET_TYPE_VARIATIONS = {
+    var: type_name.capitalize()
+    for type_name, variations in STREET_TYPES.items() for var in variations
+}
+ADDRESS_TYPE_PATTERN = re.compile(
+    r'^(?P<type>%s)\s+(?P<name>.+)$' % '|'.join(re.escape(var) for var in STREET_TYPE_VARIATIONS),
+    re.IGNORECASE
+)
+
+# Streaming ingestion sizes
+DOWNLOAD_CHUNK_SIZE = 1 << 20  # 1 MB
+INSERT_BATCH_SIZE = 5000
+
+# DatasetVersion name of the Geobase Double download
+GEOBASE_DATASET = 'geobase_double'
+
+# Source fields hashed to detect changed rows
+HASHED_COLUMNS = ('cote_rue_id', 'nom_voie', 'type_voie', 'debut_adresse',
+                  'fin_adresse', 'cote', 'nom_ville', 'geometry')
+
+# The CSV has no line geometry; side lines come from the same dataset's
+# GeoJSON resource, joined on COTE_RUE_ID. Unless GEOBASE_GEOJSON_URL is
+# set, the resource is looked up in the portal's CKAN dataset metadata.
+GEOBASE_PACKAGE_URL = (
+    "https://donnees.montreal.ca/api/3/action/package_show"
+    "?id=984f7a68-ab34-4092-9204-4bdfcca767c5"
+)
+
+# geobase_cache columns loaded from the CSV
+GEOBASE_COLUMNS = HASHED_COLUMNS + ('nom_voie_norm', 'last_updated', 'row_hash')
+
+# Null marker of COPY FROM STDIN loads (an empty field is an empty string)
+COPY_NULL = '\\N'
+
+# Tables holding the Geobase generation being loaded and the one before the live one
+GEOBASE_STAGING_TABLE = 'geobase_cache_staging'
+GEOBASE_PREVIOUS_TABLE = 'geobase_cache_previous'
+
+# Seconds between checks that the street index still matches geobase_cache
+STREET_INDEX_CHECK_SECONDS = 300
+
+# Autocomplete: cached (term, limit) results, and how often popularity is recounted
+AUTOCOMPLETE_CACHE_SIZE = 2048
+AUTOCOMPLETE_REBUILD_SECONDS = 3600
+
+# Coordinate lookups snap to segments at most this far away
+MAX_SNAP_METERS = 150
+
+# Local planar projection (equirectangular around Montreal) for distances in meters
+METERS_PER_DEGREE_LAT = 111320
+METERS_PER_DEGREE_LON = METERS_PER_DEGREE_LAT * math.cos(math.radians(45.55))
+
+# In-memory street-name index over geobase_cache, rebuilt after refresh_cache
+_street_index_lock = threading.Lock()
+_street_index = {
+    'suffixes': None,  # sorted word-start suffixes of every street match key
+    'suffix_streets': None,  # match key owning each suffix (parallel to suffixes)
+    'streets': None,  # match key -> GeobaseCache row IDs
+    'ranges': None,  # match key -> {parity: civic number intervals}
+    'version': None,  # (row count, latest last_updated) of the indexed table
+    'checked_at': None
+}
+
+# Distinct (street, type, borough) completions for search_addresses
+_autocomplete_lock = threading.Lock()
+_autocomplete = {
+    'suffixes': None,  # sorted word-start suffixes of every completion key
+    'suffix_entries': None,  # entry index per suffix (parallel to suffixes)
+    'names': None,  # sorted completion keys, for typo matching
+    'name_entries': None,  # entry index per name (parallel to names)
+    'entries': None,  # (key, popularity, result dict)
+    'version': None,
+    'built_at': None,
+    'checked_at': None
+}
+_completion_cache: 'OrderedDict[Tuple[str, int], List[Dict[str, Any]]]' = OrderedDict()
+
+# STR-tree over the side lines of every geobase_cache row with geometry
+_spatial_index_lock = threading.Lock()
+_spatial_index = {
+    'tree': None,  # shapely STRtree over projected side lines
+    'lines': None,  # projected LineStrings (parallel to row_ids)
+    'row_ids': None,  # GeobaseCache row IDs (numpy array)
+    'cotes': None,  # 'Droit' / 'Gauche' per line
+    'version': None,
+    'checked_at': None
+}
+
 
 def normalize_street_name(name: str) -> str:
     """Normalize street name for matching."""
     if not name:
         return ''
 
-    # Convert to lowercase
-    normalized = name.lower().strip()
-
-    # Remove accents (simple version)
-    accent_map = {
-        'é': 'e', 'è': 'e', 'ê': 'e', 'ë': 'e',
-        'à': 'a', 'â': 'a', 'ä': 'a',
-        'ù': 'u', 'û': 'u', 'ü': 'u',
-        'ô': 'o', 'ö': 'o',
-        'î': 'i', 'ï': 'i',
-        'ç': 'c',
-    }
-    for accented, plain in accent_map.items():
-        normalized = normalized.replace(accented, plain)
+    # Lowercase and remove accents
+    normalized = name.lower().strip().translate(ACCENT_TABLE)
 
     # Expand abbreviations
-    for abbrev, full in ABBREVIATIONS.items():
-        if normalized.startswith(abbrev):
-            normalized = full + normalized[len(abbrev):]
+    normalized = ABBREVIATION_PATTERN.sub(lambda m: ABBREVIATIONS[m.group(1)], normalized)
 
     # Remove common prefixes like "rue", "avenue" etc.
-    for type_name, variations in STREET_TYPES.items():
-        for var in variations:
-            if normalized.startswith(var + ' '):
-                normalized = normalized[len(var) + 1:]
-                break
+    return STREET_TYPE_PATTERN.sub('', normalized, count=1)
+
+
+def street_match_key(name: str) -> str:
+    """Normalize a street name for index matching (hyphens and spaces are equivalent)."""
+    return ' '.join(normalize_street_name(name).replace('-', ' ').split())
+
+
+def _table_version():
+    """Row count and latest update time of geobase_cache."""
+    return db.session.query(
+        db.func.count(GeobaseCache.id), db.func.max(GeobaseCache.last_updated)
+    ).one()
+
+
+def rebuild_street_index() -> int:
+    """
+    Build the street-name index from geobase_cache.
+
+    Every street is indexed under each of its word starts ('saint denis'
+    and 'denis'), so substring-style matches become a bisect over a
+    sorted list instead of an ILIKE table scan. Each street also gets
+    sorted civic number intervals per parity (see find_segment).
+
+    Returns:
+        Number of distinct streets indexed
+    """
+    streets: Dict[str, List[int]] = {}
+    segments: Dict[str, List[Tuple[int, int, int]]] = {}
+    rows = db.session.query(GeobaseCache.id, GeobaseCache.nom_voie_norm,
+                            GeobaseCache.debut_adresse, GeobaseCache.fin_adresse)
+    for row_id, key, debut, fin in rows.yield_per(INSERT_BATCH_SIZE):
+        streets.setdefault(key, []).append(row_id)
+        segments.setdefault(key, []).append((debut or 0, fin or 0, row_id))
+
+    ranges = {key: _build_ranges(street_segments) for key, street_segments in segments.items()}
+
+    entries = []
+    for key in streets:
+        words = key.split(' ')
+        for i in range(len(words)):
+            entries.append((' '.join(words[i:]), key))
+    entries.sort()
+
+    with _street_index_lock:
+        _street_index['suffixes'] = [suffix for suffix, _ in entries]
+        _street_index['suffix_streets'] = [key for _, key in entries]
+        _street_index['streets'] = streets
+        _street_index['ranges'] = ranges
+        _street_index['version'] = tuple(_table_version())
+        _street_index['checked_at'] = time.monotonic()
+
+    logger.info(f"Geobase street index built: {len(streets)} streets, {len(entries)} keys")
+    return len(streets)
+
+
+def _build_ranges(segments: List[Tuple[int, int, int]]) -> Dict[int, Tuple[list, list, list]]:
+    """
+    Build per-parity interval arrays for one street's (debut, fin, row_id) segments.
 
-    return normalized
+    A side of a street holds only odd or only even civic numbers, so a
+    segment whose bounds share a parity is filed under that parity alone;
+    mixed ranges are filed under both. Each parity gets starts sorted
+    ascending, the running maximum end, and the (start, end, row_id, exact)
+    entries, for bisect lookups in find_segment.
+    """
+    ranges = {}
+    for parity in (0, 1):
+        entries = []
+        for debut, fin, row_id in segments:
+            lo, hi = min(debut, fin), max(debut, fin)
+            if hi <= 0:
+                continue
+            exact = lo % 2 == hi % 2
+            if exact and lo % 2 != parity:
+                continue
+            entries.append((lo, hi, row_id, exact))
+        entries.sort()
+
+        max_ends = []
+        running = 0
+        for _, hi, _, _ in entries:
+            running = max(running, hi)
+            max_ends.append(running)
+
+        ranges[parity] = ([entry[0] for entry in entries], max_ends, entries)
+    return ranges
+
+
+def find_segment(street: str, civic_number: int) -> Optional[int]:
+    """
+    Find the segment side of an indexed street that contains a civic number.
+
+    Bisects the street's intervals for the civic number's parity, then
+    walks back only while the running maximum end can still cover it.
+    Ranges matching the parity exactly beat mixed ranges, then the
+    narrowest range wins, so the answer is deterministic.
+
+    Args:
+        street: Street match key (as returned by find_streets)
+        civic_number: Civic number to locate
+
+    Returns:
+        GeobaseCache row ID, or None if no segment covers the number
+    """
+    street_ranges = (_street_index['ranges'] or {}).get(street)
+    if not street_ranges:
+        return None
+
+    starts, max_ends, entries = street_ranges[civic_number % 2]
+    best = None
+    i = bisect_right(starts, civic_number) - 1
+    while i >= 0 and max_ends[i] >= civic_number:
+        lo, hi, row_id, exact = entries[i]
+        if hi >= civic_number:
+            candidate = (not exact, hi - lo, row_id)
+            if best is None or candidate < best:
+                best = candidate
+        i -= 1
+
+    return best[2] if best else None
+
+
+def clear_street_index():
+    """Drop the in-memory street index (rebuilt on next lookup)."""
+    with _street_index_lock:
+        for key in _street_index:
+            _street_index[key] = None
+
+
+def _ensure_street_index():
+    """Build the index on first use and rebuild it if geobase_cache changed."""
+    checked_at = _street_index['checked_at']
+    if checked_at is not None and time.monotonic() - checked_at < STREET_INDEX_CHECK_SECONDS:
+        return
+
+    if _street_index['version'] == tuple(_table_version()):
+        _street_index['checked_at'] = time.monotonic()
+        return
+
+    rebuild_street_index()
+
+
+def find_streets(term: str) -> List[str]:
+    """
+    Find indexed streets matching a search term.
+
+    Args:
+        term: Street name or word prefix (normalized with street_match_key)
+
+    Returns:
+        Street match keys ranked exact match first, then streets starting
+        with the term, then streets with a later word starting with it.
+    """
+    _ensure_street_index()
+
+    term = street_match_key(term)
+    with _street_index_lock:
+        suffixes = _street_index['suffixes']
+        suffix_streets = _street_index['suffix_streets']
+    if not term or not suffixes:
+        return []
+
+    matches = set()
+    i = bisect_left(suffixes, term)
+    while i < len(suffixes) and suffixes[i].startswith(term):
+        matches.add(suffix_streets[i])
+        i += 1
+
+    return sorted(matches, key=lambda key: (key != term, not key.startswith(term), key))
 
 
 def parse_address(address: str) -> Dict[str, Any]:
@@ -91,35 +363,26 @@ def parse_address(address: str) -> Dict[str, Any]:
 
     address = address.strip()
 
-    # Try to extract civic number from start
-    match = re.match(r'^(\d+)\s*[-,]?\s*(.+)$', address)
+    # Civic number first, or street name first then number
+    match = ADDRESS_PATTERN.match(address)
+    if not match:
+        return {'street_name': address, 'civic_number': None}
 
-    if match:
-        civic_number = int(match.group(1))
-        street_part = match.group(2).strip()
+    if match.group('number'):
+        civic_number = int(match.group('number'))
+        street_part = match.group('street').strip()
     else:
-        # Maybe street name first, then number
-        match = re.match(r'^(.+?)\s+(\d+)$', address)
-        if match:
-            street_part = match.group(1).strip()
-            civic_number = int(match.group(2))
-        else:
-            return {'street_name': address, 'civic_number': None}
+        civic_number = int(match.group('number_last'))
+        street_part = match.group('street_last').strip()
 
     # Try to extract street type
     street_type = None
     street_name = street_part
 
-    for type_name, variations in STREET_TYPES.items():
-        for var in variations:
-            pattern = rf'^({var})\s+(.+)$'
-            type_match = re.match(pattern, street_part, re.IGNORECASE)
-            if type_match:
-                street_type = type_name.capitalize()
-                street_name = type_match.group(2)
-                break
-        if street_type:
-            break
+    type_match = ADDRESS_TYPE_PATTERN.match(street_part)
+    if type_match:
+        street_type = STREET_TYPE_VARIATIONS[type_match.group('type').lower()]
+        street_name = type_match.group('name')
 
     return {
         'civic_number': civic_number,
@@ -129,8 +392,27 @@ def parse_address(address: str) -> Dict[str, Any]:
     }
 
 
-def download_geobase_csv() -> str:
-    """Download Geobase Double CSV data from Montreal open data portal."""
+def parse_addresses(addresses: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """Parse address strings lazily, one parse_address dict per input."""
+    for address in addresses:
+        yield parse_address(address)
+
+
+def download_geobase_csv(version: Optional[DatasetVersion] = None) -> Optional[Dict[str, Any]]:
+    """
+    Stream the Geobase Double CSV from Montreal open data portal to a temp file.
+
+    The body is written in DOWNLOAD_CHUNK_SIZE chunks, so memory use does
+    not grow with the file size. The stored validators of the last version
+    are sent as If-None-Match / If-Modified-Since.
+
+    Args:
+        version: Last fetched version of the dataset, if any
+
+    Returns:
+        None if the server answered 304 Not Modified, otherwise a dict with
+        path (the caller removes it), etag, last_modified and content_hash
+    """
     # The actual CSV URL from donnees.montreal.ca
     csv_url = (
         "https://donnees.montreal.ca/dataset/"
@@ -138,73 +420,577 @@ def download_geobase_csv() -> str:
         "9d3d60d8-4e7f-493e-b7a6-6e89c19aee93/download/geobase-double.csv"
     )
 
+    headers = {}
+    if version and version.etag:
+        headers['If-None-Match'] = version.etag
+    if version and version.last_modified:
+        headers['If-Modified-Since'] = version.last_modified
+
     logger.info(f"Downloading Geobase CSV from {csv_url}")
 
+    fd, path = tempfile.mkstemp(prefix='geobase-', suffix='.csv')
     try:
-        response = requests.get(csv_url, timeout=120)
-        response.raise_for_status()
-        return response.text
+        with os.fdopen(fd, 'wb') as out, \
+             requests.get(csv_url, headers=headers, stream=True, timeout=120) as response:
+            if response.status_code == 304:
+                result = None
+            else:
+                response.raise_for_status()
+                digest = hashlib.sha256()
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    out.write(chunk)
+                    digest.update(chunk)
+                result = {
+                    'path': path,
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified'),
+                    'content_hash': digest.hexdigest()
+                }
     except requests.RequestException as e:
         logger.error(f"Failed to download Geobase CSV: {e}")
+        os.remove(path)
+        raise
+    except Exception:
+        os.remove(path)
         raise
 
+    if result is None:
+        logger.info("Geobase CSV not modified since last download")
+        os.remove(path)
+
+    return result
+
+
+def encode_geometry(coords: Optional[np.ndarray]) -> Optional[bytes]:
+    """Pack an (n, 2) array of (lon, lat) points as little-endian float64 bytes."""
+    if coords is None or len(coords) < 2:
+        return None
+    return np.ascontiguousarray(coords, dtype='<f8').tobytes()
+
+
+def decode_geometry(data: bytes) -> np.ndarray:
+    """Unpack encode_geometry bytes into an (n, 2) array of (lon, lat) points."""
+    return np.frombuffer(data, dtype='<f8').reshape(-1, 2)
+
+
+def geobase_geojson_url() -> str:
+    """URL of the Geobase Double GeoJSON resource (GEOBASE_GEOJSON_URL or the portal metadata)."""
+    url = current_app.config.get('GEOBASE_GEOJSON_URL')
+    if url:
+        return url
+
+    response = requests.get(GEOBASE_PACKAGE_URL, timeout=30)
+    response.raise_for_status()
+    for resource in response.json()['result']['resources']:
+        if (resource.get('format') or '').lower() == 'geojson' and resource.get('url'):
+            return resource['url']
+
+    raise ValueError("Geobase Double dataset has no GeoJSON resource")
+
+
+def download_geobase_geometries() -> Dict[int, bytes]:
+    """
+    Download the side line of every segment from the Geobase Double GeoJSON.
+
+    The body is streamed to a temp file first, like the CSV, then parsed
+    one feature at a time; only the packed side lines are kept.
+
+    Returns:
+        Dict mapping COTE_RUE_ID to its side line (see encode_geometry)
+    """
+    url = geobase_geojson_url()
+    logger.info(f"Downloading Geobase GeoJSON from {url}")
+
+    geometries = {}
+    fd, path = tempfile.mkstemp(prefix='geobase-', suffix='.geojson')
+    try:
+        with os.fdopen(fd, 'wb') as out, \
+             requests.get(url, stream=True, timeout=300) as response:
+            response.raise_for_status()
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                out.write(chunk)
+
+        with open(path, 'rb') as f:
+            for feature in ijson.items(f, 'features.item', use_float=True):
+                try:
+                    cote_rue_id = int((feature.get('properties') or {})['COTE_RUE_ID'])
+                    coords = shapely.get_coordinates(shapely.geometry.shape(feature['geometry']))
+                except (KeyError, TypeError, ValueError, AttributeError, shapely.errors.ShapelyError):
+                    continue
+                geometry = encode_geometry(coords)
+                if geometry is not None:
+                    geometries[cote_rue_id] = geometry
+    finally:
+        os.remove(path)
+
+    logger.info(f"Geobase GeoJSON parsed: {len(geometries)} side lines")
+    return geometries
+
+
+def stored_geobase_geometries() -> Dict[int, bytes]:
+    """Side lines of the live generation by COTE_RUE_ID, for refreshes without the GeoJSON."""
+    return dict(db.session.query(GeobaseCache.cote_rue_id, GeobaseCache.geometry)
+                .filter(GeobaseCache.geometry.isnot(None)))
+
+
+def _row_hash(row: Dict[str, Any]) -> str:
+    """SHA-1 of the source fields of a parsed Geobase row."""
+    content = '\x1f'.join(str(row[column]) for column in HASHED_COLUMNS)
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+def iter_geobase_rows(path: str, updated_at: datetime = None,
+                      geometries: Optional[Dict[int, bytes]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Parse a Geobase Double CSV file one row at a time.
+
+    Args:
+        path: CSV file path
+        updated_at: last_updated value for every row (defaults to now)
+        geometries: Side lines by COTE_RUE_ID (see download_geobase_geometries)
+
+    Yields:
+        geobase_cache column dicts; invalid rows are logged and skipped
+    """
+    updated_at = updated_at or datetime.utcnow()
+    geometries = geometries or {}
+
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        for row in csv.DictReader(f):
+            try:
+                cote_rue_id = int(row.get('COTE_RUE_ID', 0))
+                parsed = {
+                    'cote_rue_id': cote_rue_id,
+                    'nom_voie': row.get('NOM_VOIE', ''),
+                    'type_voie': row.get('TYPE_F', ''),
+                    'debut_adresse': int(row.get('DEBUT_ADRESSE', 0) or 0),
+                    'fin_adresse': int(row.get('FIN_ADRESSE', 0) or 0),
+                    'cote': row.get('COTE', ''),
+                    'nom_ville': row.get('NOM_VILLE', 'Montréal'),
+                    'geometry': geometries.get(cote_rue_id),
+                    'last_updated': updated_at
+                }
+            except (ValueError, KeyError) as e:
+                logger.warning(f"Skipping invalid row: {e}")
+                continue
+
+            parsed['nom_voie_norm'] = street_match_key(parsed['nom_voie'])
+            parsed['row_hash'] = _row_hash(parsed)
+            yield parsed
+
+
+def _batches(rows: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Group an iterable of rows into lists of at most size rows."""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _copy_value(value: Any) -> Any:
+    """CSV field for COPY: bytea as hex, None as the \\N null marker."""
+    if value is None:
+        return COPY_NULL
+    if isinstance(value, bytes):
+        return '\\x' + value.hex()
+    return value
+
+
+def _copy_rows(batch: List[Dict[str, Any]], table_name: str):
+    """
+    Load one batch into a table with PostgreSQL COPY FROM STDIN.
+
+    csv.writer writes '' and None alike as an empty field, which COPY's
+    default csv NULL would read back as NULL; None is written as COPY_NULL
+    instead so empty strings stay empty strings, as with the INSERT path.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in batch:
+        writer.writerow([_copy_value(row[column]) for column in GEOBASE_COLUMNS])
+    buffer.seek(0)
+
+    cursor = db.session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {table_name} ({', '.join(GEOBASE_COLUMNS)}) FROM STDIN "
+            f"WITH (FORMAT csv, NULL '{COPY_NULL}')",
+            buffer
+        )
+    finally:
+        cursor.close()
+
+
+def load_geobase_rows(rows: Iterable[Dict[str, Any]], table: db.Table = None) -> int:
+    """
+    Insert rows in INSERT_BATCH_SIZE batches without committing.
+
+    Uses COPY on PostgreSQL and executemany Core inserts elsewhere; only
+    one batch is held in memory at a time.
+
+    Args:
+        rows: geobase_cache column dicts
+        table: Target table (defaults to geobase_cache)
+
+    Returns:
+        Number of rows inserted
+    """
+    table = table if table is not None else GeobaseCache.__table__
+    use_copy = db.engine.dialect.name == 'postgresql'
+    count = 0
+
+    for batch in _batches(rows, INSERT_BATCH_SIZE):
+        if use_copy:
+            _copy_rows(batch, table.name)
+        else:
+            db.session.execute(table.insert(), batch)
+        count += len(batch)
+
+    return count
+
+
+def _staging_table() -> db.Table:
+    """
+    Create an empty staging copy of geobase_cache, without secondary indexes.
+
+    Indexes are added after the load (see _create_generation_indexes).
+    """
+    live = GeobaseCache.__table__
+    columns = [
+        db.Column(column.name, column.type, primary_key=column.primary_key, nullable=column.nullable)
+        for column in live.columns
+    ]
+    staging = db.Table(GEOBASE_STAGING_TABLE, db.MetaData(), *columns)
+
+    connection = db.session.connection()
+    db.session.execute(text(f"DROP TABLE IF EXISTS {GEOBASE_STAGING_TABLE}"))
+    staging.create(bind=connection)
+    return staging
+
+
+def _create_generation_indexes(staging: db.Table, generation: str):
+    """
+    Recreate geobase_cache's indexes on the staging table.
+
+    Index names are suffixed with the generation so they never collide
+    with the indexes of the live or previous tables after a swap.
+    """
+    connection = db.session.connection()
+    for index in GeobaseCache.__table__.indexes:
+        db.Index(
+            f"{index.name}_{generation}",
+            *[staging.c[column.name] for column in index.columns],
+            unique=index.unique,
+            **index.dialect_kwargs
+        ).create(bind=connection)
+
+
+def _drop_staging_table():
+    """
+    Remove a rejected staging table.
+
+    Needed on top of the rollback because some drivers (pysqlite) commit
+    DDL that runs before the first write of a transaction.
+    """
+    try:
+        db.session.execute(text(f"DROP TABLE IF EXISTS {GEOBASE_STAGING_TABLE}"))
+        db.session.commit()
+    except Exception as e:
+        logger.error(f"Could not drop Geobase staging table: {e}")
+        db.session.rollback()
+
+
+def _rename_tables(*renames: Tuple[str, str]):
+    """Run ALTER TABLE ... RENAME TO for each (old, new) pair."""
+    for old, new in renames:
+        db.session.execute(text(f"ALTER TABLE {old} RENAME TO {new}"))
+
+
+def _table_exists(name: str) -> bool:
+    """Check whether a table exists in the current database."""
+    return db.inspect(db.session.connection()).has_table(name)
+
+
+def diff_geobase_rows(rows: Iterable[Dict[str, Any]], max_changes: int) -> Optional[Dict[str, Any]]:
+    """
+    Compare parsed rows with geobase_cache by cote_rue_id and row hash.
+
+    Args:
+        rows: Parsed rows of the new dataset
+        max_changes: Give up once more rows than this would change
+
+    Returns:
+        Dict with inserts (rows), updates (rows with id), deletes (row IDs),
+        total and unchanged counts, or None if max_changes was exceeded
+    """
+    existing = {
+        cote_rue_id: (row_id, row_hash) for cote_rue_id, row_id, row_hash in
+        db.session.query(GeobaseCache.cote_rue_id, GeobaseCache.id, GeobaseCache.row_hash)
+        .yield_per(INSERT_BATCH_SIZE)
+    }
+
+    inserts, updates = [], []
+    seen = set()
+    total = 0
+
+    for row in rows:
+        cote_rue_id = row['cote_rue_id']
+        if cote_rue_id in seen:
+            logger.warning(f"Skipping duplicate COTE_RUE_ID {cote_rue_id}")
+            continue
+        seen.add(cote_rue_id)
+        total += 1
+
+        current = existing.get(cote_rue_id)
+        if current is None:
+            inserts.append(row)
+        elif current[1] != row['row_hash']:
+            updates.append({**row, 'id': current[0]})
+        else:
+            continue
+
+        if len(inserts) + len(updates) > max_changes:
+            return None
+
+    deletes = [row_id for cote_rue_id, (row_id, _) in existing.items() if cote_rue_id not in seen]
+    if len(inserts) + len(updates) + len(deletes) > max_changes:
+        return None
+
+    return {
+        'inserts': inserts,
+        'updates': updates,
+        'deletes': deletes,
+        'total': total,
+        'unchanged': total - len(inserts) - len(updates)
+    }
+
+
+def apply_geobase_diff(diff: Dict[str, Any]):
+    """Apply a diff_geobase_rows result to geobase_cache without committing."""
+    load_geobase_rows(diff['inserts'])
+
+    for batch in _batches(diff['updates'], INSERT_BATCH_SIZE):
+        db.session.execute(db.update(GeobaseCache), batch)
+
+    table = GeobaseCache.__table__
+    for batch in _batches(diff['deletes'], INSERT_BATCH_SIZE):
+        db.session.execute(table.delete().where(table.c.id.in_(batch)))
+
+
+def _rejected_row_count(count: int, previous_count: int) -> Optional[str]:
+    """Error message if a new generation is too small to replace the live one."""
+    min_ratio = current_app.config.get('GEOBASE_MIN_ROW_RATIO', 0.9)
+    if count == 0 or count < previous_count * min_ratio:
+        return f"Refusing Geobase generation with {count} rows (live generation has {previous_count})"
+    return None
+
+
+def _record_version(version: Optional[DatasetVersion], download: Optional[Dict[str, Any]],
+                    changed: bool, now: datetime) -> DatasetVersion:
+    """Store the validators of the fetched dataset version (committed by the caller)."""
+    if version is None:
+        version = DatasetVersion(dataset=GEOBASE_DATASET)
+        db.session.add(version)
+
+    if download:
+        version.etag = download['etag']
+        version.last_modified = download['last_modified']
+        version.content_hash = download['content_hash']
+
+    version.checked_at = now
+    if changed:
+        version.changed_at = now
+    return version
+
 
 def refresh_cache() -> Dict[str, Any]:
-    """Download and cache Geobase data."""
-    start_time = datetime.utcnow()
+    """
+    Download Geobase data and apply what changed.
+
+    The download is conditional; a 304 or an identical file is a no-op.
+    Otherwise the side lines are fetched from the GeoJSON resource (see
+    download_geobase_geometries; if that fails, segments keep their stored
+    side lines), and the CSV is streamed to disk and diffed against
+    geobase_cache by cote_rue_id and row hash. Up to GEOBASE_DIFF_MAX_RATIO of the rows
+    changing are applied in place in one transaction ('diff' mode).
+
+    Larger changes, or a table without row hashes, are loaded into a
+    staging table instead ('swap' mode). If its row count is at least
+    GEOBASE_MIN_ROW_RATIO of the live generation, the live table becomes
+    geobase_cache_previous and staging becomes geobase_cache in the same
+    transaction. Readers only ever see a complete generation.
+
+    Returns:
+        Dict with success, mode, entries, changes, bytes and per-stage
+        timings in seconds
+    """
+    start = time.perf_counter()
+    now = datetime.utcnow()
+    version = DatasetVersion.query.filter_by(dataset=GEOBASE_DATASET).first()
+    previous_count = GeobaseCache.query.count()
 
     try:
-        csv_data = download_geobase_csv()
+        download = download_geobase_csv(version if previous_count else None)
     except Exception as e:
         return {'success': False, 'error': str(e)}
 
-    # Clear existing cache
-    GeobaseCache.query.delete()
+    downloaded = time.perf_counter()
 
-    # Parse CSV and insert into cache
-    reader = csv.DictReader(io.StringIO(csv_data))
-    count = 0
-    batch = []
+    if download is None or (version and download['content_hash'] == version.content_hash):
+        size = 0
+        if download:
+            size = os.path.getsize(download['path'])
+            os.remove(download['path'])
+        _record_version(version, download, changed=False, now=now)
+        db.session.commit()
 
-    for row in reader:
-        try:
-            entry = GeobaseCache(
-                cote_rue_id=int(row.get('COTE_RUE_ID', 0)),
-                nom_voie=row.get('NOM_VOIE', ''),
-                type_voie=row.get('TYPE_F', ''),
-                debut_adresse=int(row.get('DEBUT_ADRESSE', 0) or 0),
-                fin_adresse=int(row.get('FIN_ADRESSE', 0) or 0),
-                cote=row.get('COTE', ''),
-                nom_ville=row.get('NOM_VILLE', 'Montréal'),
-                last_updated=datetime.utcnow()
-            )
-            batch.append(entry)
-            count += 1
-
-            # Batch insert every 1000 records
-            if len(batch) >= 1000:
-                db.session.bulk_save_objects(batch)
-                db.session.commit()
-                batch = []
-
-        except (ValueError, KeyError) as e:
-            logger.warning(f"Skipping invalid row: {e}")
-            continue
+        logger.info(f"Geobase unchanged, {previous_count} entries kept")
+        return {
+            'success': True,
+            'mode': 'unchanged',
+            'entries': previous_count,
+            'changes': {'inserted': 0, 'updated': 0, 'deleted': 0},
+            'bytes': size,
+            'duration_seconds': downloaded - start,
+            'stages': {'download': round(downloaded - start, 3)}
+        }
 
-    # Insert remaining
-    if batch:
-        db.session.bulk_save_objects(batch)
+    path = download['path']
+    generation = now.strftime('%Y%m%d%H%M%S%f')
+
+    try:
+        geometries = download_geobase_geometries()
+        geometry_source = 'geojson'
+    except Exception as e:
+        # Loading the CSV alone would drop every stored side line
+        logger.error(f"Failed to download Geobase geometry, keeping stored side lines: {e}")
+        geometries = stored_geobase_geometries()
+        geometry_source = 'stored'
+
+    geometry_count = 0
+
+    def rows():
+        nonlocal geometry_count
+        geometry_count = 0
+        for row in iter_geobase_rows(path, now, geometries):
+            geometry_count += row['geometry'] is not None
+            yield row
+
+    try:
+        size = os.path.getsize(path)
+        max_changes = int(previous_count * current_app.config.get('GEOBASE_DIFF_MAX_RATIO', 0.25))
+        diff = diff_geobase_rows(rows(), max_changes) if previous_count else None
+
+        if diff is not None:
+            mode = 'diff'
+            count = diff['total']
+            changes = {'inserted': len(diff['inserts']), 'updated': len(diff['updates']),
+                       'deleted': len(diff['deletes'])}
+            error = _rejected_row_count(count, previous_count)
+        else:
+            mode = 'swap'
+            staging = _staging_table()
+            count = load_geobase_rows(rows(), staging)
+            changes = None
+            error = _rejected_row_count(count, previous_count)
+
+        if error:
+            db.session.rollback()
+            if mode == 'swap':
+                _drop_staging_table()
+            logger.error(error)
+            return {'success': False, 'error': error, 'entries': count,
+                    'previous_entries': previous_count}
+
+        loaded = time.perf_counter()
+
+        if mode == 'diff':
+            apply_geobase_diff(diff)
+        else:
+            _create_generation_indexes(staging, generation)
+            db.session.execute(text(f"DROP TABLE IF EXISTS {GEOBASE_PREVIOUS_TABLE}"))
+            _rename_tables((GeobaseCache.__tablename__, GEOBASE_PREVIOUS_TABLE),
+                           (GEOBASE_STAGING_TABLE, GeobaseCache.__tablename__))
+
+        _record_version(version, download, changed=True, now=now)
         db.session.commit()
+    except Exception as e:
+        logger.error(f"Failed to load Geobase CSV: {e}")
+        db.session.rollback()
+        _drop_staging_table()
+        return {'success': False, 'error': str(e)}
+    finally:
+        os.remove(path)
 
-    duration = (datetime.utcnow() - start_time).total_seconds()
+    applied = time.perf_counter()
 
-    logger.info(f"Geobase cache refreshed: {count} entries in {duration:.2f}s")
+    if not geometry_count:
+        logger.error(f"Geobase generation has no segment geometry ({len(geometries)} GeoJSON lines, "
+                     f"{count} rows): coordinate lookups will not match any street")
 
-    return {
+    rebuild_street_index()
+
+    indexed = time.perf_counter()
+    stages = {
+        'download': round(downloaded - start, 3),
+        'load': round(loaded - downloaded, 3),
+        mode: round(applied - loaded, 3),
+        'index': round(indexed - applied, 3)
+    }
+    duration = indexed - start
+
+    logger.info(f"Geobase cache refreshed ({mode}): {count} entries, changes {changes} "
+                f"({size} bytes, previously {previous_count}) in {duration:.2f}s {stages}")
+
+    result = {
         'success': True,
+        'mode': mode,
         'entries': count,
-        'duration_seconds': duration
+        'previous_entries': previous_count,
+        'geometry_entries': geometry_count,
+        'geometry_source': geometry_source,
+        'changes': changes,
+        'bytes': size,
+        'duration_seconds': duration,
+        'stages': stages
     }
+    if mode == 'swap':
+        result['generation'] = generation
+    return result
+
+
+def rollback_cache() -> Dict[str, Any]:
+    """
+    Swap the previous Geobase generation back in.
+
+    The current generation becomes geobase_cache_previous, so a rollback
+    can itself be undone by calling this again.
+
+    Returns:
+        Dict with success and the number of entries now live
+    """
+    try:
+        if not _table_exists(GEOBASE_PREVIOUS_TABLE):
+            return {'success': False, 'error': 'No previous Geobase generation to roll back to'}
+
+        _rename_tables((GeobaseCache.__tablename__, GEOBASE_STAGING_TABLE),
+                       (GEOBASE_PREVIOUS_TABLE, GeobaseCache.__tablename__),
+                       (GEOBASE_STAGING_TABLE, GEOBASE_PREVIOUS_TABLE))
+        db.session.commit()
+    except Exception as e:
+        logger.error(f"Geobase rollback failed: {e}")
+        db.session.rollback()
+        return {'success': False, 'error': str(e)}
+
+    rebuild_street_index()
+    count = GeobaseCache.query.count()
+
+    logger.info(f"Geobase cache rolled back to previous generation: {count} entries")
+    return {'success': True, 'entries': count}
 
 
 def is_cache_stale() -> bool:
@@ -214,7 +1000,11 @@ def is_cache_stale() -> bool:
     if not latest:
         return True
 
-    cache_age = datetime.utcnow() - latest.last_updated
+    # Unchanged refreshes leave rows untouched but record the check
+    version = DatasetVersion.query.filter_by(dataset=GEOBASE_DATASET).first()
+    last_checked = max(latest.last_updated, version.checked_at) if version else latest.last_updated
+
+    cache_age = datetime.utcnow() - last_checked
     max_age = timedelta(days=current_app.config.get('GEOBASE_CACHE_DAYS', 7))
 
     return cache_age > max_age
@@ -226,114 +1016,507 @@ def ensure_cache() -> None:
         refresh_cache()
 
 
+def _best_segment(streets: List[str], civic_number: Optional[int]) -> Optional[int]:
+    """Pick the segment row ID for an address from ranked candidate streets."""
+    if not civic_number:
+        index = _street_index['streets'] or {}
+        for street in streets:
+            if index.get(street):
+                return min(index[street])
+        return None
+
+    for street in streets:
+        row_id = find_segment(street, civic_number)
+        if row_id is not None:
+            return row_id
+
+    return None
+
+
+def _match_segment(parsed: Dict[str, Any],
+                   street_cache: Optional[Dict[str, List[str]]] = None,
+                   exact: bool = False) -> Optional[int]:
+    """
+    Find the segment row ID for a parsed address.
+
+    Args:
+        parsed: parse_address result
+        street_cache: find_streets results by term, shared across a batch
+        exact: Only accept the street whose match key equals the address's
+            (no prefix or broader search)
+    """
+    normalized = parsed.get('normalized_name')
+    if not normalized:
+        return None
+
+    if street_cache is None:
+        street_cache = {}
+
+    civic_number = parsed.get('civic_number')
+    key = street_match_key(normalized)
+    terms = (normalized,) if exact else (normalized, key[:4])  # then a broader search
+    for term in terms:
+        streets = street_cache.get(term)
+        if streets is None:
+            streets = street_cache[term] = find_streets(term)
+        if exact:
+            streets = [street for street in streets if street == key]
+        row_id = _best_segment(streets, civic_number)
+        if row_id is not None:
+            return row_id
+
+    return None
+
+
+def _address_result(entry: GeobaseCache, civic_number: Optional[int]) -> Dict[str, Any]:
+    """lookup_address result for a matched segment."""
+    return {
+        'cote_rue_id': entry.cote_rue_id,
+        'street_name': entry.nom_voie,
+        'street_type': entry.type_voie,
+        'civic_number': civic_number or entry.debut_adresse,
+        'cote': entry.cote,
+        'borough': entry.nom_ville,
+        'address_range': f"{entry.debut_adresse}-{entry.fin_adresse}"
+    }
+
+
 def lookup_address(address: str) -> Optional[Dict[str, Any]]:
     """Look up COTE_RUE_ID for an address string."""
     parsed = parse_address(address)
 
-    if not parsed.get('normalized_name'):
+    row_id = _match_segment(parsed)
+    if row_id is None:
         return None
 
-    civic_number = parsed.get('civic_number')
-    normalized = parsed['normalized_name']
+    entry = db.session.get(GeobaseCache, row_id)
+    if not entry:
+        return None
 
-    # Build query
-    query = GeobaseCache.query.filter(
-        GeobaseCache.nom_voie.ilike(f'%{normalized}%')
-    )
+    return _address_result(entry, parsed.get('civic_number'))
 
-    # If we have a civic number, filter by range
-    if civic_number:
-        query = query.filter(
-            GeobaseCache.debut_adresse <= civic_number,
-            GeobaseCache.fin_adresse >= civic_number
-        )
 
-    results = query.limit(10).all()
+def resolve_addresses(addresses: Iterable[str], batch_size: int = INSERT_BATCH_SIZE,
+                      exact: bool = False) -> Iterator[Optional[Dict[str, Any]]]:
+    """
+    Look up many address strings (CSV imports, nightly re-validation).
 
-    if not results:
-        # Try broader search
-        query = GeobaseCache.query.filter(
-            GeobaseCache.nom_voie.ilike(f'%{normalized[:4]}%')
+    Same results as lookup_address, in input order, but street matches
+    are shared by every address in the run and matched segments are
+    loaded with one query per batch.
+
+    Args:
+        addresses: Address strings
+        batch_size: Addresses per segment query
+        exact: Only accept exact street-key matches (see _match_segment)
+
+    Yields:
+        lookup_address result or None, one per input address
+    """
+    street_cache: Dict[str, List[str]] = {}
+
+    for batch in _batches(parse_addresses(addresses), batch_size):
+        row_ids = [_match_segment(parsed, street_cache, exact) for parsed in batch]
+
+        wanted = {row_id for row_id in row_ids if row_id is not None}
+        entries = {
+            entry.id: entry
+            for entry in GeobaseCache.query.filter(GeobaseCache.id.in_(wanted))
+        } if wanted else {}
+
+        for parsed, row_id in zip(batch, row_ids):
+            entry = entries.get(row_id)
+            yield _address_result(entry, parsed.get('civic_number')) if entry else None
+
+
+def revalidate_addresses(batch_size: int = INSERT_BATCH_SIZE) -> Dict[str, Any]:
+    """
+    Re-resolve every stored Montreal street address against the Geobase.
+
+    Addresses whose segment side changed (for example after a Geobase
+    refresh renumbered a segment) get their cote_rue_id and cote updated,
+    and their last snow status cleared since it belonged to the old
+    segment. Only exact street-key matches are applied; addresses without
+    one are left as they are and logged for review.
+
+    Returns:
+        Dict with checked, updated and unresolved counts
+    """
+    try:
+        rows = db.session.query(
+            Address.id, Address.civic_number, Address.street_type, Address.street_name,
+            Address.cote_rue_id, Address.cote
+        ).filter(
+            Address.city == 'montreal',
+            Address.civic_number.isnot(None),
+            Address.street_name.isnot(None)
+        ).order_by(Address.id).all()
+
+        addresses = (
+            ' '.join(str(part) for part in (civic, street_type, street_name) if part)
+            for _, civic, street_type, street_name, _, _ in rows
         )
-        if civic_number:
-            query = query.filter(
-                GeobaseCache.debut_adresse <= civic_number,
-                GeobaseCache.fin_adresse >= civic_number
-            )
-        results = query.limit(10).all()
-
-    if not results:
-        return None
 
-    # Score and sort results
-    best_match = results[0]
+        updates, unresolved = [], []
+        for row, result in zip(rows, resolve_addresses(addresses, batch_size, exact=True)):
+            if result is None:
+                unresolved.append(row.id)
+            elif (result['cote_rue_id'], result['cote']) != (row.cote_rue_id, row.cote):
+                update = {'id': row.id, 'cote_rue_id': result['cote_rue_id'], 'cote': result['cote']}
+                if result['cote_rue_id'] != row.cote_rue_id:
+                    update.update(last_snow_status=None, last_snow_check=None)
+                updates.append(update)
+
+        for batch in _batches(updates, batch_size):
+            db.session.execute(db.update(Address), batch)
+        db.session.commit()
 
-    return {
-        'cote_rue_id': best_match.cote_rue_id,
-        'street_name': best_match.nom_voie,
-        'street_type': best_match.type_voie,
-        'civic_number': civic_number or best_match.debut_adresse,
-        'cote': best_match.cote,
-        'borough': best_match.nom_ville,
-        'address_range': f"{best_match.debut_adresse}-{best_match.fin_adresse}"
-    }
+        if unresolved:
+            logger.warning(f"Address re-validation: no exact Geobase match for addresses {unresolved}; "
+                           f"left unchanged for review")
+        logger.info(f"Address re-validation: {len(rows)} checked, {len(updates)} updated, "
+                    f"{len(unresolved)} unresolved")
+        return {
+            'success': True,
+            'checked': len(rows),
+            'updated': len(updates),
+            'unresolved': len(unresolved)
+        }
+
+    except Exception as e:
+        logger.error(f"Address re-validation failed: {e}")
+        db.session.rollback()
+        return {'success': False, 'error': str(e)}
+
+
+def rebuild_autocomplete_index() -> int:
+    """
+    Build the autocomplete index from geobase_cache.
+
+    Segments are grouped into distinct (street, type, borough)
+    completions, each scored by how many Montreal subscriber addresses
+    are on that street.
+
+    Returns:
+        Number of completions indexed
+    """
+    popularity: Dict[str, int] = {}
+    subscriber_streets = db.session.query(Address.street_name, db.func.count(Address.id)) \
+        .filter(Address.city == 'montreal', Address.street_name.isnot(None)) \
+        .group_by(Address.street_name)
+    for street_name, count in subscriber_streets:
+        key = street_match_key(street_name)
+        popularity[key] = popularity.get(key, 0) + count
+
+    rows = db.session.query(
+        GeobaseCache.nom_voie_norm, GeobaseCache.nom_voie, GeobaseCache.type_voie,
+        GeobaseCache.nom_ville, db.func.min(GeobaseCache.cote_rue_id),
+        db.func.min(GeobaseCache.debut_adresse), db.func.max(GeobaseCache.fin_adresse)
+    ).group_by(GeobaseCache.nom_voie_norm, GeobaseCache.nom_voie,
+               GeobaseCache.type_voie, GeobaseCache.nom_ville)
+
+    entries = []
+    for key, nom_voie, type_voie, nom_ville, cote_rue_id, debut, fin in rows:
+        if not key:
+            continue
+        entries.append((key, popularity.get(key, 0), {
+            'cote_rue_id': cote_rue_id,
+            'display': f"{type_voie} {nom_voie}" if type_voie else nom_voie,
+            'street_name': nom_voie,
+            'street_type': type_voie,
+            'address_range': f"{debut}-{fin}",
+            'borough': nom_ville,
+            'subscribers': popularity.get(key, 0)
+        }))
+
+    suffixes = []
+    for i, (key, _, _) in enumerate(entries):
+        words = key.split(' ')
+        for j in range(len(words)):
+            suffixes.append((' '.join(words[j:]), i))
+    suffixes.sort()
+    names = sorted((key, i) for i, (key, _, _) in enumerate(entries))
+
+    with _autocomplete_lock:
+        _autocomplete['suffixes'] = [suffix for suffix, _ in suffixes]
+        _autocomplete['suffix_entries'] = [i for _, i in suffixes]
+        _autocomplete['names'] = [name for name, _ in names]
+        _autocomplete['name_entries'] = [i for _, i in names]
+        _autocomplete['entries'] = entries
+        _autocomplete['version'] = tuple(_table_version())
+        _autocomplete['built_at'] = time.monotonic()
+        _autocomplete['checked_at'] = time.monotonic()
+        _completion_cache.clear()
+
+    logger.info(f"Geobase autocomplete index built: {len(entries)} completions")
+    return len(entries)
+
+
+def clear_autocomplete_index():
+    """Drop the autocomplete index and cached completions (rebuilt on next search)."""
+    with _autocomplete_lock:
+        for key in _autocomplete:
+            _autocomplete[key] = None
+        _completion_cache.clear()
+
+
+def _ensure_autocomplete_index():
+    """Build the index on first use; rebuild it when geobase_cache changes or popularity is old."""
+    now = time.monotonic()
+    checked_at = _autocomplete['checked_at']
+    if checked_at is not None and now - checked_at < STREET_INDEX_CHECK_SECONDS:
+        return
+
+    if (_autocomplete['version'] == tuple(_table_version())
+            and now - _autocomplete['built_at'] < AUTOCOMPLETE_REBUILD_SECONDS):
+        _autocomplete['checked_at'] = now
+        return
+
+    rebuild_autocomplete_index()
+
+
+def _prefix_edit_distance(term: str, name: str, max_distance: int) -> Optional[int]:
+    """
+    Levenshtein distance between term and the closest prefix of name.
+
+    Returns:
+        The distance, or None once it must exceed max_distance
+    """
+    width = min(len(name), len(term) + max_distance)
+    previous = list(range(width + 1))
+    for i, char in enumerate(term, 1):
+        current = [i] + [0] * width
+        for j in range(1, width + 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1,
+                             previous[j - 1] + (char != name[j - 1]))
+        if min(current) > max_distance:
+            return None
+        previous = current
+
+    distance = min(previous)
+    return distance if distance <= max_distance else None
+
+
+def _rank_completions(term: str, limit: int) -> List[Dict[str, Any]]:
+    """
+    Rank completions for a normalized search term.
+
+    Exact names come first, then names starting with the term, then
+    names with a later word starting with it. When that gives fewer than
+    limit results, names within one typo (two for longer terms) of the
+    term are added; typo matching only considers names sharing the first
+    letter, which keeps the scan to one slice of the sorted names. Ties
+    go to the street with more subscribers, then the shorter name.
+    """
+    with _autocomplete_lock:
+        suffixes = _autocomplete['suffixes']
+        suffix_entries = _autocomplete['suffix_entries']
+        names = _autocomplete['names']
+        name_entries = _autocomplete['name_entries']
+        entries = _autocomplete['entries']
+    if not suffixes:
+        return []
+
+    ranked: Dict[int, Tuple[int, int]] = {}
+    i = bisect_left(suffixes, term)
+    while i < len(suffixes) and suffixes[i].startswith(term):
+        entry = suffix_entries[i]
+        key = entries[entry][0]
+        tier = 0 if key == term else 1 if key.startswith(term) else 2
+        ranked[entry] = min(ranked.get(entry, (tier, 0)), (tier, 0))
+        i += 1
+
+    if len(ranked) < limit:
+        max_distance = 1 if len(term) <= 5 else 2
+        distances: Dict[str, Optional[int]] = {}
+        i = bisect_left(names, term[0])
+        while i < len(names) and names[i].startswith(term[0]):
+            if name_entries[i] not in ranked:
+                prefix = names[i][:len(term) + max_distance]
+                if prefix not in distances:
+                    distances[prefix] = _prefix_edit_distance(term, prefix, max_distance)
+                if distances[prefix] is not None:
+                    ranked[name_entries[i]] = (3, distances[prefix])
+            i += 1
+
+    order = heapq.nsmallest(limit, ranked, key=lambda entry: (
+        ranked[entry], -entries[entry][1], len(entries[entry][0]), entries[entry][0]
+    ))
+    return [entries[entry][2] for entry in order]
 
 
 def search_addresses(query: str, limit: int = 10) -> List[Dict[str, Any]]:
-    """Search for addresses matching a query (for autocomplete)."""
+    """
+    Search for streets matching a query (for autocomplete).
+
+    Completions are distinct (street, type, borough) combinations ranked
+    by _rank_completions. Results for recent (term, limit) pairs are kept
+    in a small LRU cache, cleared whenever the index is rebuilt.
+    """
     if not query or len(query) < 3:
         return []
 
     parsed = parse_address(query)
-    search_term = parsed.get('normalized_name', query)
+    term = street_match_key(parsed.get('normalized_name', query))
+    if not term:
+        return []
 
-    # Search by street name
-    results = GeobaseCache.query.filter(
-        GeobaseCache.nom_voie.ilike(f'%{search_term}%')
-    ).limit(limit * 2).all()
+    _ensure_autocomplete_index()
 
-    # Group by street name to avoid duplicates
-    seen = set()
-    unique_results = []
-
-    for r in results:
-        key = (r.nom_voie, r.cote)
-        if key not in seen:
-            seen.add(key)
-            unique_results.append({
-                'cote_rue_id': r.cote_rue_id,
-                'display': f"{r.type_voie} {r.nom_voie}" if r.type_voie else r.nom_voie,
-                'street_name': r.nom_voie,
-                'street_type': r.type_voie,
-                'cote': r.cote,
-                'address_range': f"{r.debut_adresse}-{r.fin_adresse}",
-                'borough': r.nom_ville
-            })
-
-            if len(unique_results) >= limit:
+    cache_key = (term, limit)
+    with _autocomplete_lock:
+        results = _completion_cache.get(cache_key)
+        if results is not None:
+            _completion_cache.move_to_end(cache_key)
+
+    if results is None:
+        results = _rank_completions(term, limit)
+        with _autocomplete_lock:
+            _completion_cache[cache_key] = results
+            if len(_completion_cache) > AUTOCOMPLETE_CACHE_SIZE:
+                _completion_cache.popitem(last=False)
+
+    return [dict(result) for result in results]
+
+
+def _project(lon, lat):
+    """Project lon/lat (scalars or arrays) to local planar meters."""
+    return np.asarray(lon) * METERS_PER_DEGREE_LON, np.asarray(lat) * METERS_PER_DEGREE_LAT
+
+
+def rebuild_spatial_index() -> int:
+    """
+    Build the STR-tree over geobase_cache side lines.
+
+    Geometry is decoded into one flat coordinate array with per-line
+    offsets and turned into LineStrings in a single vectorized call.
+
+    Returns:
+        Number of lines indexed
+    """
+    row_ids, cotes, parts = [], [], []
+    rows = db.session.query(GeobaseCache.id, GeobaseCache.cote, GeobaseCache.geometry) \
+        .filter(GeobaseCache.geometry.isnot(None))
+    for row_id, cote, geometry in rows.yield_per(INSERT_BATCH_SIZE):
+        row_ids.append(row_id)
+        cotes.append(cote)
+        parts.append(decode_geometry(geometry))
+
+    if parts:
+        coords = np.concatenate(parts)
+        offsets = np.repeat(np.arange(len(parts)), [len(part) for part in parts])
+        x, y = _project(coords[:, 0], coords[:, 1])
+        lines = shapely.linestrings(x, y, indices=offsets)
+        tree = shapely.STRtree(lines)
+    else:
+        lines, tree = np.empty(0, dtype=object), None
+
+    with _spatial_index_lock:
+        _spatial_index['tree'] = tree
+        _spatial_index['lines'] = lines
+        _spatial_index['row_ids'] = np.asarray(row_ids, dtype=np.int64)
+        _spatial_index['cotes'] = cotes
+        _spatial_index['version'] = tuple(_table_version())
+        _spatial_index['checked_at'] = time.monotonic()
+
+    if not row_ids and GeobaseCache.query.first() is not None:
+        logger.error("Geobase spatial index is empty: no geobase_cache row has geometry")
+    else:
+        logger.info(f"Geobase spatial index built: {len(row_ids)} lines")
+    return len(row_ids)
+
+
+def clear_spatial_index():
+    """Drop the in-memory spatial index (rebuilt on next lookup)."""
+    with _spatial_index_lock:
+        for key in _spatial_index:
+            _spatial_index[key] = None
+
+
+def _ensure_spatial_index():
+    """Build the spatial index on first use and rebuild it if geobase_cache changed."""
+    checked_at = _spatial_index['checked_at']
+    if checked_at is not None and time.monotonic() - checked_at < STREET_INDEX_CHECK_SECONDS:
+        return
+
+    if _spatial_index['version'] == tuple(_table_version()):
+        _spatial_index['checked_at'] = time.monotonic()
+        return
+
+    rebuild_spatial_index()
+
+
+def _side_of_line(line, point) -> str:
+    """'Droit' if the point is right of the line's direction of digitization, else 'Gauche'."""
+    along = line.project(point)
+    step = min(1.0, line.length / 2)
+    start = line.interpolate(max(along - step, 0))
+    end = line.interpolate(min(along + step, line.length))
+    cross = (end.x - start.x) * (point.y - start.y) - (end.y - start.y) * (point.x - start.x)
+    return 'Gauche' if cross > 0 else 'Droit'
+
+
+def find_nearest_segment(lat: float, lon: float,
+                         max_distance: float = MAX_SNAP_METERS) -> Optional[Tuple[int, float]]:
+    """
+    Find the Geobase segment side nearest to a point.
+
+    Both sides of a street often share the same line; among equally near
+    lines, the side the point lies on (relative to the line direction)
+    is preferred.
+
+    Args:
+        lat: Latitude
+        lon: Longitude
+        max_distance: Ignore segments further than this many meters
+
+    Returns:
+        (GeobaseCache row ID, distance in meters), or None
+    """
+    _ensure_spatial_index()
+
+    with _spatial_index_lock:
+        tree = _spatial_index['tree']
+        lines = _spatial_index['lines']
+        row_ids = _spatial_index['row_ids']
+        cotes = _spatial_index['cotes']
+    if tree is None:
+        return None
+
+    point = shapely.Point(*_project(lon, lat))
+    matches, distances = tree.query_nearest(point, max_distance=max_distance,
+                                            return_distance=True, all_matches=True)
+    if len(matches) == 0:
+        return None
+
+    best = int(matches[0])
+    if len(matches) > 1:
+        side = _side_of_line(lines[best], point)
+        for match in matches:
+            if cotes[int(match)] == side:
+                best = int(match)
                 break
 
-    return unique_results
+    return int(row_ids[best]), float(distances[0])
 
 
 def lookup_by_coordinates(lat: float, lon: float) -> Optional[Dict[str, Any]]:
     """
-    Find the nearest street to given coordinates.
+    Find the street segment side nearest to given coordinates.
 
-    Note: This is a simplified implementation. For production,
-    you'd want to use PostGIS or a proper spatial index.
+    Uses an in-memory STR-tree over Geobase side lines (see
+    find_nearest_segment).
     """
-    # For now, just return a sample result based on approximate location
-    # In production, this would use the Geobase geometry data
-
     # Check if coordinates are within Montreal bounds (approximate)
     if not (45.4 <= lat <= 45.7 and -73.9 <= lon <= -73.4):
         return None
 
-    # Get any cached entry as fallback
-    # In production, use spatial query
-    entry = GeobaseCache.query.first()
+    nearest = find_nearest_segment(lat, lon)
+    if not nearest:
+        return None
 
+    row_id, distance = nearest
+    entry = db.session.get(GeobaseCache, row_id)
     if not entry:
         return None
 
@@ -344,7 +1527,8 @@ def lookup_by_coordinates(lat: float, lon: float) -> Optional[Dict[str, Any]]:
         'civic_number': entry.debut_adresse,
         'cote': entry.cote,
         'borough': entry.nom_ville,
+        'address_range': f"{entry.debut_adresse}-{entry.fin_adresse}",
         'latitude': lat,
         'longitude': lon,
-        'note': 'Approximate match - please verify address'
+        'distance_meters': round(distance, 1)
     }
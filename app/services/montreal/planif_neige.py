@@ -21,6 +21,16 @@ logger = logging.getLogger(__name__)
 _api_lock = threading.Lock()
 _last_api_call = None
 
+# Citywide snapshot of the latest GetPlanificationsForDate response, keyed by cote_rue_id
+_snapshot_lock = threading.Lock()
+_snapshot = {
+    'statuses': None,
+    'fetched_at': None
+}
+
+# Segments per status cache lookup/write when persisting a snapshot
+PERSIST_BATCH_SIZE = 500
+
 # Status code mappings
 STATUS_DISPLAY = {
     'enneige': {'en': 'Snowy', 'fr': 'Enneigé', 'color': 'blue', 'priority': 1},
@@ -121,11 +131,74 @@ def update_cache(cote_rue_id: int, status_data: Dict[str, Any]):
     db.session.commit()
 
 
-def fetch_status_from_api(cote_rue_id: int) -> Optional[Dict[str, Any]]:
-    """Fetch status directly from Planif-Neige API."""
+def _parse_planification(item) -> Dict[str, Any]:
+    """Convert one Planif-Neige response item into a status dict."""
+    return {
+        'etat': getattr(item, 'ETAT', 'unknown'),
+        'date_debut': getattr(item, 'DATE_DEBUT', None),
+        'date_fin': getattr(item, 'DATE_FIN', None),
+    }
+
+
+def _isoformat_dates(status: Dict[str, Any]) -> Dict[str, Any]:
+    """Status dict with date_debut/date_fin as isoformat strings, as get_cached_status returns them."""
+    return dict(status, **{
+        field: value.isoformat() if hasattr(value, 'isoformat') else value
+        for field, value in ((field, status.get(field)) for field in ('date_debut', 'date_fin'))
+    })
+
+
+def persist_snapshot(statuses: Dict[int, Dict[str, Any]]):
+    """
+    Write every segment of a snapshot to the status cache in one transaction.
+
+    Only the snapshot's segments are looked up (PERSIST_BATCH_SIZE at a
+    time); they are written with bulk UPDATEs by primary key and one bulk
+    INSERT for segments not cached yet.
+    """
+    now = datetime.utcnow()
+    ids = list(statuses)
+    updates, inserts = [], []
+
+    for start in range(0, len(ids), PERSIST_BATCH_SIZE):
+        batch = ids[start:start + PERSIST_BATCH_SIZE]
+        existing = dict(db.session.query(SnowStatusCache.cote_rue_id, SnowStatusCache.id)
+                        .filter(SnowStatusCache.cote_rue_id.in_(batch)))
+
+        for cote_rue_id in batch:
+            status_data = statuses[cote_rue_id]
+            row = {
+                'etat': status_data.get('etat'),
+                'date_debut': status_data.get('date_debut'),
+                'date_fin': status_data.get('date_fin'),
+                'fetched_at': now
+            }
+            if cote_rue_id in existing:
+                updates.append(dict(row, id=existing[cote_rue_id]))
+            else:
+                inserts.append(dict(row, cote_rue_id=cote_rue_id))
+
+    for start in range(0, len(updates), PERSIST_BATCH_SIZE):
+        db.session.execute(db.update(SnowStatusCache), updates[start:start + PERSIST_BATCH_SIZE])
+    for start in range(0, len(inserts), PERSIST_BATCH_SIZE):
+        db.session.execute(db.insert(SnowStatusCache), inserts[start:start + PERSIST_BATCH_SIZE])
+
+    db.session.commit()
+
+
+def refresh_snapshot() -> Optional[Dict[int, Dict[str, Any]]]:
+    """
+    Ingest the whole-city Planif-Neige response in a single API call.
+
+    Parses every segment into a dict keyed by cote_rue_id, persists it to
+    SnowStatusCache and keeps it in memory for later lookups.
+
+    Returns:
+        The new snapshot, or None if the rate limit or an API error prevented a fetch.
+    """
     if not respect_rate_limit():
-        logger.warning("Rate limit exceeded, using cache only")
-        return get_cached_status(cote_rue_id)
+        logger.debug("Rate limit active, keeping current Planif-Neige snapshot")
+        return None
 
     try:
         client = get_soap_client()
@@ -137,25 +210,71 @@ def fetch_status_from_api(cote_rue_id: int) -> Optional[Dict[str, Any]]:
         # Note: Actual method names depend on WSDL - adjust as needed
         response = client.service.GetPlanificationsForDate(date=today)
 
-        # Parse response - structure depends on actual WSDL
-        # This is a simplified example
-        if response:
-            for item in response:
-                if hasattr(item, 'COTE_RUE_ID') and item.COTE_RUE_ID == cote_rue_id:
-                    return {
-                        'etat': getattr(item, 'ETAT', 'unknown'),
-                        'date_debut': getattr(item, 'DATE_DEBUT', None),
-                        'date_fin': getattr(item, 'DATE_FIN', None),
-                        'cached': False
-                    }
+        statuses = {}
+        for item in response or []:
+            cote_rue_id = getattr(item, 'COTE_RUE_ID', None)
+            if cote_rue_id:
+                statuses[int(cote_rue_id)] = _parse_planification(item)
 
+    except Exception as e:
+        logger.error(f"API call failed: {e}")
         return None
 
+    with _snapshot_lock:
+        _snapshot['statuses'] = statuses
+        _snapshot['fetched_at'] = datetime.utcnow()
+
+    try:
+        persist_snapshot(statuses)
     except Exception as e:
-        logger.error(f"API call failed: {e}")
-        # Fall back to cache
+        logger.error(f"Failed to persist Planif-Neige snapshot: {e}")
+        db.session.rollback()
+
+    logger.info(f"Planif-Neige snapshot refreshed: {len(statuses)} segments")
+    return statuses
+
+
+def get_snapshot_status(cote_rue_id: int, allow_stale: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    Get a segment's status from the in-memory snapshot.
+
+    Returns:
+        Status dict if the snapshot covers this cycle, {} if the segment has no
+        planification in it, or None if there is no usable snapshot.
+    """
+    with _snapshot_lock:
+        statuses = _snapshot['statuses']
+        fetched_at = _snapshot['fetched_at']
+
+    if statuses is None:
+        return None
+
+    cache_seconds = current_app.config.get('PLANIF_NEIGE_CACHE_SECONDS', 300)
+    age = (datetime.utcnow() - fetched_at).total_seconds()
+    if age > cache_seconds and not allow_stale:
+        return None
+
+    status = statuses.get(cote_rue_id)
+    if not status:
+        return {}
+
+    return dict(_isoformat_dates(status), cached=True, fetched_at=fetched_at.isoformat())
+
+
+def fetch_status_from_api(cote_rue_id: int) -> Optional[Dict[str, Any]]:
+    """Fetch status from a fresh whole-city Planif-Neige snapshot."""
+    statuses = refresh_snapshot()
+
+    if statuses is None:
+        logger.warning("Planif-Neige snapshot unavailable, using cache only")
         return get_cached_status(cote_rue_id)
 
+    status = statuses.get(cote_rue_id)
+    if status:
+        return dict(_isoformat_dates(status), cached=False)
+
+    return None
+
 
 def get_status_for_street(cote_rue_id: int) -> Dict[str, Any]:
     """
@@ -163,15 +282,19 @@ def get_status_for_street(cote_rue_id: int) -> Dict[str, Any]:
 
     Returns formatted status with display information.
     """
-    # Try cache first
-    status = get_cached_status(cote_rue_id)
+    # Serve from this cycle's citywide snapshot, then the DB cache
+    status = get_snapshot_status(cote_rue_id)
 
-    if not status:
-        # Fetch from API
+    if status is None:
+        status = get_cached_status(cote_rue_id)
+
+    if status is None:
+        # Ingest a new snapshot (persists every segment to the cache)
         status = fetch_status_from_api(cote_rue_id)
 
-        if status:
-            update_cache(cote_rue_id, status)
+    if status is None:
+        # Rate limited - a stale snapshot still beats no data
+        status = get_snapshot_status(cote_rue_id, allow_stale=True)
 
     if not status:
         return {
@@ -241,12 +364,10 @@ def get_all_statuses_for_date(date: datetime = None) -> List[Dict[str, Any]]:
         results = []
         if response:
             for item in response:
-                results.append({
-                    'cote_rue_id': getattr(item, 'COTE_RUE_ID', 0),
-                    'etat': getattr(item, 'ETAT', 'unknown'),
-                    'date_debut': getattr(item, 'DATE_DEBUT', None),
-                    'date_fin': getattr(item, 'DATE_FIN', None),
-                })
+                results.append(dict(
+                    _parse_planification(item),
+                    cote_rue_id=getattr(item, 'COTE_RUE_ID', 0)
+                ))
 
         return results
 
@@ -4,14 +4,32 @@ Waste Collection Integration Service
 Handles downloading, caching, and querying Montreal's waste collection schedules.
 """
 
+import hashlib
 import json
 import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 
+import numpy as np
 import requests
+import shapely
 from flask import current_app
 
+from app import db
+from app.models import Address, DatasetVersion, WasteSector, WasteSectorAssignment
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process refresh lock
+    fcntl = None
+
 logger = logging.getLogger(__name__)
 
 # Montreal waste collection dataset URLs
@@ -52,12 +70,36 @@ HOLIDAYS_2026 = [
     datetime(2026, 12, 26), # Boxing Day
 ]
 
+# Sector day names to weekday numbers (Monday=0)
+COLLECTION_DAYS = {
+    'lundi': 0, 'monday': 0,
+    'mardi': 1, 'tuesday': 1,
+    'mercredi': 2, 'wednesday': 2,
+    'jeudi': 3, 'thursday': 3,
+    'vendredi': 4, 'friday': 4,
+    'samedi': 5, 'saturday': 5,
+    'dimanche': 6, 'sunday': 6,
+}
+
 # In-memory cache for waste data
 _waste_cache = {
     'data': None,
-    'fetched_at': None
+    'versions': None,  # dataset_version() per collection type
+    'fetched_at': None,
+    'last_refresh': None  # refresh_waste_data() report
 }
 
+# Single-flight refresh: one refresh per process at a time, run in the
+# background while stale data keeps being served
+WASTE_FETCH_TIMEOUT = 60
+_refresh_lock = threading.Lock()
+_refresh_thread_lock = threading.Lock()
+_refresh_thread: Optional[threading.Thread] = None
+
+# Sector indexes by id() of the GeoJSON they were built from
+MAX_SECTOR_INDEXES = 16
+_sector_indexes: Dict[int, Dict[str, Any]] = {}
+
 
 def point_in_polygon(point: tuple, polygon: List[List[float]]) -> bool:
     """
@@ -89,73 +131,709 @@ def point_in_polygon(point: tuple, polygon: List[List[float]]) -> bool:
     return inside
 
 
-def fetch_waste_geojson(collection_type: str) -> Optional[Dict]:
-    """Fetch waste collection GEOJSON data."""
+def fetch_waste_dataset(collection_type: str, etag: Optional[str] = None,
+                        last_modified: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Download one waste GEOJSON dataset, revalidating a copy we already hold.
+
+    Args:
+        collection_type: Key of WASTE_DATASETS
+        etag: ETag of the copy we hold, sent as If-None-Match
+        last_modified: Last-Modified of the copy we hold, sent as If-Modified-Since
+
+    Returns:
+        Dict with status ('modified', 'not_modified' or 'failed'), bytes
+        transferred and seconds taken; modified results also carry the
+        geojson and its new etag / last_modified
+    """
     dataset = WASTE_DATASETS.get(collection_type)
     if not dataset:
         logger.error(f"Unknown collection type: {collection_type}")
-        return None
+        return {'status': 'failed', 'bytes': 0, 'seconds': 0.0}
 
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+
+    start = time.monotonic()
     try:
         # Note: The actual URLs need to be confirmed from Montreal's open data portal
         # For now, using placeholder structure
-        response = requests.get(dataset['url'], timeout=60)
+        response = requests.get(dataset['url'], headers=headers, timeout=WASTE_FETCH_TIMEOUT)
+        if response.status_code == 304:
+            return {'status': 'not_modified', 'bytes': 0, 'seconds': time.monotonic() - start}
         response.raise_for_status()
-        return response.json()
+        body = response.content
+        return {
+            'status': 'modified',
+            'geojson': json.loads(body),
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'bytes': len(body),
+            'seconds': time.monotonic() - start
+        }
     except Exception as e:
         logger.error(f"Failed to fetch {collection_type} GEOJSON: {e}")
-        return None
+        return {'status': 'failed', 'bytes': 0, 'seconds': time.monotonic() - start}
+
+
+def fetch_waste_geojson(collection_type: str) -> Optional[Dict]:
+    """Fetch waste collection GEOJSON data."""
+    return fetch_waste_dataset(collection_type).get('geojson')
 
 
 def load_all_waste_data() -> Dict[str, Any]:
-    """Load all waste collection data."""
-    global _waste_cache
-
-    # Check cache
-    cache_hours = current_app.config.get('WASTE_CACHE_HOURS', 24)
-    if _waste_cache['data'] and _waste_cache['fetched_at']:
-        age = (datetime.utcnow() - _waste_cache['fetched_at']).total_seconds() / 3600
-        if age < cache_hours:
-            return _waste_cache['data']
-
-    # Fetch all datasets
-    data = {}
-    for collection_type in WASTE_DATASETS:
-        geojson = fetch_waste_geojson(collection_type)
-        if geojson:
-            data[collection_type] = geojson
+    """
+    Load all waste collection data.
+
+    Datasets are kept as compact sector datasets (see
+    compact_sector_arrays). Once they expire, the previous generation
+    keeps being served while a single background refresh revalidates
+    them (see refresh_waste_data); only a worker with nothing loaded
+    waits for the refresh.
+    """
+    global _refresh_thread
+
+    data, fetched_at = _waste_cache['data'], _waste_cache['fetched_at']
+    if data and fetched_at:
+        age = (datetime.utcnow() - fetched_at).total_seconds() / 3600
+        if age < current_app.config.get('WASTE_CACHE_HOURS', 24):
+            return data
 
     if data:
-        _waste_cache['data'] = data
-        _waste_cache['fetched_at'] = datetime.utcnow()
+        # Stale-while-revalidate
+        with _refresh_thread_lock:
+            if _refresh_thread is None or not _refresh_thread.is_alive():
+                _refresh_thread = threading.Thread(
+                    target=_refresh_in_background, args=(current_app._get_current_object(),),
+                    name='waste-refresh', daemon=True
+                )
+                _refresh_thread.start()
+        return data
+
+    refresh_waste_data()
+    return _waste_cache['data'] or {}
+
+
+def _refresh_in_background(app):
+    """Run refresh_waste_data in its own app context."""
+    with app.app_context():
+        try:
+            refresh_waste_data(wait=False)
+        except Exception as e:
+            logger.error(f"Background waste refresh failed: {e}")
+        finally:
+            db.session.remove()
+
+
+def refresh_waste_data(force: bool = False, wait: bool = True) -> Dict[str, Any]:
+    """
+    Refresh the waste datasets, at most once at a time.
+
+    Within a process, refreshes are serialized by a lock; with
+    WASTE_CACHE_DIR set, an exclusive file lock there also keeps other
+    workers from downloading at the same time, and they pick up the
+    result from disk. The four datasets are revalidated concurrently
+    with conditional requests, so an unchanged dataset costs a 304 and
+    keeps its loaded (or cached) copy. A dataset that fails to download
+    also keeps its previous copy.
+
+    Args:
+        force: Revalidate even if the loaded or on-disk data is still fresh
+        wait: Wait for a refresh already in progress instead of returning
+
+    Returns:
+        Report dict with success, source ('memory', 'disk', 'portal' or
+        'in_progress'), duration_seconds, bytes and per-dataset results
+    """
+    start = time.monotonic()
+    if not _refresh_lock.acquire(blocking=wait):
+        return {'success': True, 'source': 'in_progress', 'duration_seconds': 0.0, 'bytes': 0, 'datasets': {}}
+
+    try:
+        cache_hours = current_app.config.get('WASTE_CACHE_HOURS', 24)
+        if not force and _is_fresh(_waste_cache['fetched_at'], cache_hours) and _waste_cache['data']:
+            return _refresh_report('memory', start)
+
+        cache_dir = current_app.config.get('WASTE_CACHE_DIR')
+        if not cache_dir:
+            return _refresh_from_portal(_waste_cache['data'] or {}, None, start)
+
+        os.makedirs(cache_dir, exist_ok=True)
+        with _refresh_file_lock(cache_dir, blocking=not _waste_cache['data']) as acquired:
+            if not acquired:
+                # Another worker is refreshing; keep serving what we have
+                return _refresh_report('in_progress', start)
+
+            stored, stored_at = load_cached_waste_data(cache_dir)
+            if stored and not force and _is_fresh(stored_at, cache_hours):
+                _set_waste_data(stored, stored_at)
+                return _refresh_report('disk', start)
+
+            return _refresh_from_portal(stored or _waste_cache['data'] or {}, cache_dir, start,
+                                        stored_at=stored_at)
+    finally:
+        _refresh_lock.release()
+
+
+def _is_fresh(fetched_at: Optional[datetime], cache_hours: float) -> bool:
+    return fetched_at is not None and (datetime.utcnow() - fetched_at).total_seconds() / 3600 < cache_hours
+
+
+@contextmanager
+def _refresh_file_lock(cache_dir: str, blocking: bool):
+    """Exclusive lock on the shared cache directory; yields whether it was acquired."""
+    if fcntl is None:
+        yield True
+        return
+
+    with open(os.path.join(cache_dir, '.refresh.lock'), 'a') as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _refresh_from_portal(previous: Dict[str, Dict], cache_dir: Optional[str], start: float,
+                         stored_at: Optional[datetime] = None) -> Dict[str, Any]:
+    """Revalidate every dataset concurrently and make the result current."""
+    fetched_at = datetime.utcnow()
+    with ThreadPoolExecutor(max_workers=len(WASTE_DATASETS), thread_name_prefix='waste-fetch') as pool:
+        futures = {
+            collection_type: pool.submit(_refresh_dataset, collection_type,
+                                         previous.get(collection_type), cache_dir, fetched_at)
+            for collection_type in WASTE_DATASETS
+        }
+        results = {collection_type: future.result() for collection_type, future in futures.items()}
+
+    data = {collection_type: dataset for collection_type, (dataset, _) in results.items() if dataset}
+    datasets = {collection_type: result for collection_type, (_, result) in results.items()}
+    if any(result['status'] != 'failed' for result in datasets.values()):
+        _set_waste_data(data, fetched_at)
+    elif data:
+        # Keep serving the previous download rather than nothing
+        logger.warning("Waste dataset download failed, using previous data")
+        _set_waste_data(data, stored_at or _waste_cache['fetched_at'])
+
+    report = _refresh_report('portal', start, datasets)
+    report['success'] = bool(data)
+    statuses = ', '.join(f"{collection_type}: {result['status']}" for collection_type, result in datasets.items())
+    logger.info(f"Waste datasets refreshed in {report['duration_seconds']:.2f}s, "
+                f"{report['bytes']} bytes ({statuses})")
+    return report
+
+
+def _refresh_dataset(collection_type: str, previous: Optional[Dict], cache_dir: Optional[str],
+                     fetched_at: datetime) -> Tuple[Optional[Dict], Dict[str, Any]]:
+    """Download (or revalidate) one dataset; returns (sector dataset, fetch result)."""
+    previous = previous or {}
+    result = fetch_waste_dataset(collection_type, etag=previous.get('etag'),
+                                 last_modified=previous.get('last_modified'))
+    status = result['status']
+
+    if status == 'modified':
+        geojson = result.pop('geojson')
+        arrays = compact_sector_arrays(geojson)
+        version = dataset_version(geojson)
+        validators = {'etag': result.get('etag'), 'last_modified': result.get('last_modified')}
+        if cache_dir:
+            save_cached_waste_dataset(cache_dir, collection_type, arrays, version, fetched_at, **validators)
+        return sector_dataset(arrays, version, **validators), result
+
+    if status == 'not_modified' and cache_dir:
+        _write_cache_pointer(cache_dir, collection_type, previous['version'], fetched_at,
+                             previous.get('etag'), previous.get('last_modified'))
+
+    return previous or None, result
+
+
+def _refresh_report(source: str, start: float, datasets: Optional[Dict[str, Dict]] = None) -> Dict[str, Any]:
+    datasets = datasets or {}
+    report = {
+        'success': True,
+        'source': source,
+        'duration_seconds': round(time.monotonic() - start, 3),
+        'bytes': sum(result['bytes'] for result in datasets.values()),
+        'datasets': {
+            collection_type: {'status': result['status'], 'bytes': result['bytes'],
+                              'seconds': round(result['seconds'], 3)}
+            for collection_type, result in datasets.items()
+        }
+    }
+    _waste_cache['last_refresh'] = report
+    return report
+
+
+def _set_waste_data(data: Dict[str, Dict], fetched_at: datetime):
+    """Make loaded sector datasets current and sync their persisted assignments."""
+    _waste_cache['data'] = data
+    _waste_cache['versions'] = {
+        collection_type: dataset['version'] for collection_type, dataset in data.items()
+    }
+    _waste_cache['fetched_at'] = fetched_at
+    _sector_indexes.clear()
+
+    sync_waste_sectors(data, _waste_cache['versions'])
+
+
+def dataset_version(geojson: Dict) -> str:
+    """Content hash identifying a version of a waste GeoJSON dataset."""
+    content = json.dumps(geojson, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def compact_sector_arrays(geojson: Dict) -> Dict[str, Any]:
+    """
+    Convert a waste GeoJSON dataset to flat arrays.
+
+    Every Polygon / MultiPolygon feature becomes a MultiPolygon in
+    shapely's ragged layout: one (n, 2) float64 coordinate array plus
+    ring, polygon and geometry offset arrays.
+
+    Args:
+        geojson: FeatureCollection of sector polygons
+
+    Returns:
+        Dict with coords, ring_offsets, polygon_offsets, geometry_offsets,
+        feature_ids (dataset position per geometry) and properties (per
+        feature, including features without a polygon)
+    """
+    features = geojson.get('features', [])
+    geometries, feature_ids = [], []
+    for position, feature in enumerate(features):
+        geometry = feature.get('geometry') or {}
+        if geometry.get('type') not in ('Polygon', 'MultiPolygon') or not geometry.get('coordinates'):
+            continue
+        try:
+            geom = shapely.geometry.shape(geometry)
+        except (ValueError, TypeError, shapely.errors.ShapelyError) as e:
+            logger.warning(f"Skipping invalid sector geometry: {e}")
+            continue
+        if geom.geom_type == 'Polygon':
+            geom = shapely.geometry.MultiPolygon([geom])
+        geometries.append(geom)
+        feature_ids.append(position)
+
+    if geometries:
+        _, coords, (ring_offsets, polygon_offsets, geometry_offsets) = shapely.to_ragged_array(geometries)
+    else:
+        coords = np.empty((0, 2), dtype=np.float64)
+        ring_offsets = polygon_offsets = geometry_offsets = np.zeros(1, dtype=np.int64)
+
+    return {
+        'coords': coords,
+        'ring_offsets': ring_offsets,
+        'polygon_offsets': polygon_offsets,
+        'geometry_offsets': geometry_offsets,
+        'feature_ids': np.array(feature_ids, dtype=np.int64),
+        'properties': [feature.get('properties', {}) for feature in features]
+    }
+
+
+def _index_from_arrays(arrays: Dict[str, Any]) -> Dict[str, Any]:
+    """Sector index (see build_sector_index) from compact_sector_arrays output."""
+    feature_ids = np.asarray(arrays['feature_ids'])
+    if len(feature_ids):
+        geometries = shapely.from_ragged_array(
+            shapely.GeometryType.MULTIPOLYGON, arrays['coords'],
+            (arrays['ring_offsets'], arrays['polygon_offsets'], arrays['geometry_offsets'])
+        )
+    else:
+        geometries = np.empty(0, dtype=object)
+    shapely.prepare(geometries)
+
+    return {
+        'tree': shapely.STRtree(geometries),
+        'geometries': geometries,
+        'properties': [arrays['properties'][i] for i in feature_ids.tolist()],
+        'feature_ids': feature_ids
+    }
+
+
+def sector_dataset(arrays: Dict[str, Any], version: str, etag: Optional[str] = None,
+                   last_modified: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Loaded form of a waste dataset.
+
+    Shaped like a FeatureCollection whose features carry only their
+    properties, plus the dataset version, the HTTP validators it was
+    downloaded with and its compact arrays, so it can be passed anywhere
+    a GeoJSON dataset is accepted. The sector index is built from the
+    arrays on the first point lookup (see get_sector_index).
+    """
+    return {
+        'type': 'FeatureCollection',
+        'features': [{'properties': properties} for properties in arrays['properties']],
+        'version': version,
+        'etag': etag,
+        'last_modified': last_modified,
+        'arrays': arrays
+    }
+
+
+def build_sector_index(geojson: Dict) -> Dict[str, Any]:
+    """
+    Build a spatial index over the sectors of a waste GeoJSON dataset.
+
+    Polygons and MultiPolygons (with their holes) become prepared shapely
+    geometries in an STR-tree, so a lookup is a bounding-box query plus
+    an exact test on the few candidates.
+
+    Args:
+        geojson: FeatureCollection of sector polygons
+
+    Returns:
+        Dict with tree, geometries (prepared), and properties and
+        feature_ids (position in the dataset) per geometry
+    """
+    return _index_from_arrays(compact_sector_arrays(geojson))
 
-    return data
+
+WASTE_ARRAY_FILES = ('coords', 'ring_offsets', 'polygon_offsets', 'geometry_offsets', 'feature_ids')
+
+
+def save_cached_waste_dataset(cache_dir: str, collection_type: str, arrays: Dict[str, Any],
+                              version: str, fetched_at: datetime, etag: Optional[str] = None,
+                              last_modified: Optional[str] = None):
+    """
+    Write a dataset's arrays to the shared on-disk cache.
+
+    Each version goes to its own directory of .npy files, written under a
+    temporary name and renamed into place; a small <type>.json pointer is
+    then atomically replaced, so readers never see a partial dataset.
+    Older version directories are removed (workers that still map them
+    keep their open files).
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    name = _cache_entry_name(collection_type, version)
+    target = os.path.join(cache_dir, name)
+
+    if not os.path.isdir(target):
+        staging = tempfile.mkdtemp(prefix=f".{name}-", dir=cache_dir)
+        for key in WASTE_ARRAY_FILES:
+            np.save(os.path.join(staging, f"{key}.npy"), np.asarray(arrays[key]))
+        with open(os.path.join(staging, 'properties.json'), 'w', encoding='utf-8') as f:
+            json.dump(arrays['properties'], f)
+        try:
+            os.rename(staging, target)
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)  # Another worker saved it first
+
+    _write_cache_pointer(cache_dir, collection_type, version, fetched_at, etag, last_modified)
+
+    for entry in os.listdir(cache_dir):
+        if entry.startswith(f"{collection_type}-") and entry != name:
+            shutil.rmtree(os.path.join(cache_dir, entry), ignore_errors=True)
+
+
+def _cache_entry_name(collection_type: str, version: str) -> str:
+    return f"{collection_type}-{version[:16]}"
+
+
+def _write_cache_pointer(cache_dir: str, collection_type: str, version: str, fetched_at: datetime,
+                         etag: Optional[str], last_modified: Optional[str]):
+    """Atomically point <type>.json at a saved version."""
+    fd, pointer = tempfile.mkstemp(prefix=f".{collection_type}-", suffix='.json', dir=cache_dir)
+    with os.fdopen(fd, 'w') as f:
+        json.dump({
+            'version': version,
+            'path': _cache_entry_name(collection_type, version),
+            'fetched_at': fetched_at.isoformat(),
+            'etag': etag,
+            'last_modified': last_modified
+        }, f)
+    os.replace(pointer, os.path.join(cache_dir, f"{collection_type}.json"))
+
+
+def load_cached_waste_data(cache_dir: str) -> Tuple[Dict[str, Dict], Optional[datetime]]:
+    """
+    Load every dataset from the shared on-disk cache, memory-mapping the arrays.
+
+    What the cache saves each worker is the download and the GeoJSON
+    parse: the mapped coordinate pages are shared through the OS page
+    cache, but every worker that locates points still builds its own
+    GEOS geometries and STR-tree from them (a few tens of ms per
+    dataset), and holds those in its own memory.
+
+    Returns:
+        (sector datasets by collection type, oldest fetched_at), or
+        ({}, None) unless all datasets are cached
+    """
+    data, fetched_at = {}, None
+    for collection_type in WASTE_DATASETS:
+        try:
+            with open(os.path.join(cache_dir, f"{collection_type}.json"), encoding='utf-8') as f:
+                pointer = json.load(f)
+            path = os.path.join(cache_dir, pointer['path'])
+            arrays = {key: np.load(os.path.join(path, f"{key}.npy"), mmap_mode='r')
+                      for key in WASTE_ARRAY_FILES}
+            with open(os.path.join(path, 'properties.json'), encoding='utf-8') as f:
+                arrays['properties'] = json.load(f)
+        except (OSError, ValueError, KeyError):
+            return {}, None
+
+        data[collection_type] = sector_dataset(arrays, pointer['version'], etag=pointer.get('etag'),
+                                               last_modified=pointer.get('last_modified'))
+        saved_at = datetime.fromisoformat(pointer['fetched_at'])
+        fetched_at = saved_at if fetched_at is None else min(fetched_at, saved_at)
+
+    return data, fetched_at
+
+
+def get_sector_index(geojson: Dict) -> Dict[str, Any]:
+    """Sector index for a GeoJSON dataset, built on first use."""
+    if 'index' in geojson:
+        return geojson['index']
+    if 'arrays' in geojson:
+        # Loaded dataset: workers that never locate a point never build it
+        geojson['index'] = _index_from_arrays(geojson['arrays'])
+        return geojson['index']
+
+    entry = _sector_indexes.get(id(geojson))
+    if entry is None or entry['geojson'] is not geojson:
+        if len(_sector_indexes) >= MAX_SECTOR_INDEXES:
+            _sector_indexes.clear()
+        entry = _sector_indexes[id(geojson)] = {
+            'geojson': geojson,
+            'index': build_sector_index(geojson)
+        }
+    return entry['index']
 
 
 def find_sector_for_point(lon: float, lat: float, geojson: Dict) -> Optional[Dict]:
-    """Find which sector contains the given point."""
+    """
+    Find which sector contains the given point.
+
+    Uses the dataset's sector index (see build_sector_index). Points in a
+    polygon hole are outside it; when sectors overlap, the first feature
+    in the dataset wins.
+    """
     if not geojson or 'features' not in geojson:
         return None
 
-    point = (lon, lat)
+    index = get_sector_index(geojson)
+    candidates = index['tree'].query(shapely.Point(lon, lat))
 
-    for feature in geojson['features']:
-        geometry = feature.get('geometry', {})
-        geom_type = geometry.get('type')
-        coords = geometry.get('coordinates', [])
+    for i in sorted(candidates):
+        if shapely.intersects_xy(index['geometries'][i], lon, lat):
+            return index['properties'][i]
 
-        if geom_type == 'Polygon':
-            # Single polygon
-            if coords and point_in_polygon(point, coords[0]):
-                return feature.get('properties', {})
+    return None
 
-        elif geom_type == 'MultiPolygon':
-            # Multiple polygons
-            for polygon in coords:
-                if polygon and point_in_polygon(point, polygon[0]):
-                    return feature.get('properties', {})
 
-    return None
+def find_sector_ids_for_points(lons, lats, geojson: Dict) -> np.ndarray:
+    """
+    Vectorized sector lookup for many points.
+
+    All points are tested against the dataset's STR-tree in one bulk
+    query; where a point falls in several sectors, the first feature in
+    the dataset wins, as in find_sector_for_point.
+
+    Args:
+        lons: Longitudes (sequence or array)
+        lats: Latitudes (same length)
+        geojson: FeatureCollection of sector polygons
+
+    Returns:
+        Position of the containing feature in the dataset per point, -1 if none
+    """
+    sector_ids = np.full(len(lons), -1, dtype=np.int64)
+    if not geojson or 'features' not in geojson or not len(sector_ids):
+        return sector_ids
+
+    index = get_sector_index(geojson)
+    if not index['properties']:
+        return sector_ids
+
+    points = shapely.points(np.asarray(lons, dtype=float), np.asarray(lats, dtype=float))
+    point_idx, geometry_idx = index['tree'].query(points, predicate='intersects')
+
+    # Lowest feature index per point
+    order = np.lexsort((geometry_idx, point_idx))
+    point_idx, geometry_idx = point_idx[order], geometry_idx[order]
+    first = np.unique(point_idx, return_index=True)[1]
+
+    sector_ids[point_idx[first]] = index['feature_ids'][geometry_idx[first]]
+    return sector_ids
+
+
+def find_sectors_for_points(lons, lats, geojson: Dict) -> List[Optional[Dict]]:
+    """Vectorized find_sector_for_point: sector properties (or None) per point."""
+    features = (geojson or {}).get('features', [])
+    return [features[sector_id].get('properties', {}) if sector_id >= 0 else None
+            for sector_id in find_sector_ids_for_points(lons, lats, geojson).tolist()]
+
+
+def assign_sectors(locations: Dict[int, Tuple[float, float]]) -> Dict[int, Dict[str, Dict]]:
+    """
+    Assign every location to its sector in each loaded waste dataset.
+
+    Args:
+        locations: Dict mapping an ID (e.g. address ID) to (lat, lon)
+
+    Returns:
+        Dict mapping each ID to {collection_type: sector properties} for
+        the datasets whose sectors contain it
+    """
+    ids = list(locations)
+    assignments: Dict[int, Dict[str, Dict]] = {location_id: {} for location_id in ids}
+    if not ids:
+        return assignments
+
+    coords = np.array([locations[location_id] for location_id in ids], dtype=float)
+    for collection_type, geojson in load_all_waste_data().items():
+        sectors = find_sectors_for_points(coords[:, 1], coords[:, 0], geojson)
+        for location_id, sector in zip(ids, sectors):
+            if sector is not None:
+                assignments[location_id][collection_type] = sector
+
+    return assignments
+
+
+def _assignment_rows(collection_type: str, geojson: Dict, version: str,
+                     locations: Dict[int, Tuple[float, float]]) -> List[Dict[str, Any]]:
+    """WasteSectorAssignment rows for the locations inside a sector of one dataset."""
+    ids = list(locations)
+    if not ids:
+        return []
+
+    coords = np.array([locations[address_id] for address_id in ids], dtype=float)
+    sector_ids = find_sector_ids_for_points(coords[:, 1], coords[:, 0], geojson)
+    now = datetime.utcnow()
+
+    return [
+        {'address_id': address_id, 'collection_type': collection_type, 'sector_id': sector_id,
+         'dataset_version': version, 'assigned_at': now}
+        for address_id, sector_id in zip(ids, sector_ids.tolist()) if sector_id >= 0
+    ]
+
+
+def _montreal_locations(unassigned: bool = False) -> Dict[int, Tuple[float, float]]:
+    """(lat, lon) of every Montreal address with coordinates (only those without sectors if unassigned)."""
+    rows = db.session.query(Address.id, Address.latitude, Address.longitude).filter(
+        db.or_(Address.city == 'montreal', Address.city.is_(None)),
+        Address.latitude.isnot(None),
+        Address.longitude.isnot(None)
+    )
+    if unassigned:
+        rows = rows.filter(~db.exists().where(WasteSectorAssignment.address_id == Address.id))
+    return {address_id: (lat, lon) for address_id, lat, lon in rows}
+
+
+def sync_waste_sectors(data: Dict[str, Dict], versions: Dict[str, str]) -> Dict[str, int]:
+    """
+    Persist sectors and address assignments for datasets with a new version.
+
+    For each collection type whose version differs from the one recorded
+    in dataset_versions, the type's waste_sectors rows are replaced and
+    every Montreal address is re-assigned in one vectorized pass.
+    Unchanged datasets are skipped, so this is cheap to call on every load.
+
+    Args:
+        data: GeoJSON per collection type
+        versions: dataset_version() per collection type
+
+    Returns:
+        Dict mapping each re-synced collection type to its assignment count
+    """
+    synced = {}
+    locations = None
+
+    for collection_type, geojson in data.items():
+        version = versions[collection_type]
+        dataset = f'waste_{collection_type}'
+        try:
+            record = DatasetVersion.query.filter_by(dataset=dataset).first()
+            if record and record.content_hash == version:
+                continue
+
+            if locations is None:
+                locations = _montreal_locations()
+
+            sectors = []
+            for position, feature in enumerate(geojson.get('features', [])):
+                schedule = parse_collection_schedule(feature.get('properties') or {})
+                sectors.append({'collection_type': collection_type, 'sector_id': position,
+                                'dataset_version': version, **schedule})
+            assignments = _assignment_rows(collection_type, geojson, version, locations)
+
+            WasteSectorAssignment.query.filter_by(collection_type=collection_type).delete()
+            WasteSector.query.filter_by(collection_type=collection_type).delete()
+            if sectors:
+                db.session.execute(db.insert(WasteSector), sectors)
+            if assignments:
+                db.session.execute(db.insert(WasteSectorAssignment), assignments)
+
+            now = datetime.utcnow()
+            if not record:
+                record = DatasetVersion(dataset=dataset)
+                db.session.add(record)
+            record.content_hash = version
+            record.checked_at = now
+            record.changed_at = now
+            db.session.commit()
+
+            synced[collection_type] = len(assignments)
+            logger.info(f"Waste sectors synced for {collection_type}: "
+                        f"{len(sectors)} sectors, {len(assignments)} addresses")
+
+            from app.services.waste_calendar import rebuild_collection_calendar
+            rebuild_collection_calendar(schemes=('sector',), collection_type=collection_type)
+
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Failed to sync {collection_type} waste sectors: {e}")
+
+    return synced
+
+
+def assign_address_sectors(locations: Dict[int, Tuple[float, float]]) -> int:
+    """
+    Compute and store the waste sectors of specific addresses (new subscriptions).
+
+    Uses the datasets already loaded in this process, so it never
+    downloads; addresses not assigned here are picked up by the next
+    reminder run.
+
+    Args:
+        locations: Dict mapping address ID to (lat, lon)
+
+    Returns:
+        Number of assignment rows written
+    """
+    data, versions = _waste_cache['data'], _waste_cache['versions']
+    if not data or not locations:
+        return 0
+
+    rows = []
+    for collection_type, geojson in data.items():
+        rows.extend(_assignment_rows(collection_type, geojson, versions[collection_type], locations))
+
+    WasteSectorAssignment.query.filter(
+        WasteSectorAssignment.address_id.in_(list(locations))
+    ).delete(synchronize_session=False)
+    if rows:
+        db.session.execute(db.insert(WasteSectorAssignment), rows)
+    db.session.commit()
+
+    return len(rows)
+
+
+def assign_unassigned_addresses() -> int:
+    """
+    Assign sectors to Montreal addresses that have none yet.
+
+    Catches addresses stored before the datasets were loaded; returns
+    the number of assignment rows written.
+    """
+    return assign_address_sectors(_montreal_locations(unassigned=True))
 
 
 def parse_collection_schedule(properties: Dict) -> Dict[str, Any]:
@@ -178,18 +856,7 @@ def get_next_collection_date(day_name: str, from_date: datetime = None) -> datet
     if from_date is None:
         from_date = datetime.now()
 
-    # Map day names to weekday numbers (Monday=0)
-    day_map = {
-        'lundi': 0, 'monday': 0,
-        'mardi': 1, 'tuesday': 1,
-        'mercredi': 2, 'wednesday': 2,
-        'jeudi': 3, 'thursday': 3,
-        'vendredi': 4, 'friday': 4,
-        'samedi': 5, 'saturday': 5,
-        'dimanche': 6, 'sunday': 6,
-    }
-
-    target_day = day_map.get(day_name.lower(), 0)
+    target_day = COLLECTION_DAYS.get(day_name.lower(), 0)
     current_day = from_date.weekday()
 
     days_ahead = target_day - current_day
@@ -215,6 +882,29 @@ def adjust_for_holiday(collection_date: datetime) -> datetime:
     return collection_date
 
 
+def _sector_schedule(collection_type: str, sector: Dict) -> Dict[str, Any]:
+    """Schedule entry for one collection type from its sector properties."""
+    return _schedule_entry(collection_type, parse_collection_schedule(sector))
+
+
+def _schedule_entry(collection_type: str, schedule: Dict[str, Any]) -> Dict[str, Any]:
+    """Schedule entry for one collection type from a parse_collection_schedule result."""
+    parsed = dict(schedule)
+
+    # Calculate next collection date
+    if parsed.get('day_of_week'):
+        next_date = get_next_collection_date(parsed['day_of_week'])
+        parsed['next_collection'] = next_date.strftime('%Y-%m-%d')
+        parsed['next_collection_display'] = format_date_display(next_date)
+
+    dataset_info = WASTE_DATASETS[collection_type]
+    parsed['type'] = collection_type
+    parsed['name'] = dataset_info['name']
+    parsed['name_fr'] = dataset_info['name_fr']
+
+    return parsed
+
+
 def get_schedule_for_location(lat: float, lon: float) -> Optional[Dict[str, Any]]:
     """Get complete waste collection schedule for a location."""
     try:
@@ -231,20 +921,7 @@ def get_schedule_for_location(lat: float, lon: float) -> Optional[Dict[str, Any]
             sector = find_sector_for_point(lon, lat, geojson)
 
             if sector:
-                parsed = parse_collection_schedule(sector)
-
-                # Calculate next collection date
-                if parsed.get('day_of_week'):
-                    next_date = get_next_collection_date(parsed['day_of_week'])
-                    parsed['next_collection'] = next_date.strftime('%Y-%m-%d')
-                    parsed['next_collection_display'] = format_date_display(next_date)
-
-                dataset_info = WASTE_DATASETS[collection_type]
-                parsed['type'] = collection_type
-                parsed['name'] = dataset_info['name']
-                parsed['name_fr'] = dataset_info['name_fr']
-
-                schedule[collection_type] = parsed
+                schedule[collection_type] = _sector_schedule(collection_type, sector)
 
         # If no schedule found (point not in any polygon), fall back to mock data
         if not schedule:
@@ -2,7 +2,9 @@
 from .snow_checker import (
     geocode_postal_code,
     check_snow_removal,
+    check_snow_removal_batch,
     get_status_for_location,
+    get_statuses_for_locations,
     check_postal_code
 )
 from .waste import (
@@ -15,7 +17,9 @@ from .waste import (
 __all__ = [
     'geocode_postal_code',
     'check_snow_removal',
+    'check_snow_removal_batch',
     'get_status_for_location',
+    'get_statuses_for_locations',
     'check_postal_code',
     'get_waste_schedule',
     'get_waste_zone',
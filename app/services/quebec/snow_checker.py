@@ -6,9 +6,14 @@ Checks Quebec City's ArcGIS API for snow removal operations (flashing lights).
 
 import logging
 import math
+import threading
 import requests
+from datetime import datetime, timedelta
 from typing import Optional, Dict, Any, List, Tuple
-from flask import current_app
+from flask import current_app, has_app_context
+
+from app import db
+from app.models import StationStreetCache
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +22,33 @@ HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
 }
 
+# Flashing-light stations layer of the Deneigement MapServer
+DENEIGEMENT_LAYER_URL = "https://carte.ville.quebec.qc.ca/arcgis/rest/services/CI/Deneigement/MapServer/2/query"
+
+# Paging of layer queries: stable order by object ID, bounded page count
+LIGHTS_ORDER_FIELD = 'OBJECTID'
+LIGHTS_MAX_PAGES = 50
+
+# Grid cell size of the local station index
+GRID_CELL_METERS = 1000
+GRID_REFERENCE_LAT = 46.8  # Quebec City, for meters -> longitude degrees
+METERS_PER_DEGREE_LAT = 111320
+
+# In-memory mirror of StationStreetCache (STATION_NO -> street)
+_station_streets_lock = threading.RLock()
+_station_streets: Dict[str, str] = {}
+_station_streets_loaded = False
+
+# Local registry of every flashing-light station, indexed by grid cell.
+# Geometry is reloaded daily; statuses are refreshed once per check cycle.
+_registry_lock = threading.Lock()
+_registry = {
+    'stations': None,  # STATION_NO -> ArcGIS feature
+    'cells': None,  # (row, col) -> features in that cell
+    'loaded_at': None,
+    'statuses_at': None
+}
+
 # Quebec City FSA (Forward Sortation Area) coordinates
 # Used as fallback when geocoding fails
 QUEBEC_FSA_COORDS = {
@@ -162,142 +194,450 @@ def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> fl
     return R * c
 
 
-def check_snow_removal(lat: float, lon: float, buffer_meters: int = 200) -> Dict[str, Any]:
+def _query_lights(query: Dict[str, Any], out_fields: str = "*",
+                  return_geometry: bool = True) -> List[Dict[str, Any]]:
     """
-    Check snow removal status for a location using Quebec City's ArcGIS API.
+    Run a flashing-light layer query, following ArcGIS paging (exceededTransferLimit).
+
+    Pages are ordered by LIGHTS_ORDER_FIELD so offsets are stable. At most
+    LIGHTS_MAX_PAGES pages are fetched, and a page repeating object IDs
+    (a layer ignoring resultOffset) ends the query with an error.
+
+    Raises:
+        requests.RequestException: On network errors
+        ValueError: On unparseable responses, ArcGIS errors or broken paging
+    """
+    if out_fields != "*" and LIGHTS_ORDER_FIELD not in out_fields.split(","):
+        out_fields = f"{out_fields},{LIGHTS_ORDER_FIELD}"
+
+    features = []
+    seen_ids = set()
+    offset = 0
+
+    for _ in range(LIGHTS_MAX_PAGES):
+        params = {
+            **query,
+            "outFields": out_fields,
+            "returnGeometry": "true" if return_geometry else "false",
+            "outSR": "4326",
+            "orderByFields": LIGHTS_ORDER_FIELD,
+            "resultOffset": offset,
+            "f": "json"
+        }
+
+        response = requests.get(DENEIGEMENT_LAYER_URL, params=params, headers=HEADERS, timeout=10)
+        response.raise_for_status()
+        data = response.json()
+
+        if 'error' in data:
+            raise ValueError(data['error'].get('message', 'Unknown API error'))
+
+        page = data.get('features', [])
+        page_ids = {feature.get('attributes', {}).get(LIGHTS_ORDER_FIELD) for feature in page} - {None}
+        if page_ids & seen_ids:
+            raise ValueError(f"Flashing-light layer repeated results at offset {offset}")
+        seen_ids |= page_ids
+        features.extend(page)
+
+        if not (data.get('exceededTransferLimit') and page):
+            return features
+
+        offset += len(page)
+
+    raise ValueError(f"Flashing-light query exceeded {LIGHTS_MAX_PAGES} pages")
+
+
+def _setting(name: str, default: Any) -> Any:
+    """Read a config value, falling back to the default outside an app context."""
+    if has_app_context():
+        return current_app.config.get(name, default)
+    return default
+
+
+def _meters_to_degrees(meters: float) -> Tuple[float, float]:
+    """Convert a distance to (lat, lon) degree spans around Quebec City."""
+    lat_deg = meters / METERS_PER_DEGREE_LAT
+    lon_deg = meters / (METERS_PER_DEGREE_LAT * math.cos(math.radians(GRID_REFERENCE_LAT)))
+    return lat_deg, lon_deg
+
+
+def _cell_for(lat: float, lon: float) -> Tuple[int, int]:
+    """Grid cell (row, col) of a coordinate in the station index."""
+    cell_lat, cell_lon = _meters_to_degrees(GRID_CELL_METERS)
+    return math.floor(lat / cell_lat), math.floor(lon / cell_lon)
+
+
+def refresh_station_registry() -> int:
+    """
+    Download every flashing-light station (geometry and status) and rebuild the grid index.
+
+    Returns:
+        Number of stations loaded
+
+    Raises:
+        requests.RequestException: On network errors
+        ValueError: On unparseable responses or ArcGIS errors
+    """
+    features = _query_lights({"where": "1=1"})
+
+    stations = {}
+    cells: Dict[Tuple[int, int], List[Dict[str, Any]]] = {}
+    for feature in features:
+        geom = feature.get('geometry') or {}
+        if geom.get('x') is None or geom.get('y') is None:
+            continue
+        stations[str(feature.get('attributes', {}).get('STATION_NO'))] = feature
+        cells.setdefault(_cell_for(geom['y'], geom['x']), []).append(feature)
+
+    now = datetime.utcnow()
+    _registry['stations'] = stations
+    _registry['cells'] = cells
+    _registry['loaded_at'] = now
+    _registry['statuses_at'] = now
+
+    logger.info(f"Quebec station registry loaded: {len(stations)} stations in {len(cells)} cells")
+    return len(stations)
+
+
+def refresh_station_statuses() -> int:
+    """
+    Update the status of every registered station with one paged attribute-only query.
+
+    Stations missing from the registry force a registry reload on the next check.
+
+    Returns:
+        Number of stations updated
+
+    Raises:
+        requests.RequestException: On network errors
+        ValueError: On unparseable responses or ArcGIS errors
+    """
+    features = _query_lights({"where": "1=1"}, out_fields="STATION_NO,STATUT", return_geometry=False)
+
+    stations = _registry['stations']
+    updated = 0
+    for feature in features:
+        attrs = feature.get('attributes', {})
+        station = stations.get(str(attrs.get('STATION_NO')))
+        if station is None:
+            _registry['loaded_at'] = None
+            continue
+        station['attributes']['STATUT'] = attrs.get('STATUT')
+        updated += 1
+
+    _registry['statuses_at'] = datetime.utcnow()
+    return updated
+
+
+def ensure_station_registry():
+    """
+    Make sure the station registry is loaded and its statuses are current.
+
+    The geometry is reloaded once QUEBEC_STATION_REGISTRY_HOURS have passed;
+    statuses are refreshed once per QUEBEC_LIGHT_STATUS_SECONDS (one check cycle).
+
+    Raises:
+        requests.RequestException: On network errors
+        ValueError: On unparseable responses or ArcGIS errors
+    """
+    registry_age = timedelta(hours=_setting('QUEBEC_STATION_REGISTRY_HOURS', 24))
+    status_age = timedelta(seconds=_setting('QUEBEC_LIGHT_STATUS_SECONDS', 300))
+
+    with _registry_lock:
+        now = datetime.utcnow()
+        if _registry['loaded_at'] is None or now - _registry['loaded_at'] > registry_age:
+            refresh_station_registry()
+        elif now - _registry['statuses_at'] > status_age:
+            refresh_station_statuses()
+
+
+def nearby_stations(lat: float, lon: float, radius: int) -> List[Dict[str, Any]]:
+    """Registered stations in the grid cells within radius meters of a location."""
+    cells = _registry['cells'] or {}
+    span = math.ceil(radius / GRID_CELL_METERS)
+    row, col = _cell_for(lat, lon)
+
+    features = []
+    for r in range(row - span, row + span + 1):
+        for c in range(col - span, col + span + 1):
+            features.extend(cells.get((r, c), ()))
+    return features
+
+
+def load_station_streets() -> Dict[str, str]:
+    """
+    Load the persisted STATION_NO -> street table into memory (once per process).
+
+    Returns:
+        The shared in-memory mapping (empty if the database is unavailable).
+    """
+    global _station_streets_loaded
+
+    with _station_streets_lock:
+        if not _station_streets_loaded and has_app_context():
+            try:
+                rows = db.session.query(StationStreetCache.station_no, StationStreetCache.street).all()
+                _station_streets.update({row.station_no: row.street for row in rows})
+                _station_streets_loaded = True
+            except Exception as e:
+                logger.warning(f"Could not load station street cache: {e}")
+
+    return _station_streets
+
+
+def save_station_streets(entries: Dict[str, Tuple[str, float, float]]):
+    """
+    Persist newly geocoded stations in one transaction.
+
+    Args:
+        entries: Dict mapping STATION_NO to (street, lat, lon)
+    """
+    if not entries or not has_app_context():
+        return
+
+    try:
+        existing = {
+            row.station_no: row for row in
+            StationStreetCache.query.filter(StationStreetCache.station_no.in_(list(entries))).all()
+        }
+        for station, (street, lat, lon) in entries.items():
+            cached = existing.get(station)
+            if cached:
+                cached.street = street
+                cached.latitude, cached.longitude = lat, lon
+                cached.geocoded_at = datetime.utcnow()
+            else:
+                db.session.add(StationStreetCache(
+                    station_no=station, street=street, latitude=lat, longitude=lon
+                ))
+        db.session.commit()
+    except Exception as e:
+        logger.error(f"Could not save station street cache: {e}")
+        db.session.rollback()
+
+
+def get_station_street(station: Any, lat: float, lon: float) -> str:
+    """
+    Get the street name for a station, reverse geocoding only unknown stations.
+
+    Failed lookups ('Unknown') are not stored, so they are retried on a later check.
+    """
+    station = str(station)
+    streets = load_station_streets()
+
+    street = streets.get(station)
+    if street is not None:
+        return street
+
+    street = reverse_geocode(lat, lon)
+    if street != 'Unknown':
+        with _station_streets_lock:
+            streets[station] = street
+        save_station_streets({station: (street, lat, lon)})
+
+    return street
+
+
+def warm_station_streets() -> Dict[str, Any]:
+    """
+    Reverse geocode every station missing from the street cache.
+
+    Walks the local station registry so later checks never need to call
+    the geocoder.
+
+    Returns:
+        Dict with success, stations, geocoded and failed counts.
+    """
+    try:
+        ensure_station_registry()
+    except (requests.RequestException, ValueError) as e:
+        logger.error(f"Quebec station warm-up failed: {e}")
+        return {'success': False, 'error': str(e)}
+
+    features = list(_registry['stations'].values())
+
+    streets = load_station_streets()
+    new_entries = {}
+    failed = 0
+
+    for feature in features:
+        station = str(feature.get('attributes', {}).get('STATION_NO', ''))
+        geom = feature.get('geometry', {})
+        if not station or station in streets or station in new_entries:
+            continue
+        if geom.get('x') is None or geom.get('y') is None:
+            continue
+
+        street = reverse_geocode(geom['y'], geom['x'])
+        if street == 'Unknown':
+            failed += 1
+            continue
+        new_entries[station] = (street, geom['y'], geom['x'])
+
+    with _station_streets_lock:
+        streets.update({station: entry[0] for station, entry in new_entries.items()})
+    save_station_streets(new_entries)
+
+    logger.info(f"Quebec station warm-up: {len(features)} stations, "
+                f"{len(new_entries)} geocoded, {failed} failed")
+    return {
+        'success': True,
+        'stations': len(features),
+        'geocoded': len(new_entries),
+        'failed': failed
+    }
+
+
+def summarize_lights(lat: float, lon: float, features: List[Dict[str, Any]],
+                     buffer_meters: int = 200, max_radius: int = 500,
+                     street_cache: Optional[Dict[Any, str]] = None) -> Dict[str, Any]:
+    """
+    Build the snow removal status for a location from already-fetched lights.
+
+    The search radius grows from buffer_meters to max_radius in 100m steps
+    until a light is found, like the per-address ArcGIS queries used to.
 
     Args:
         lat: Latitude of the location
         lon: Longitude of the location
-        buffer_meters: Search radius in meters
+        features: ArcGIS station features covering max_radius around the location
+        buffer_meters: Initial search radius in meters
+        max_radius: Maximum search radius in meters
+        street_cache: Optional per-batch STATION_NO -> street cache, so stations
+            that fail to geocode are only tried once per batch
 
     Returns:
         Dict with status information including nearby flashing lights
     """
-    base_url = "https://carte.ville.quebec.qc.ca/arcgis/rest/services/CI/Deneigement/MapServer/2/query"
+    # Distance from the location to every station
+    candidates = []
+    for feature in features:
+        geom = feature.get('geometry', {})
+        station_lon = geom.get('x')
+        station_lat = geom.get('y')
+
+        distance = None
+        if station_lat and station_lon:
+            distance = calculate_distance(lat, lon, station_lat, station_lon)
+
+        candidates.append((feature, distance))
 
-    # Try with initial buffer, expand if nothing found
     search_radius = buffer_meters
-    max_radius = 500
+    while True:
+        nearby = [(f, d) for f, d in candidates if d is not None and d <= search_radius]
+        if nearby or search_radius >= max_radius:
+            break
+        search_radius += 100
 
-    while search_radius <= max_radius:
-        params = {
-            "geometry": f"{lon},{lat}",
-            "geometryType": "esriGeometryPoint",
-            "inSR": "4326",
-            "spatialRel": "esriSpatialRelIntersects",
-            "distance": search_radius,
-            "units": "esriSRUnit_Meter",
-            "outFields": "*",
-            "returnGeometry": "true",
-            "outSR": "4326",
-            "f": "json"
+    if not nearby:
+        return {
+            "success": True,
+            "found": False,
+            "search_radius": search_radius,
+            "has_active_operation": False,
+            "lights": [],
+            "message": f"No flashing lights found within {search_radius}m."
         }
 
-        try:
-            response = requests.get(base_url, params=params, headers=HEADERS, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-
-            if 'error' in data:
-                return {
-                    "success": False,
-                    "error": data['error'].get('message', 'Unknown API error')
-                }
-
-            features = data.get('features', [])
-
-            if not features:
-                if search_radius < max_radius:
-                    search_radius += 100
-                    continue
-                return {
-                    "success": True,
-                    "found": False,
-                    "search_radius": search_radius,
-                    "has_active_operation": False,
-                    "lights": [],
-                    "message": f"No flashing lights found within {search_radius}m."
-                }
-
-            # Analyze the flashing lights found
-            results = []
-            has_active_operation = False
-
-            for feature in features:
-                attrs = feature.get('attributes', {})
-                geom = feature.get('geometry', {})
-
-                status = attrs.get('STATUT', 'Unknown')
-                station = attrs.get('STATION_NO', 'Unknown')
-
-                # Get station coordinates
-                station_lon = geom.get('x')
-                station_lat = geom.get('y')
-
-                # Calculate distance from search location
-                distance = None
-                if station_lat and station_lon:
-                    distance = calculate_distance(lat, lon, station_lat, station_lon)
-
-                # Reverse geocode to get street name
-                street = 'Unknown'
-                if station_lat and station_lon:
-                    street = reverse_geocode(station_lat, station_lon)
-
-                if status == "En fonction":
-                    has_active_operation = True
-
-                results.append({
-                    "station": station,
-                    "status": status,
-                    "street": street,
-                    "distance": distance
-                })
-
-            # Sort by distance
-            results.sort(key=lambda x: x.get('distance') or 9999)
+    # Analyze the flashing lights found
+    results = []
+    has_active_operation = False
 
-            return {
-                "success": True,
-                "found": True,
-                "search_radius": search_radius,
-                "has_active_operation": has_active_operation,
-                "lights": results,
-                "lights_nearby": len([l for l in results if l.get('status') == 'En fonction'])
-            }
+    for feature, distance in nearby:
+        attrs = feature.get('attributes', {})
+        geom = feature.get('geometry', {})
 
-        except requests.RequestException as e:
-            logger.error(f"Quebec API request error: {e}")
-            return {
-                "success": False,
-                "error": f"Network error: {e}"
-            }
-        except ValueError as e:
-            logger.error(f"Quebec API parse error: {e}")
-            return {
-                "success": False,
-                "error": f"Error parsing response: {e}"
-            }
+        status = attrs.get('STATUT', 'Unknown')
+        station = attrs.get('STATION_NO', 'Unknown')
+
+        # Street names come from the persistent station cache
+        if street_cache is not None and station in street_cache:
+            street = street_cache[station]
+        else:
+            street = get_station_street(station, geom['y'], geom['x'])
+            if street_cache is not None:
+                street_cache[station] = street
+
+        if status == "En fonction":
+            has_active_operation = True
+
+        results.append({
+            "station": station,
+            "status": status,
+            "street": street,
+            "distance": distance
+        })
+
+    # Sort by distance
+    results.sort(key=lambda x: x.get('distance') or 9999)
 
     return {
         "success": True,
-        "found": False,
-        "search_radius": max_radius,
-        "has_active_operation": False,
-        "lights": [],
-        "message": f"No flashing lights found within {max_radius}m."
+        "found": True,
+        "search_radius": search_radius,
+        "has_active_operation": has_active_operation,
+        "lights": results,
+        "lights_nearby": len([l for l in results if l.get('status') == 'En fonction'])
     }
 
 
-def get_status_for_location(lat: float, lon: float) -> Dict[str, Any]:
+def check_snow_removal_batch(locations: Dict[Any, Tuple[float, float]],
+                             buffer_meters: int = 200, max_radius: int = 500) -> Dict[Any, Dict[str, Any]]:
     """
-    Get snow removal status formatted consistently with Montreal service.
+    Check snow removal status for many locations against the local station registry.
 
-    Returns dict with display info compatible with unified response format.
+    At most one paged ArcGIS query is made per cycle (status refresh, or the
+    daily registry reload); every location is then resolved in memory.
+
+    Args:
+        locations: Dict mapping a caller key (e.g., address ID) to (lat, lon)
+        buffer_meters: Initial search radius in meters
+        max_radius: Maximum search radius in meters
+
+    Returns:
+        Dict mapping each key to the same result format as check_snow_removal
+    """
+    try:
+        ensure_station_registry()
+    except requests.RequestException as e:
+        logger.error(f"Quebec API request error: {e}")
+        return {key: {"success": False, "error": f"Network error: {e}"} for key in locations}
+    except ValueError as e:
+        logger.error(f"Quebec API parse error: {e}")
+        return {key: {"success": False, "error": f"Error parsing response: {e}"} for key in locations}
+
+    results = {}
+    street_cache: Dict[Any, str] = {}
+
+    for key, (lat, lon) in locations.items():
+        features = nearby_stations(lat, lon, max_radius)
+        results[key] = summarize_lights(lat, lon, features, buffer_meters, max_radius, street_cache)
+
+    return results
+
+
+def check_snow_removal(lat: float, lon: float, buffer_meters: int = 200) -> Dict[str, Any]:
+    """
+    Check snow removal status for a location using Quebec City's ArcGIS API.
+
+    Args:
+        lat: Latitude of the location
+        lon: Longitude of the location
+        buffer_meters: Search radius in meters
+
+    Returns:
+        Dict with status information including nearby flashing lights
+    """
+    results = check_snow_removal_batch({0: (lat, lon)}, buffer_meters, max(buffer_meters, 500))
+    return results[0]
+
+
+def format_status(result: Dict[str, Any]) -> Dict[str, Any]:
     """
-    result = check_snow_removal(lat, lon)
+    Format a check_snow_removal result consistently with Montreal service.
 
+    Returns dict with display info compatible with unified response format.
+    """
     if not result.get('success'):
         return {
             'etat': 'unknown',
@@ -334,6 +674,29 @@ def get_status_for_location(lat: float, lon: float) -> Dict[str, Any]:
     }
 
 
+def get_status_for_location(lat: float, lon: float) -> Dict[str, Any]:
+    """
+    Get snow removal status formatted consistently with Montreal service.
+
+    Returns dict with display info compatible with unified response format.
+    """
+    return format_status(check_snow_removal(lat, lon))
+
+
+def get_statuses_for_locations(locations: Dict[Any, Tuple[float, float]]) -> Dict[Any, Dict[str, Any]]:
+    """
+    Get formatted snow removal statuses for many locations at once.
+
+    Args:
+        locations: Dict mapping a caller key (e.g., address ID) to (lat, lon)
+
+    Returns:
+        Dict mapping each key to a get_status_for_location-style result
+    """
+    results = check_snow_removal_batch(locations)
+    return {key: format_status(result) for key, result in results.items()}
+
+
 def check_postal_code(postal_code: str) -> Tuple[bool, List[str]]:
     """
     Check if there's a snow removal operation for a Quebec City postal code.
@@ -271,3 +271,6 @@ def seed_default_zones():
 
     db.session.commit()
     logger.info("Quebec City waste zones seeded")
+
+    from app.services.waste_calendar import rebuild_collection_calendar
+    rebuild_collection_calendar(schemes=('zone',))
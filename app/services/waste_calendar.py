@@ -0,0 +1,237 @@
+"""
+Waste Collection Calendar
+
+Materializes every collection date for the next 12 months into the
+collection_calendar table, for both cities:
+- Montreal sectors (waste_sectors, one row set per collection type)
+- Montreal FSAs (MONTREAL_FSA_DAYS, for addresses without a sector)
+- Quebec City zones (waste_zones)
+
+Montreal dates falling on a holiday are shifted the same way as the
+schedules shown to users (Quebec City zones keep their weekday, as their
+schedules always have), so "who has a collection tomorrow" is a single join.
+"""
+
+import logging
+from datetime import date, datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+
+from app import db
+from app.models import (
+    Address, CollectionCalendar, Subscriber, WasteSector, WasteSectorAssignment, WasteZone
+)
+from app.services.montreal.waste import COLLECTION_DAYS, adjust_for_holiday
+from app.services.montreal.waste_schedule import MONTREAL_FSA_DAYS
+
+logger = logging.getLogger(__name__)
+
+# Days of collections materialized from the rebuild date
+CALENDAR_DAYS = 365
+
+CALENDAR_SCHEMES = ('sector', 'fsa', 'zone')
+
+
+def collection_dates(weekday: int, start: date, end: date, week_parity: Optional[str] = None,
+                     shift_holidays: bool = True) -> List[date]:
+    """
+    Dates of a weekly (or odd/even ISO week) collection between start and end.
+
+    Args:
+        weekday: Collection weekday (Monday=0)
+        start: First date included
+        end: First date excluded
+        week_parity: 'odd' or 'even' to keep only those ISO weeks
+        shift_holidays: Move dates past Montreal holidays (adjust_for_holiday)
+
+    Returns:
+        Collection dates
+    """
+    current = start + timedelta(days=(weekday - start.weekday()) % 7)
+    dates = []
+    while current < end:
+        week = current.isocalendar()[1]
+        if week_parity is None or ('odd' if week % 2 == 1 else 'even') == week_parity:
+            if shift_holidays:
+                dates.append(adjust_for_holiday(datetime(current.year, current.month, current.day)).date())
+            else:
+                dates.append(current)
+        current += timedelta(days=7)
+    return dates
+
+
+def _rows(scheme: str, zone: str, collection_type: str, dates: List[date]) -> List[Dict[str, Any]]:
+    return [{'scheme': scheme, 'zone': zone, 'collection_type': collection_type, 'collection_date': d}
+            for d in dates]
+
+
+def _sector_rows(start: date, end: date, collection_type: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Calendar rows of the current Montreal waste sectors (weekly on their collection day)."""
+    query = WasteSector.query
+    if collection_type:
+        query = query.filter_by(collection_type=collection_type)
+
+    rows = []
+    for sector in query:
+        weekday = COLLECTION_DAYS.get((sector.day_of_week or '').lower())
+        if weekday is None:
+            continue
+        rows.extend(_rows('sector', str(sector.sector_id), sector.collection_type,
+                          collection_dates(weekday, start, end)))
+    return rows
+
+
+def _fsa_rows(start: date, end: date) -> List[Dict[str, Any]]:
+    """Calendar rows of Montreal FSAs (weekly garbage, recycling on even weeks)."""
+    rows = []
+    for fsa, (_, weekday) in MONTREAL_FSA_DAYS.items():
+        rows.extend(_rows('fsa', fsa, 'garbage', collection_dates(weekday, start, end)))
+        rows.extend(_rows('fsa', fsa, 'recycling', collection_dates(weekday, start, end, 'even')))
+    return rows
+
+
+def _zone_rows(start: date, end: date) -> List[Dict[str, Any]]:
+    """Calendar rows of Quebec City zones (weekly garbage, recycling on odd or even weeks, no holiday shift)."""
+    from app.services.quebec.waste import DAY_NAMES
+
+    rows = []
+    for zone in WasteZone.query:
+        weekday = DAY_NAMES.get((zone.garbage_day or '').lower())
+        if weekday is None:
+            continue
+        rows.extend(_rows('zone', zone.zone_code, 'garbage',
+                          collection_dates(weekday, start, end, shift_holidays=False)))
+        if zone.recycling_week:
+            rows.extend(_rows('zone', zone.zone_code, 'recycling',
+                              collection_dates(weekday, start, end, zone.recycling_week.lower(),
+                                               shift_holidays=False)))
+    return rows
+
+
+def rebuild_collection_calendar(schemes=CALENDAR_SCHEMES, collection_type: str = None,
+                                start: date = None) -> Dict[str, int]:
+    """
+    Regenerate calendar rows for the next CALENDAR_DAYS days.
+
+    Args:
+        schemes: Schemes to regenerate ('sector', 'fsa', 'zone')
+        collection_type: Only regenerate this collection type's sectors
+            (after a waste dataset sync)
+        start: First calendar date (default: today)
+
+    Returns:
+        Dict mapping each scheme to its number of rows
+    """
+    start = start or date.today()
+    end = start + timedelta(days=CALENDAR_DAYS)
+    builders = {
+        'sector': lambda: _sector_rows(start, end, collection_type),
+        'fsa': lambda: _fsa_rows(start, end),
+        'zone': lambda: _zone_rows(start, end)
+    }
+
+    counts = {}
+    try:
+        for scheme in schemes:
+            rows = builders[scheme]()
+            query = CollectionCalendar.query.filter_by(scheme=scheme)
+            if scheme == 'sector' and collection_type:
+                query = query.filter_by(collection_type=collection_type)
+            query.delete(synchronize_session=False)
+            if rows:
+                db.session.execute(db.insert(CollectionCalendar), rows)
+            counts[scheme] = len(rows)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Failed to rebuild collection calendar: {e}")
+        raise
+
+    logger.info(f"Collection calendar rebuilt from {start}: {counts}")
+    return counts
+
+
+def ensure_collection_calendar(through: date) -> bool:
+    """Rebuild the calendar if it does not reach the given date; returns whether it did."""
+    last = db.session.query(db.func.max(CollectionCalendar.collection_date)).scalar()
+    if last is not None and last >= through:
+        return False
+    rebuild_collection_calendar()
+    return True
+
+
+def get_addresses_to_notify(collection_date: date, city: str = None) -> List[Tuple[Address, List[str]]]:
+    """
+    Addresses with a waste collection on a date, in one query.
+
+    Montreal addresses match through their persisted sector assignments
+    (current dataset version only); Montreal addresses without any
+    assignment fall back to their postal code's FSA; Quebec City
+    addresses match through their waste zone. Only active subscribers'
+    addresses with waste alerts and coordinates are returned, loaded
+    with their subscriber by the same query.
+
+    Args:
+        collection_date: Collection date (tomorrow, for reminders)
+        city: Optional filter for 'montreal' or 'quebec' (None = both)
+
+    Returns:
+        (address, collection types on that date) pairs, by address ID
+    """
+    def on_date(scheme):
+        return db.and_(CollectionCalendar.scheme == scheme,
+                       CollectionCalendar.collection_date == collection_date)
+
+    def eligible(select, address_city):
+        return select.join(Subscriber, Subscriber.id == Address.subscriber_id).where(
+            Subscriber.is_active == True,
+            Address.waste_alerts == True,
+            Address.latitude.isnot(None),
+            Address.longitude.isnot(None),
+            Address.city == address_city
+        )
+
+    selects = []
+    if city in (None, 'montreal'):
+        sector = db.select(Address.id, CollectionCalendar.collection_type).join(
+            WasteSectorAssignment, WasteSectorAssignment.address_id == Address.id
+        ).join(WasteSector, db.and_(
+            WasteSector.collection_type == WasteSectorAssignment.collection_type,
+            WasteSector.sector_id == WasteSectorAssignment.sector_id,
+            WasteSector.dataset_version == WasteSectorAssignment.dataset_version
+        )).join(CollectionCalendar, db.and_(
+            on_date('sector'),
+            CollectionCalendar.collection_type == WasteSectorAssignment.collection_type,
+            CollectionCalendar.zone == db.cast(WasteSectorAssignment.sector_id, db.String)
+        ))
+
+        unassigned = ~db.exists().where(WasteSectorAssignment.address_id == Address.id)
+        fsa = db.select(Address.id, CollectionCalendar.collection_type).join(CollectionCalendar, db.and_(
+            on_date('fsa'),
+            CollectionCalendar.zone == db.func.upper(db.func.substr(Address.postal_code, 1, 3))
+        )).where(unassigned)
+
+        selects += [eligible(sector, 'montreal'), eligible(fsa, 'montreal')]
+
+    if city in (None, 'quebec'):
+        zone = db.select(Address.id, CollectionCalendar.collection_type).join(
+            WasteZone, WasteZone.id == Address.waste_zone_id
+        ).join(CollectionCalendar, db.and_(
+            on_date('zone'),
+            CollectionCalendar.zone == WasteZone.zone_code
+        ))
+        selects.append(eligible(zone, 'quebec'))
+
+    if not selects:
+        return []
+
+    due_rows = (db.union_all(*selects) if len(selects) > 1 else selects[0]).subquery()
+    query = db.select(Address, due_rows.c.collection_type).join(
+        due_rows, due_rows.c.id == Address.id
+    ).options(db.joinedload(Address.subscriber)).order_by(Address.id)
+
+    due: List[Tuple[Address, List[str]]] = []
+    for address, collection_type in db.session.execute(query):
+        if not due or due[-1][0] is not address:
+            due.append((address, []))
+        due[-1][1].append(collection_type)
+    return due
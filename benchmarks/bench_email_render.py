@@ -0,0 +1,64 @@
+"""
+Benchmark: render 10k snow alert emails with and without the render cache.
+
+Usage: python benchmarks/bench_email_render.py [count]
+"""
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import render_template
+
+from app import create_app
+from app.services.email import render_email, clear_render_cache
+
+
+def make_recipients(count):
+    """Build fake subscriber/address pairs spread over a few streets."""
+    recipients = []
+    for i in range(count):
+        subscriber = SimpleNamespace(unsubscribe_token=f'token-{i:08d}',
+                                     language='fr' if i % 3 == 0 else 'en')
+        address = f"{1000 + i} Rue Street-{i % 50}"
+        recipients.append((subscriber, address))
+    return recipients
+
+
+def bench(count=10000):
+    """Time full renders against render-once plus substitution."""
+    app = create_app('testing')
+    status = {'etat': 'en_cours', 'scheduled_start': '2026-01-10T02:00:00',
+              'scheduled_end': '2026-01-10T08:00:00'}
+    recipients = make_recipients(count)
+
+    with app.test_request_context():
+        start = time.perf_counter()
+        for subscriber, address in recipients:
+            render_template('email/snow_urgent.html', address=address, city='montreal',
+                            city_display='Montreal', status=status,
+                            unsubscribe_url=f"https://x/unsubscribe/{subscriber.unsubscribe_token}",
+                            language=subscriber.language)
+        full = time.perf_counter() - start
+
+        clear_render_cache()
+        start = time.perf_counter()
+        for subscriber, address in recipients:
+            render_email('email/snow_urgent.html',
+                         {'address': address,
+                          'unsubscribe_url': f"https://x/unsubscribe/{subscriber.unsubscribe_token}"},
+                         city='montreal', city_display='Montreal', status=status,
+                         language=subscriber.language)
+        cached = time.perf_counter() - start
+
+    print(f"{count} alerts")
+    print(f"  render_template: {full:.3f}s ({full / count * 1e6:.1f} us/alert)")
+    print(f"  render_email:    {cached:.3f}s ({cached / count * 1e6:.1f} us/alert)")
+    print(f"  speedup:         {full / cached:.1f}x")
+
+
+if __name__ == '__main__':
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,90 @@
+"""
+Benchmark: search_addresses autocomplete latency for 3-6 character prefixes.
+
+Builds a synthetic ~100k-row geobase_cache with a few thousand distinct
+streets and some subscriber addresses, then reports p50/p99 latency for
+cold (uncached) and warm searches, including prefixes with a typo.
+
+Usage: python benchmarks/bench_geobase_autocomplete.py [rows] [searches]
+"""
+import os
+import random
+import statistics
+import sys
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from app.models import Address, GeobaseCache, Subscriber
+from app.services.montreal import geobase
+from app.services.montreal.geobase import rebuild_autocomplete_index, search_addresses
+
+from bench_geobase_lookup import make_rows
+
+
+def percentile(samples, fraction):
+    """Value at the given fraction of the sorted samples."""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def typo(term, rng):
+    """Swap two adjacent characters after the first."""
+    i = rng.randrange(1, len(term) - 1)
+    return term[:i] + term[i + 1] + term[i] + term[i + 2:]
+
+
+def timed(queries, clear):
+    """Per-query latencies in milliseconds."""
+    samples = []
+    for query in queries:
+        if clear:
+            geobase._completion_cache.clear()
+        start = time.perf_counter()
+        search_addresses(query)
+        samples.append((time.perf_counter() - start) * 1e3)
+    return samples
+
+
+def bench(row_count=100000, searches=2000):
+    """Time cold and warm prefix searches."""
+    app = create_app('testing')
+    rng = random.Random(42)
+
+    with app.app_context():
+        rows = make_rows(row_count)
+        db.session.execute(db.insert(GeobaseCache), rows)
+        subscriber = Subscriber(email='bench@example.com')
+        db.session.add(subscriber)
+        db.session.flush()
+        db.session.execute(db.insert(Address), [
+            {'subscriber_id': subscriber.id, 'city': 'montreal',
+             'street_name': rows[rng.randrange(len(rows))]['nom_voie']}
+            for _ in range(5000)
+        ])
+        db.session.commit()
+
+        start = time.perf_counter()
+        completions = rebuild_autocomplete_index()
+        build = time.perf_counter() - start
+
+        names = [row['nom_voie'] for row in rows[::20]]
+        prefixes = [rng.choice(names)[:rng.randint(3, 6)] for _ in range(searches)]
+        typos = [typo(prefix, rng) for prefix in prefixes if len(prefix) >= 4]
+
+        cold = timed(prefixes, clear=True)
+        cold_typos = timed(typos, clear=True)
+        warm = timed(prefixes, clear=False)
+
+    print(f"{len(rows)} rows, {completions} completions, {searches} searches")
+    print(f"  index build:      {build:.3f}s")
+    for label, samples in (('cold prefix', cold), ('cold typo', cold_typos), ('warm prefix', warm)):
+        print(f"  {label + ':':17} p50 {statistics.median(samples):.3f} ms, "
+              f"p99 {percentile(samples, 0.99):.3f} ms, max {max(samples):.3f} ms")
+
+
+if __name__ == '__main__':
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 100000,
+          int(sys.argv[2]) if len(sys.argv) > 2 else 2000)
@@ -0,0 +1,89 @@
+"""
+Benchmark: coordinate-to-segment lookups over the Geobase STR-tree.
+
+Builds a synthetic ~100k-row geobase_cache (a grid of two-sided street
+segments over Montreal) and times lookup_by_coordinates on random points.
+
+Usage: python benchmarks/bench_geobase_coordinates.py [rows] [lookups]
+"""
+import os
+import random
+import sys
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from app import create_app, db
+from app.models import GeobaseCache
+from app.services.montreal.geobase import (
+    encode_geometry,
+    find_nearest_segment,
+    lookup_by_coordinates,
+    rebuild_spatial_index
+)
+
+BLOCK_DEGREES = 0.001  # ~110m north-south, ~80m east-west
+
+
+def make_rows(count):
+    """Synthetic east-west block segments, both sides sharing one line."""
+    rows = []
+    per_row = int((count // 2) ** 0.5)
+    for i in range(count // 2):
+        lat = 45.45 + (i // per_row) * BLOCK_DEGREES
+        lon = -73.75 + (i % per_row) * BLOCK_DEGREES
+        geometry = encode_geometry(np.array([[lon, lat], [lon + BLOCK_DEGREES, lat]]))
+        for side in ('Droit', 'Gauche'):
+            rows.append({
+                'cote_rue_id': len(rows) + 1,
+                'nom_voie': f'Rue-{i // per_row}',
+                'type_voie': 'Rue',
+                'debut_adresse': 1,
+                'fin_adresse': 99,
+                'cote': side,
+                'nom_ville': 'Montréal',
+                'geometry': geometry
+            })
+    return rows, per_row
+
+
+def bench(row_count=100000, lookups=2000):
+    """Time index build and random point lookups."""
+    app = create_app('testing')
+    rng = random.Random(42)
+
+    with app.app_context():
+        rows, per_row = make_rows(row_count)
+        db.session.execute(db.insert(GeobaseCache), rows)
+        db.session.commit()
+
+        extent = per_row * BLOCK_DEGREES
+        points = [(45.45 + rng.random() * extent, -73.75 + rng.random() * extent)
+                  for _ in range(lookups)]
+
+        start = time.perf_counter()
+        lines = rebuild_spatial_index()
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for lat, lon in points:
+            find_nearest_segment(lat, lon)
+        nearest = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for lat, lon in points:
+            lookup_by_coordinates(lat, lon)
+        full = time.perf_counter() - start
+
+    print(f"{len(rows)} rows, {lines} lines, {lookups} lookups")
+    print(f"  index build:      {build:.3f}s")
+    print(f"  nearest segment:  {nearest / lookups * 1e3:.3f} ms/lookup")
+    print(f"  with row fetch:   {full / lookups * 1e3:.3f} ms/lookup")
+
+
+if __name__ == '__main__':
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 100000,
+          int(sys.argv[2]) if len(sys.argv) > 2 else 2000)
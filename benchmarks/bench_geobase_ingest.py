@@ -0,0 +1,80 @@
+"""
+Benchmark: peak Python memory and stage timings of the streamed Geobase refresh.
+
+Runs refresh_cache against synthetic CSVs of increasing size served from a
+local HTTP server. Peak memory of the download + load stages should stay
+roughly flat as rows grow; the street index that is rebuilt afterwards is
+reported separately since it holds every row by design.
+
+Usage: python benchmarks/bench_geobase_ingest.py [rows ...]
+"""
+import csv
+import os
+import sys
+import tempfile
+import threading
+import tracemalloc
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from app.services.montreal import geobase
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def write_csv(path, rows):
+    """Synthetic Geobase Double file with rows segment sides."""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['COTE_RUE_ID', 'NOM_VOIE', 'TYPE_F', 'DEBUT_ADRESSE',
+                         'FIN_ADRESSE', 'COTE', 'NOM_VILLE'])
+        for i in range(rows):
+            block = (i // 2) % 10
+            writer.writerow([i + 1, f'Street-{i // 20}', 'Rue', block * 100 + i % 2,
+                             block * 100 + 98 + i % 2, 'Droit' if i % 2 else 'Gauche', 'Montréal'])
+
+
+def bench(sizes):
+    """Refresh the cache once per size and report peak traced memory."""
+    app = create_app('testing')
+    workdir = tempfile.mkdtemp()
+    server = ThreadingHTTPServer(('127.0.0.1', 0), partial(QuietHandler, directory=workdir))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    real_get = geobase.requests.get
+    real_rebuild = geobase.rebuild_street_index
+    peaks = {}
+
+    def rebuild_street_index():
+        peaks['load'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.reset_peak()
+        return real_rebuild()
+
+    for rows in sizes:
+        write_csv(os.path.join(workdir, 'geobase-double.csv'), rows)
+        url = f'http://127.0.0.1:{server.server_address[1]}/geobase-double.csv'
+
+        with app.app_context(), \
+             patch.object(geobase.requests, 'get', lambda _, **kw: real_get(url, **kw)), \
+             patch.object(geobase, 'rebuild_street_index', rebuild_street_index):
+            tracemalloc.start()
+            result = geobase.refresh_cache()
+            peaks['index'] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        print(f"{rows} rows ({result['bytes'] / 1e6:.1f} MB): "
+              f"load peak {peaks['load'] / 1e6:.1f} MB, index peak {peaks['index'] / 1e6:.1f} MB, "
+              f"stages {result['stages']}")
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    bench([int(arg) for arg in sys.argv[1:]] or [50000, 100000, 200000])
@@ -0,0 +1,106 @@
+"""
+Benchmark: Geobase address lookups with ILIKE scans vs the in-memory street index.
+
+Builds a synthetic ~100k-row geobase_cache (the size of Geobase Double).
+
+Usage: python benchmarks/bench_geobase_lookup.py [rows] [lookups]
+"""
+import os
+import random
+import sys
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from app.models import GeobaseCache
+from app.services.montreal.geobase import (
+    parse_address,
+    lookup_address,
+    rebuild_street_index
+)
+
+PREFIXES = ['Saint', 'Sainte', 'Mont', 'De', 'Du', 'Des', 'Notre-Dame', '']
+WORDS = ['Denis', 'Laurent', 'Catherine', 'Royal', 'Hubert', 'Urbain', 'Joseph',
+         'Rachel', 'Sherbrooke', 'Ontario', 'Papineau', 'Iberville', 'Fullum',
+         'Garnier', 'Marquette', 'Chambord', 'Brebeuf', 'Lanaudiere', 'Boyer']
+
+
+def make_rows(count):
+    """Synthetic segments: ~20 per street, both sides, 100-number blocks."""
+    rows = []
+    street_count = count // 20
+    for s in range(street_count):
+        name = '-'.join(p for p in (PREFIXES[s % len(PREFIXES)], WORDS[s % len(WORDS)], str(s)) if p)
+        for block in range(10):
+            for side in ('Droit', 'Gauche'):
+                rows.append({
+                    'cote_rue_id': len(rows) + 1,
+                    'nom_voie': name,
+                    'type_voie': 'Rue',
+                    'debut_adresse': block * 100,
+                    'fin_adresse': block * 100 + 99,
+                    'cote': side,
+                    'nom_ville': 'Montréal'
+                })
+    return rows
+
+
+def ilike_lookup(address):
+    """The previous lookup_address query path."""
+    parsed = parse_address(address)
+    normalized = parsed['normalized_name']
+    civic_number = parsed['civic_number']
+
+    query = GeobaseCache.query.filter(GeobaseCache.nom_voie.ilike(f'%{normalized}%'))
+    query = query.filter(GeobaseCache.debut_adresse <= civic_number,
+                         GeobaseCache.fin_adresse >= civic_number)
+    results = query.limit(10).all()
+    if not results:
+        query = GeobaseCache.query.filter(GeobaseCache.nom_voie.ilike(f'%{normalized[:4]}%'))
+        query = query.filter(GeobaseCache.debut_adresse <= civic_number,
+                             GeobaseCache.fin_adresse >= civic_number)
+        results = query.limit(10).all()
+    return results[0] if results else None
+
+
+def bench(row_count=100000, lookups=500):
+    """Time the same random lookups through both paths."""
+    app = create_app('testing')
+    rng = random.Random(42)
+
+    with app.app_context():
+        rows = make_rows(row_count)
+        db.session.execute(db.insert(GeobaseCache), rows)
+        db.session.commit()
+
+        addresses = []
+        for _ in range(lookups):
+            row = rows[rng.randrange(len(rows))]
+            addresses.append(f"{row['debut_adresse'] + rng.randrange(100)} rue {row['nom_voie']}")
+
+        start = time.perf_counter()
+        for address in addresses:
+            ilike_lookup(address)
+        scan = time.perf_counter() - start
+
+        start = time.perf_counter()
+        streets = rebuild_street_index()
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for address in addresses:
+            lookup_address(address)
+        indexed = time.perf_counter() - start
+
+    print(f"{len(rows)} rows, {streets} streets, {lookups} lookups")
+    print(f"  index build:      {build:.3f}s")
+    print(f"  ILIKE lookup:     {scan:.3f}s ({scan / lookups * 1e3:.2f} ms/lookup)")
+    print(f"  indexed lookup:   {indexed:.3f}s ({indexed / lookups * 1e3:.2f} ms/lookup)")
+    print(f"  speedup:          {scan / indexed:.1f}x")
+
+
+if __name__ == '__main__':
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 100000,
+          int(sys.argv[2]) if len(sys.argv) > 2 else 500)
@@ -0,0 +1,79 @@
+"""
+Benchmark: bulk address parsing and resolution throughput.
+
+Builds a synthetic ~100k-row geobase_cache and resolves a list of
+addresses with mixed formats (number first or last, abbreviated street
+types and saints), one lookup_address call at a time and then through
+resolve_addresses.
+
+Usage: python benchmarks/bench_geobase_resolve.py [rows] [addresses]
+"""
+import os
+import random
+import sys
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from app.models import GeobaseCache
+from app.services.montreal.geobase import (
+    parse_addresses,
+    lookup_address,
+    resolve_addresses,
+    rebuild_street_index
+)
+
+from bench_geobase_lookup import make_rows
+
+TYPES = ['rue', 'Rue', 'r.', 'av', 'avenue', 'boul', 'ch.', '']
+
+
+def make_addresses(rows, count, rng):
+    """Address strings for random segments, in varied formats."""
+    addresses = []
+    for _ in range(count):
+        row = rows[rng.randrange(len(rows))]
+        number = row['debut_adresse'] + rng.randrange(100)
+        street = ' '.join(part for part in (rng.choice(TYPES), row['nom_voie'].replace('Saint-', 'St-')) if part)
+        addresses.append(f"{number} {street}" if rng.random() < 0.8 else f"{street} {number}")
+    return addresses
+
+
+def bench(row_count=100000, address_count=100000):
+    """Time parsing, single lookups and bulk resolution."""
+    app = create_app('testing')
+    rng = random.Random(42)
+
+    with app.app_context():
+        rows = make_rows(row_count)
+        db.session.execute(db.insert(GeobaseCache), rows)
+        db.session.commit()
+        addresses = make_addresses(rows, address_count, rng)
+        rebuild_street_index()
+
+        start = time.perf_counter()
+        for _ in parse_addresses(addresses):
+            pass
+        parse = time.perf_counter() - start
+
+        sample = addresses[:address_count // 10]
+        start = time.perf_counter()
+        for address in sample:
+            lookup_address(address)
+        single = (time.perf_counter() - start) * len(addresses) / len(sample)
+
+        start = time.perf_counter()
+        resolved = sum(1 for result in resolve_addresses(addresses) if result)
+        bulk = time.perf_counter() - start
+
+    print(f"{len(rows)} rows, {len(addresses)} addresses, {resolved} resolved")
+    print(f"  parse only:        {parse:.2f}s ({len(addresses) / parse * 60:,.0f}/min)")
+    print(f"  lookup_address:    {single:.2f}s est. ({len(addresses) / single * 60:,.0f}/min)")
+    print(f"  resolve_addresses: {bulk:.2f}s ({len(addresses) / bulk * 60:,.0f}/min)")
+
+
+if __name__ == '__main__':
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 100000,
+          int(sys.argv[2]) if len(sys.argv) > 2 else 100000)
@@ -0,0 +1,88 @@
+"""
+Benchmark: waste sector assignment for the nightly reminder run.
+
+Builds four synthetic sector datasets (a grid of detailed polygons over
+Montreal) and assigns random addresses to sectors with one
+find_sector_for_point call per address and dataset, then in one
+vectorized pass per dataset with assign_sectors.
+
+Usage: python benchmarks/bench_waste_sectors.py [addresses] [sectors_per_side]
+"""
+import os
+import random
+import sys
+import time
+from unittest.mock import patch
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from app.services.montreal import waste
+from app.services.montreal.waste import assign_sectors, find_sector_for_point
+
+WEST, SOUTH, WIDTH, HEIGHT = -73.95, 45.40, 0.50, 0.30
+RING_POINTS_PER_EDGE = 50
+
+
+def make_sectors(per_side):
+    """Grid of square sectors with densified rings, like real sector outlines."""
+    features = []
+    dx, dy = WIDTH / per_side, HEIGHT / per_side
+    for i in range(per_side):
+        for j in range(per_side):
+            x, y = WEST + i * dx, SOUTH + j * dy
+            corners = [(x, y), (x + dx, y), (x + dx, y + dy), (x, y + dy), (x, y)]
+            ring = []
+            for (x0, y0), (x1, y1) in zip(corners, corners[1:]):
+                for t in range(RING_POINTS_PER_EDGE):
+                    ring.append([x0 + (x1 - x0) * t / RING_POINTS_PER_EDGE,
+                                 y0 + (y1 - y0) * t / RING_POINTS_PER_EDGE])
+            ring.append(ring[0])
+            features.append({
+                'type': 'Feature',
+                'geometry': {'type': 'Polygon', 'coordinates': [ring]},
+                'properties': {'SECTEUR': f'{i}-{j}', 'JOUR_COLLECTE': 'mardi'}
+            })
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+def bench(address_count=100000, per_side=30):
+    """Time per-address lookups against the vectorized batch."""
+    app = create_app('testing')
+    rng = random.Random(42)
+    datasets = {collection_type: make_sectors(per_side) for collection_type in waste.WASTE_DATASETS}
+    locations = {i: (SOUTH + rng.random() * HEIGHT, WEST + rng.random() * WIDTH)
+                 for i in range(address_count)}
+
+    def fetch(collection_type, **validators):
+        return {'status': 'modified', 'geojson': datasets[collection_type], 'bytes': 0, 'seconds': 0.0}
+
+    with app.app_context():
+        with patch.object(waste, 'fetch_waste_dataset', side_effect=fetch):
+            start = time.perf_counter()
+            waste.load_all_waste_data()
+            build = time.perf_counter() - start
+
+        sample = list(locations.items())[:address_count // 10]
+        start = time.perf_counter()
+        for _, (lat, lon) in sample:
+            for geojson in waste._waste_cache['data'].values():
+                find_sector_for_point(lon, lat, geojson)
+        single = (time.perf_counter() - start) * address_count / len(sample)
+
+        start = time.perf_counter()
+        assignments = assign_sectors(locations)
+        batch = time.perf_counter() - start
+
+    assigned = sum(1 for sectors in assignments.values() if len(sectors) == len(datasets))
+    print(f"{address_count} addresses, {len(datasets)} datasets x {per_side * per_side} sectors, "
+          f"{assigned} fully assigned")
+    print(f"  index build:      {build:.3f}s")
+    print(f"  per address:      {single:.2f}s est.")
+    print(f"  assign_sectors:   {batch:.2f}s")
+
+
+if __name__ == '__main__':
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 100000,
+          int(sys.argv[2]) if len(sys.argv) > 2 else 30)
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -18,6 +19,9 @@ class Config:
     # Email (Resend)
     RESEND_API_KEY = os.environ.get('RESEND_API_KEY')
     SENDER_EMAIL = os.environ.get('SENDER_EMAIL', 'alerts@alertmtl.com')
+    RESEND_API_URL = os.environ.get('RESEND_API_URL', 'https://api.resend.com')
+    EMAIL_DELIVERY_CONCURRENCY = int(os.environ.get('EMAIL_DELIVERY_CONCURRENCY', 8))
+    EMAIL_SEND_RATE = float(os.environ.get('EMAIL_SEND_RATE', 2))  # API requests per second
 
     # External APIs
     PLANIF_NEIGE_WSDL = os.environ.get(
@@ -28,6 +32,8 @@ class Config:
         'GEOBASE_CSV_URL',
         'https://donnees.montreal.ca/dataset/geobase-double/resource/csv'
     )
+    # Empty: look the GeoJSON resource up in the Geobase Double dataset metadata
+    GEOBASE_GEOJSON_URL = os.environ.get('GEOBASE_GEOJSON_URL', '')
 
     # App Settings
     APP_URL = os.environ.get('APP_URL', 'http://localhost:5000')
@@ -35,8 +41,18 @@ class Config:
 
     # Cache Settings (in appropriate units)
     GEOBASE_CACHE_DAYS = int(os.environ.get('GEOBASE_CACHE_DAYS', 7))
+    GEOBASE_MIN_ROW_RATIO = float(os.environ.get('GEOBASE_MIN_ROW_RATIO', 0.9))  # vs. live generation
+    GEOBASE_DIFF_MAX_RATIO = float(os.environ.get('GEOBASE_DIFF_MAX_RATIO', 0.25))  # larger changes swap tables
     PLANIF_NEIGE_CACHE_SECONDS = int(os.environ.get('PLANIF_NEIGE_CACHE_SECONDS', 300))
     WASTE_CACHE_HOURS = int(os.environ.get('WASTE_CACHE_HOURS', 24))
+    # Shared by all workers on a host so only one downloads and parses the waste
+    # datasets (each still builds its own sector index); empty disables it
+    WASTE_CACHE_DIR = os.environ.get('WASTE_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'alert-mtl-waste'))
+    QUEBEC_STATION_REGISTRY_HOURS = int(os.environ.get('QUEBEC_STATION_REGISTRY_HOURS', 24))
+    QUEBEC_LIGHT_STATUS_SECONDS = int(os.environ.get('QUEBEC_LIGHT_STATUS_SECONDS', 300))
+
+    # Alert Settings
+    ALERT_LOG_BATCH_SIZE = int(os.environ.get('ALERT_LOG_BATCH_SIZE', 500))
 
 
 class DevelopmentConfig(Config):
@@ -50,6 +66,7 @@ class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
+    WASTE_CACHE_DIR = None
 
 
 class ProductionConfig(Config):
@@ -0,0 +1,40 @@
+"""
+Migration script to add the 'idx_alert_dedup_recent' index to alert_history.
+Run this script once after deploying the bulk deduplication update.
+
+The index leads with sent_at so the per-run dedup preload is a single
+range scan.
+
+Usage: python migrations/add_alert_dedup_recent_index.py
+"""
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from sqlalchemy import text
+
+
+def migrate():
+    """Create idx_alert_dedup_recent if missing."""
+    app = create_app()
+
+    with app.app_context():
+        try:
+            db.session.execute(text(
+                "CREATE INDEX IF NOT EXISTS idx_alert_dedup_recent "
+                "ON alert_history (sent_at, city, address_id, alert_type, reference_date)"
+            ))
+            db.session.commit()
+            print("Successfully added idx_alert_dedup_recent index on alert_history.")
+            return True
+        except Exception as e:
+            print(f"Error adding index: {e}")
+            db.session.rollback()
+            return False
+
+
+if __name__ == '__main__':
+    migrate()
@@ -0,0 +1,47 @@
+"""
+Migration script to add 'geometry' column to geobase_cache table.
+Run this script once after deploying the Geobase coordinate lookup.
+
+Rows get their geometry on the next full (swap) refresh.
+
+Usage: python migrations/add_geobase_geometry.py
+"""
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from sqlalchemy import text
+
+
+def migrate():
+    """Add geometry column to geobase_cache table if it doesn't exist."""
+    app = create_app()
+
+    with app.app_context():
+        # Check if column exists
+        try:
+            db.session.execute(text("SELECT geometry FROM geobase_cache LIMIT 1"))
+            print("Column 'geometry' already exists in geobase_cache table.")
+            return True
+        except Exception:
+            db.session.rollback()
+
+        # Add the column
+        try:
+            db.session.execute(text(
+                "ALTER TABLE geobase_cache ADD COLUMN geometry BYTEA"
+            ))
+            db.session.commit()
+            print("Successfully added 'geometry' column to geobase_cache table.")
+            return True
+        except Exception as e:
+            print(f"Error adding column: {e}")
+            db.session.rollback()
+            return False
+
+
+if __name__ == '__main__':
+    migrate()
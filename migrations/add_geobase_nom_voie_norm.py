@@ -0,0 +1,58 @@
+"""
+Migration script to add 'nom_voie_norm' column to geobase_cache table.
+Run this script once after deploying the normalized street name column.
+
+Existing rows are backfilled with street_match_key, one UPDATE per
+distinct street name.
+
+Usage: python migrations/add_geobase_nom_voie_norm.py
+"""
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from app.services.montreal.geobase import street_match_key
+from sqlalchemy import text
+
+
+def migrate():
+    """Add and backfill nom_voie_norm on geobase_cache if it doesn't exist."""
+    app = create_app()
+
+    with app.app_context():
+        # Check if column exists
+        try:
+            db.session.execute(text("SELECT nom_voie_norm FROM geobase_cache LIMIT 1"))
+            print("Column 'nom_voie_norm' already exists in geobase_cache table.")
+            return True
+        except Exception:
+            db.session.rollback()
+
+        # Add and backfill the column
+        try:
+            db.session.execute(text(
+                "ALTER TABLE geobase_cache ADD COLUMN nom_voie_norm VARCHAR(255)"
+            ))
+
+            names = [row[0] for row in db.session.execute(
+                text("SELECT DISTINCT nom_voie FROM geobase_cache")
+            )]
+            db.session.execute(
+                text("UPDATE geobase_cache SET nom_voie_norm = :norm WHERE nom_voie = :name"),
+                [{'norm': street_match_key(name), 'name': name} for name in names]
+            )
+
+            db.session.commit()
+            print(f"Successfully added 'nom_voie_norm' to geobase_cache ({len(names)} street names).")
+            return True
+        except Exception as e:
+            print(f"Error adding column: {e}")
+            db.session.rollback()
+            return False
+
+
+if __name__ == '__main__':
+    migrate()
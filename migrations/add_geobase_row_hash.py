@@ -0,0 +1,47 @@
+"""
+Migration script to add 'row_hash' column to geobase_cache table.
+Run this script once after deploying the incremental Geobase refresh.
+
+Rows without a hash are rewritten by the next refresh.
+
+Usage: python migrations/add_geobase_row_hash.py
+"""
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from sqlalchemy import text
+
+
+def migrate():
+    """Add row_hash column to geobase_cache table if it doesn't exist."""
+    app = create_app()
+
+    with app.app_context():
+        # Check if column exists
+        try:
+            db.session.execute(text("SELECT row_hash FROM geobase_cache LIMIT 1"))
+            print("Column 'row_hash' already exists in geobase_cache table.")
+            return True
+        except Exception:
+            db.session.rollback()
+
+        # Add the column
+        try:
+            db.session.execute(text(
+                "ALTER TABLE geobase_cache ADD COLUMN row_hash VARCHAR(40)"
+            ))
+            db.session.commit()
+            print("Successfully added 'row_hash' column to geobase_cache table.")
+            return True
+        except Exception as e:
+            print(f"Error adding column: {e}")
+            db.session.rollback()
+            return False
+
+
+if __name__ == '__main__':
+    migrate()
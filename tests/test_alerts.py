@@ -0,0 +1,228 @@
+"""
+Tests for alert dispatch service
+"""
+
+import pytest
+from datetime import datetime, timedelta, date
+from unittest.mock import patch
+from app import db
+from app.models import Subscriber, Address, AlertHistory
+from app.services.alerts import (
+    AlertLogBuffer,
+    AlertLogError,
+    _log_deliveries,
+    check_all_snow_statuses,
+    send_waste_reminders,
+    load_recent_alert_keys,
+    should_send_alert,
+    log_alert
+)
+
+
+def _add_montreal_addresses(cote_rue_ids, last_snow_status=None):
+    """Create one active subscriber per segment ID with a Montreal address."""
+    addresses = []
+    for i, cote_rue_id in enumerate(cote_rue_ids):
+        subscriber = Subscriber(email=f'user{i}@example.com', is_active=True)
+        db.session.add(subscriber)
+        db.session.flush()
+
+        address = Address(
+            subscriber_id=subscriber.id,
+            city='montreal',
+            cote_rue_id=cote_rue_id,
+            last_snow_status=last_snow_status
+        )
+        db.session.add(address)
+        addresses.append(address)
+
+    db.session.commit()
+    return addresses
+
+
+class TestSegmentGroupedSnowCheck:
+    """Tests for per-segment status resolution in snow checks."""
+
+    def test_one_lookup_per_segment(self, app):
+        """Should look up each distinct cote_rue_id only once."""
+        with app.app_context():
+            _add_montreal_addresses([111, 111, 111, 222])
+
+            with patch('app.services.montreal.planif_neige.get_status_for_street',
+                       return_value={'etat': 'enneige'}) as mock_status:
+                result = check_all_snow_statuses(city='montreal')
+
+            assert mock_status.call_count == 2
+            assert result['addresses_checked'] == 4
+            assert result['segments_checked'] == 2
+
+    def test_shared_status_applied_to_all_addresses(self, app):
+        """Every address on a segment should receive the shared status."""
+        with app.app_context():
+            _add_montreal_addresses([111, 111])
+
+            with patch('app.services.montreal.planif_neige.get_status_for_street',
+                       return_value={'etat': 'deneige'}):
+                check_all_snow_statuses(city='montreal')
+
+            statuses = [a.last_snow_status for a in Address.query.all()]
+            assert statuses == ['deneige', 'deneige']
+
+
+class TestBulkDeduplication:
+    """Tests for preloaded alert deduplication."""
+
+    def test_preload_only_recent_alerts(self, app, sample_address):
+        """Should load keys sent within the last 24 hours only."""
+        with app.app_context():
+            address = Address.query.first()
+            db.session.add(AlertHistory(address_id=address.id, city='montreal',
+                                        alert_type='snow_urgent'))
+            db.session.add(AlertHistory(address_id=address.id, city='montreal',
+                                        alert_type='snow_cleared',
+                                        sent_at=datetime.utcnow() - timedelta(hours=30)))
+            db.session.commit()
+
+            keys = load_recent_alert_keys()
+
+            assert keys == {(address.id, 'snow_urgent', None)}
+
+    def test_set_lookup_matches_query(self, app, sample_address):
+        """In-memory check should agree with the database check."""
+        with app.app_context():
+            address = Address.query.first()
+            collection_date = date(2026, 1, 14)
+            log_alert(address.id, 'montreal', 'waste_reminder', 'tomorrow',
+                      reference_date=collection_date)
+
+            keys = load_recent_alert_keys('montreal')
+
+            for ref in (collection_date, date(2026, 1, 21)):
+                assert should_send_alert(address.id, 'waste_reminder', ref, keys) == \
+                    should_send_alert(address.id, 'waste_reminder', ref)
+
+    def test_logged_alert_added_to_set(self, app, sample_address):
+        """Alerts logged during a run should be deduplicated immediately."""
+        with app.app_context():
+            address = Address.query.first()
+            keys = set()
+
+            assert should_send_alert(address.id, 'snow_urgent', sent_keys=keys)
+            log_alert(address.id, 'montreal', 'snow_urgent', 'en_cours', sent_keys=keys)
+            assert not should_send_alert(address.id, 'snow_urgent', sent_keys=keys)
+
+
+class TestAlertLogBuffer:
+    """Tests for batched alert history writes."""
+
+    def test_flushes_every_batch(self, app, sample_address):
+        """Should insert rows once the batch size is reached."""
+        with app.app_context():
+            address = Address.query.first()
+            buffer = AlertLogBuffer(batch_size=2)
+
+            for alert_type in ('snow_scheduled', 'snow_urgent', 'snow_cleared'):
+                log_alert(address.id, 'montreal', alert_type, 'x', alert_log=buffer)
+
+            assert AlertHistory.query.count() == 2
+            assert len(buffer.pending) == 1
+
+            buffer.flush()
+            assert AlertHistory.query.count() == 3
+            assert buffer.flushed == 3
+
+    def test_persistent_failure_raises(self, app, sample_address):
+        """A batch that cannot be written should raise and stay queued."""
+        with app.app_context():
+            address = Address.query.first()
+            buffer = AlertLogBuffer(batch_size=10)
+            log_alert(address.id, 'montreal', 'snow_urgent', 'x', alert_log=buffer)
+
+            with patch.object(db.session, 'execute', side_effect=Exception('db down')) as mock_execute:
+                with pytest.raises(AlertLogError):
+                    buffer.flush()
+
+            assert mock_execute.call_count == 3
+            assert len(buffer.pending) == 1
+            assert AlertHistory.query.count() == 0
+
+    def test_retried_flush_keeps_status_updates(self, app, sample_address):
+        """Status updates pending when a flush attempt fails should be committed by the retry."""
+        execute = db.session.execute
+        calls = []
+
+        def flaky_execute(*args, **kwargs):
+            calls.append(args)
+            if len(calls) == 1:
+                raise Exception('db down')
+            return execute(*args, **kwargs)
+
+        with app.app_context():
+            address = Address.query.first()
+            address_id = address.id
+            address.last_snow_status = 'planifie'
+            buffer = AlertLogBuffer(batch_size=10)
+            log_alert(address_id, 'montreal', 'snow_scheduled', 'planifie', alert_log=buffer)
+
+            with patch.object(db.session, 'execute', side_effect=flaky_execute):
+                assert buffer.flush() == 1
+
+            db.session.expire_all()
+            assert len(calls) == 2
+            assert AlertHistory.query.count() == 1
+            assert db.session.get(Address, address_id).last_snow_status == 'planifie'
+
+    def test_delivered_chunk_committed_before_run_ends(self, app, sample_address):
+        """Outcomes already delivered should be committed without waiting for the rest."""
+        class Delivery:
+            def completed(self):
+                return [(tag, {'success': True})]
+
+            def results(self):
+                raise AssertionError('should not wait')
+
+        with app.app_context():
+            address = Address.query.first()
+            tag = {'address_id': address.id, 'city': 'montreal', 'alert_type': 'snow_urgent',
+                   'status': 'x', 'reference_date': None}
+            results = {'alerts_sent': 0, 'errors': 0, 'by_city': {'montreal': 0, 'quebec': 0}}
+            buffer = AlertLogBuffer(batch_size=500)
+
+            _log_deliveries(Delivery(), results, 'alerts_sent', alert_log=buffer, wait=False)
+
+            assert results['alerts_sent'] == 1
+            assert buffer.pending == []
+            assert AlertHistory.query.count() == 1
+
+    def test_snow_run_fails_when_log_cannot_be_saved(self, app):
+        """A run whose alerts cannot be recorded should stop instead of returning."""
+        with app.app_context():
+            _add_montreal_addresses([111, 222], last_snow_status='enneige')
+
+            with patch('app.services.montreal.planif_neige.get_status_for_street',
+                       return_value={'etat': 'planifie'}), \
+                 patch('app.services.montreal.planif_neige.detect_status_change',
+                       return_value='snow_scheduled'), \
+                 patch('app.services.email.send_snow_scheduled_alert',
+                       return_value={'success': True}), \
+                 patch.object(AlertLogBuffer, 'flush', side_effect=AlertLogError('db down')):
+                with pytest.raises(AlertLogError):
+                    check_all_snow_statuses(city='montreal')
+
+    def test_waste_run_logs_every_reminder(self, app):
+        """A waste run should record one history row per reminder sent."""
+        with app.app_context():
+            addresses = _add_montreal_addresses([1, 2, 3])
+            for address in addresses:
+                address.waste_alerts = True
+                address.latitude, address.longitude = 45.52, -73.57
+            db.session.commit()
+
+            with patch('app.services.alerts._resolve_due_collections',
+                       return_value=[(address, ['garbage']) for address in addresses]), \
+                 patch('app.services.email.send_waste_reminder',
+                       return_value={'success': True}):
+                result = send_waste_reminders(city='montreal')
+
+            assert result['reminders_sent'] == 3
+            assert AlertHistory.query.filter_by(alert_type='waste_reminder').count() == 3
@@ -0,0 +1,285 @@
+"""
+Tests for email service (against a local fake Resend endpoint)
+"""
+
+import json
+import threading
+import time
+import pytest
+from unittest.mock import patch
+from flask import render_template
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from app.services import email as email_service
+from app.services.email import (
+    EmailDeliveryPool,
+    BatchEmailDelivery,
+    TokenBucket,
+    send_email,
+    send_batch_emails,
+    render_email,
+    clear_render_cache
+)
+
+
+class FakeResendHandler(BaseHTTPRequestHandler):
+    """
+    Minimal Resend API: 'flaky' recipients fail once, 'bounce' always fail.
+
+    Batches reject 'invalid' recipients individually and fail as a whole
+    if any recipient is 'batchfail'.
+    """
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length) or b'null')
+        server = self.server
+
+        with server.lock:
+            server.requests.append((self.path, payload))
+            server.idempotency_keys.append((self.path, self.headers.get('Idempotency-Key')))
+
+        if self.path == '/emails/batch':
+            return self._batch(payload)
+
+        with server.lock:
+            recipient = payload['to'][0] if isinstance(payload, dict) else ''
+            attempts = server.attempts.get(recipient, 0) + 1
+            server.attempts[recipient] = attempts
+
+        if 'bounce' in recipient or ('flaky' in recipient and attempts == 1):
+            self._respond(500, {'name': 'internal_server_error', 'message': 'try again'})
+        else:
+            self._respond(200, {'id': f'msg-{recipient}-{attempts}'})
+
+    def _batch(self, payload):
+        recipients = [params['to'][0] for params in payload]
+        if any('batchfail' in to for to in recipients):
+            return self._respond(500, {'name': 'internal_server_error', 'message': 'batch failed'})
+
+        data, errors = [], []
+        for index, to in enumerate(recipients):
+            if 'invalid' in to:
+                errors.append({'index': index, 'message': f'Invalid `to` field: {to}'})
+            else:
+                data.append({'id': f'batch-{to}'})
+
+        self._respond(200, {'data': data, 'errors': errors})
+
+    def _respond(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_resend(app, monkeypatch):
+    """Run a fake Resend server and point the app at it."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeResendHandler)
+    server.lock = threading.Lock()
+    server.requests = []
+    server.idempotency_keys = []
+    server.attempts = {}
+    thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+    thread.start()
+
+    app.config['RESEND_API_KEY'] = 're_test'
+    app.config['RESEND_API_URL'] = f'http://127.0.0.1:{server.server_address[1]}'
+    app.config['EMAIL_SEND_RATE'] = 1000
+    monkeypatch.setattr(email_service, 'RETRY_DELAY', 0)
+    monkeypatch.setattr(email_service, '_send_limiter', None)
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+
+
+class TestSendEmail:
+    """Tests for inline delivery."""
+
+    def test_send_success(self, app, fake_resend):
+        """Should return the provider message ID."""
+        with app.app_context():
+            result = send_email('a@example.com', 'Subject', '<p>Hi</p>')
+
+            assert result['success'] is True
+            assert result['message_id'] == 'msg-a@example.com-1'
+
+    def test_retries_then_succeeds(self, app, fake_resend):
+        """Should retry a failed send."""
+        with app.app_context():
+            result = send_email('flaky@example.com', 'Subject', '<p>Hi</p>')
+
+            assert result['success'] is True
+            assert fake_resend.attempts['flaky@example.com'] == 2
+
+    def test_gives_up_after_max_retries(self, app, fake_resend):
+        """Should report failure once retries are exhausted."""
+        with app.app_context():
+            result = send_email('bounce@example.com', 'Subject', '<p>Hi</p>')
+
+            assert result['success'] is False
+            assert fake_resend.attempts['bounce@example.com'] == email_service.MAX_RETRIES + 1
+
+
+class TestEmailDeliveryPool:
+    """Tests for concurrent delivery."""
+
+    def test_queued_messages_delivered(self, app, fake_resend):
+        """Should deliver every queued message and return its tag."""
+        with app.app_context():
+            with EmailDeliveryPool(max_workers=4) as delivery:
+                for i in range(20):
+                    queued = send_email(f'user{i}@example.com', 'Subject', '<p>Hi</p>',
+                                        delivery=delivery, tag=i)
+                    assert queued['queued'] is True
+
+                results = delivery.results()
+
+            assert sorted(tag for tag, _ in results) == list(range(20))
+            assert all(result['success'] for _, result in results)
+            assert len(fake_resend.requests) == 20
+
+    def test_failures_collected(self, app, fake_resend):
+        """Retries happen on the pool and final failures are reported."""
+        with app.app_context():
+            with EmailDeliveryPool(max_workers=2) as delivery:
+                send_email('flaky@example.com', 'S', '<p/>', delivery=delivery, tag='flaky')
+                send_email('bounce@example.com', 'S', '<p/>', delivery=delivery, tag='bounce')
+                results = dict(delivery.results())
+
+            assert results['flaky']['success'] is True
+            assert results['bounce']['success'] is False
+
+
+class TestBatchSend:
+    """Tests for provider batch delivery."""
+
+    def test_chunked_to_batch_size(self, app, fake_resend):
+        """Should send one batch request per BATCH_MAX_SIZE messages."""
+        with app.app_context():
+            emails = [{'to': f'user{i}@example.com', 'subject': 'S', 'html_content': '<p/>'}
+                      for i in range(250)]
+            result = send_batch_emails(emails)
+
+            batch_requests = [p for path, p in fake_resend.requests if path == '/emails/batch']
+            assert sorted(len(p) for p in batch_requests) == [50, 100, 100]
+            assert result['sent'] == 250
+            assert result['results'][0]['message_id'] == 'batch-user0@example.com'
+
+    def test_rejected_entries_retried_individually(self, app, fake_resend):
+        """Entries rejected by the batch should be retried one by one."""
+        with app.app_context():
+            with BatchEmailDelivery(max_workers=2) as delivery:
+                for to in ('a@example.com', 'invalid@example.com', 'b@example.com'):
+                    send_email(to, 'S', '<p/>', delivery=delivery, tag=to)
+                results = dict(delivery.results())
+
+            assert results['a@example.com']['message_id'] == 'batch-a@example.com'
+            assert results['b@example.com']['message_id'] == 'batch-b@example.com'
+            # Single-send endpoint accepts it
+            assert results['invalid@example.com']['message_id'] == 'msg-invalid@example.com-1'
+
+            # Retried under the key of the message in the batch
+            batch = [payload for path, payload in fake_resend.requests if path == '/emails/batch'][0]
+            single_keys = [key for path, key in fake_resend.idempotency_keys if path == '/emails']
+            assert single_keys == [email_service.message_key(batch[1])]
+
+    def test_failed_batch_retried_under_its_key(self, app, fake_resend):
+        """A failed batch request should be retried as a batch, never resent one by one."""
+        with app.app_context():
+            emails = [{'to': to, 'subject': 'S', 'html_content': '<p/>'}
+                      for to in ('batchfail@example.com', 'c@example.com')]
+            result = send_batch_emails(emails)
+
+            batch_keys = [key for path, key in fake_resend.idempotency_keys if path == '/emails/batch']
+            assert len(batch_keys) == email_service.MAX_RETRIES + 1
+            assert len(set(batch_keys)) == 1 and None not in batch_keys
+            assert not [path for path, _ in fake_resend.requests if path == '/emails']
+            assert result['sent'] == 0
+            assert result['failed'] == 2
+
+    def test_full_batch_sent_on_submit(self, app, fake_resend):
+        """A full batch should be sent without waiting for results()."""
+        with app.app_context():
+            with BatchEmailDelivery(max_workers=2) as delivery:
+                for i in range(email_service.BATCH_MAX_SIZE + 1):
+                    send_email(f'user{i}@example.com', 'S', '<p/>', delivery=delivery, tag=i)
+
+                deadline = time.monotonic() + 5
+                completed = []
+                while not completed and time.monotonic() < deadline:
+                    completed = delivery.completed()
+                    time.sleep(0.01)
+                results = delivery.results()
+
+            assert [tag for tag, _ in completed] == list(range(email_service.BATCH_MAX_SIZE))
+            assert [tag for tag, _ in results] == [email_service.BATCH_MAX_SIZE]
+
+    def test_message_key_is_deterministic(self):
+        """The same message should always get the same key."""
+        params = {'from': 'a@x', 'to': ['b@x'], 'subject': 'S', 'html': '<p/>'}
+
+        assert email_service.message_key(params) == email_service.message_key(dict(params))
+        assert email_service.message_key(params) != email_service.message_key({**params, 'to': ['c@x']})
+
+
+class TestTokenBucket:
+    """Tests for the send rate limiter."""
+
+    def test_burst_then_rate_limited(self):
+        """Should allow the burst capacity, then pace requests at the rate."""
+        bucket = TokenBucket(rate=20, capacity=2)
+
+        start = time.monotonic()
+        bucket.acquire()
+        bucket.acquire()
+        burst = time.monotonic() - start
+
+        bucket.acquire()
+        paced = time.monotonic() - start
+
+        assert burst < 0.02
+        assert paced >= 0.045
+
+
+class TestRenderEmail:
+    """Tests for render-once email bodies."""
+
+    def _render_both(self, address, unsubscribe_url):
+        context = dict(city='montreal', city_display='Montreal', language='fr',
+                       status={'scheduled_start': '2026-01-10T02:00:00'})
+        cached = render_email('email/snow_scheduled.html',
+                              {'address': address, 'unsubscribe_url': unsubscribe_url},
+                              **context)
+        direct = render_template('email/snow_scheduled.html', address=address,
+                                 unsubscribe_url=unsubscribe_url, **context)
+        return cached, direct
+
+    def test_matches_full_render(self, app):
+        """Substituted body should equal a from-scratch render, escaping included."""
+        with app.test_request_context():
+            clear_render_cache()
+            for address in ('1234 Rue Saint-Denis', "12 Côte-Sainte-Catherine <O'Neil & Fils>"):
+                cached, direct = self._render_both(address, f'https://x/unsubscribe/{address[:2]}')
+                assert cached == direct
+
+    def test_shared_body_rendered_once(self, app):
+        """Recipients with the same payload should share one template render."""
+        with app.test_request_context():
+            clear_render_cache()
+            with patch('app.services.email.render_template',
+                       wraps=render_template) as mock_render:
+                for i in range(5):
+                    render_email('email/snow_urgent.html',
+                                 {'address': f'{i} Rue Test', 'unsubscribe_url': f'u{i}'},
+                                 city='montreal', city_display='Montreal',
+                                 status={}, language='en')
+
+            assert mock_render.call_count == 1
@@ -2,13 +2,92 @@
 Tests for Geobase service
 """
 
+import json
+from datetime import datetime
 import pytest
-from app.services.geobase import (
+from unittest.mock import patch, MagicMock
+from sqlalchemy import event
+from app import db
+from app.models import Address, GeobaseCache, DatasetVersion
+from app.services.montreal import geobase
+from app.services.montreal.geobase import (
     normalize_street_name,
     parse_address,
+    parse_addresses,
     lookup_address,
-    search_addresses
+    resolve_addresses,
+    revalidate_addresses,
+    search_addresses,
+    find_streets,
+    find_segment,
+    rebuild_street_index,
+    clear_street_index,
+    iter_geobase_rows,
+    refresh_cache,
+    rollback_cache,
+    lookup_by_coordinates
 )
+from app.services.dispatcher import lookup_cote_rue_id_from_coords
+
+GEOBASE_CSV = (
+    'COTE_RUE_ID,NOM_VOIE,TYPE_F,DEBUT_ADRESSE,FIN_ADRESSE,COTE,NOM_VILLE\n'
+    '1,Rachel,Rue,1,99,Droit,Montréal\n'
+    '2,Rachel,Rue,2,98,Gauche,Montréal\n'
+    'bad,Rachel,Rue,1,99,Droit,Montréal\n'
+    '3,Saint-Denis,Rue,1201,1299,Droit,Montréal\n'
+    '4,Saint-Denis,Rue,1200,1298,Gauche,Montréal\n'
+    '5,Mont-Royal,Avenue,,,Droit,Montréal\n'
+).encode('utf-8')
+
+
+def _streamed(body, status_code=200, headers=None):
+    """Mock streamed response for body."""
+    response = MagicMock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    response.iter_content.side_effect = lambda chunk_size=None: (
+        body[i:i + 16] for i in range(0, len(body), 16)
+    )
+    context = MagicMock()
+    context.__enter__.return_value = response
+    return context
+
+
+GEOJSON_URL = 'https://donnees.montreal.ca/dataset/geobase-double/resource/geojson'
+
+
+def _mock_download(body, status_code=200, headers=None, geojson=None):
+    """Patch requests.get with streamed responses: body for the CSV, geojson for the side lines."""
+    geojson_body = json.dumps(geojson or {'type': 'FeatureCollection', 'features': []}).encode('utf-8')
+    csv_response = _streamed(body, status_code, headers)
+    package = MagicMock()
+    package.json.return_value = {'result': {'resources': [
+        {'format': 'CSV', 'url': 'https://donnees.montreal.ca/dataset/geobase-double/resource/csv'},
+        {'format': 'GeoJSON', 'url': GEOJSON_URL}
+    ]}}
+
+    def get(url, **kwargs):
+        if url == geobase.GEOBASE_PACKAGE_URL:
+            return package
+        if url == GEOJSON_URL:
+            return _streamed(geojson_body)
+        return csv_response
+
+    mock_get = MagicMock(side_effect=get)
+    mock_get.return_value.__enter__.return_value = csv_response.__enter__.return_value
+    return patch.object(geobase.requests, 'get', mock_get)
+
+
+@pytest.fixture(autouse=True)
+def reset_street_index():
+    """Each test app has its own database, so drop the in-memory index."""
+    clear_street_index()
+    geobase.clear_spatial_index()
+    geobase.clear_autocomplete_index()
+    yield
+    clear_street_index()
+    geobase.clear_spatial_index()
+    geobase.clear_autocomplete_index()
 
 
 class TestNormalizeStreetName:
@@ -33,6 +112,11 @@ class TestNormalizeStreetName:
         result = normalize_street_name('Rue Saint-Denis')
         assert result == 'saint-denis'
 
+    def test_abbreviation_needs_separator(self):
+        """Should not expand abbreviations at the start of a longer word."""
+        assert normalize_street_name('Stanley') == 'stanley'
+        assert normalize_street_name('Mt Royal') == 'mont royal'
+
 
 class TestParseAddress:
     """Tests for address parsing."""
@@ -60,6 +144,80 @@ class TestParseAddress:
         assert result['street_name'] == 'Saint-Denis'
 
 
+class TestBulkAddresses:
+    """Tests for bulk parsing and resolution."""
+
+    def test_parse_addresses_matches_single(self):
+        """Bulk parsing should give the same result as parse_address."""
+        addresses = ['1234 Rue Saint-Denis', 'av. Mont-Royal 100', 'Saint-Denis', '55, boul St-Laurent']
+        assert list(parse_addresses(addresses)) == [parse_address(a) for a in addresses]
+
+    def test_street_type_variation_is_literal(self):
+        """A dotted abbreviation should not match arbitrary characters."""
+        assert parse_address('10 rx Foo')['street_type'] is None
+        assert parse_address('10 R. Foo')['street_type'] == 'Rue'
+
+    def test_resolve_in_order(self, app, sample_geobase_entries):
+        """Results should line up with the inputs, with None for misses."""
+        with app.app_context():
+            addresses = ['1234 Rue Saint-Denis', '99999 Nonexistent Street', '200 avenue Mont-Royal']
+            results = list(resolve_addresses(addresses, batch_size=2))
+
+            assert results[0] == lookup_address(addresses[0])
+            assert results[1] is None
+            assert results[2]['cote_rue_id'] == 14000001
+
+    def test_one_segment_query_per_batch(self, app, sample_geobase_entries):
+        """Matched segments should be loaded with one query per batch."""
+        with app.app_context():
+            lookup_address('1234 Rue Saint-Denis')  # build the street index
+            statements = []
+            listener = lambda conn, cursor, statement, *args: statements.append(statement)
+            event.listen(db.engine, 'before_cursor_execute', listener)
+            try:
+                results = list(resolve_addresses([f'{n} rue Saint-Denis' for n in range(1200, 1300, 2)]))
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', listener)
+
+            assert len(results) == 50 and all(results)
+            assert len([s for s in statements if 'geobase_cache' in s]) == 1
+
+    def test_revalidate_updates_changed_sides(self, app, sample_subscriber, sample_geobase_entries):
+        """Stored addresses should pick up their current segment side."""
+        with app.app_context():
+            stale = Address(subscriber_id=sample_subscriber.id, city='montreal', civic_number=1234,
+                            street_type='Rue', street_name='Saint-Denis', cote_rue_id=1, cote='Droit',
+                            last_snow_status='enneige', last_snow_check=datetime(2026, 1, 5))
+            current = Address(subscriber_id=sample_subscriber.id, city='montreal', civic_number=300,
+                              street_type='Avenue', street_name='Mont-Royal',
+                              cote_rue_id=14000001, cote='Gauche', last_snow_status='deneige')
+            db.session.add_all([stale, current])
+            db.session.commit()
+
+            result = revalidate_addresses()
+
+            assert result == {'success': True, 'checked': 2, 'updated': 2, 'unresolved': 0}
+            stale, current = db.session.get(Address, stale.id), db.session.get(Address, current.id)
+            assert stale.cote_rue_id in (13811012, 13811013)
+            assert stale.last_snow_status is None and stale.last_snow_check is None
+            # Same segment, only the side label changed
+            assert current.cote == 'Droit' and current.last_snow_status == 'deneige'
+
+    def test_revalidate_ignores_broad_matches(self, app, sample_subscriber, sample_geobase_entries):
+        """Addresses only matched by the broad street search should be left for review."""
+        with app.app_context():
+            address = Address(subscriber_id=sample_subscriber.id, city='montreal', civic_number=1250,
+                              street_type='Rue', street_name='Saint-Dominique', cote_rue_id=7, cote='Droit')
+            db.session.add(address)
+            db.session.commit()
+            assert lookup_address('1250 Rue Saint-Dominique') is not None
+
+            result = revalidate_addresses()
+
+            assert result['unresolved'] == 1
+            assert db.session.get(Address, address.id).cote_rue_id == 7
+
+
 class TestLookupAddress:
     """Tests for address lookup."""
 
@@ -109,3 +267,489 @@ class TestSearchAddresses:
         with app.app_context():
             results = search_addresses('saint', limit=2)
             assert len(results) <= 2
+
+    def test_normalized_name_stored(self, app, sample_geobase_entries):
+        """Rows should carry the street name as normalized for lookups."""
+        with app.app_context():
+            entry = GeobaseCache.query.filter_by(cote_rue_id=14000001).one()
+            assert entry.nom_voie_norm == 'mont royal'
+
+    def test_search_uses_normalized_name(self, app):
+        """Accents, hyphens and abbreviations should match on both sides."""
+        with app.app_context():
+            db.session.add(GeobaseCache(cote_rue_id=1, nom_voie='Côte-des-Neiges', cote='Droit'))
+            db.session.add(GeobaseCache(cote_rue_id=2, nom_voie='Sainte-Catherine', cote='Droit'))
+            db.session.commit()
+
+            assert search_addresses('cote des')[0]['cote_rue_id'] == 1
+            assert search_addresses('ste-catherine')[0]['cote_rue_id'] == 2
+
+    def test_search_prefix_before_word_match(self, app, sample_geobase_entries):
+        """Streets starting with the term should rank before later-word matches."""
+        with app.app_context():
+            db.session.add(GeobaseCache(cote_rue_id=1, nom_voie='Denis-Papin', cote='Droit'))
+            db.session.commit()
+
+            results = search_addresses('denis')
+
+            assert [r['street_name'] for r in results] == ['Denis-Papin', 'Saint-Denis']
+
+    def test_popular_streets_first(self, app, sample_subscriber):
+        """Among equal matches, streets with more subscribers should rank first."""
+        with app.app_context():
+            for i, name in enumerate(['Saint-Andre', 'Saint-Zotique', 'Saint-Urbain']):
+                db.session.add(GeobaseCache(cote_rue_id=i + 1, nom_voie=name, cote='Droit'))
+            for _ in range(2):
+                db.session.add(Address(subscriber_id=sample_subscriber.id, city='montreal',
+                                       street_name='Saint-Zotique'))
+            db.session.add(Address(subscriber_id=sample_subscriber.id, city='montreal',
+                                   street_name='St-Urbain'))
+            db.session.commit()
+
+            results = search_addresses('saint')
+
+            assert [r['street_name'] for r in results] == ['Saint-Zotique', 'Saint-Urbain', 'Saint-Andre']
+            assert results[0]['subscribers'] == 2
+
+    def test_typo_tolerance(self, app, sample_geobase_entries):
+        """A term one edit away from a street should still complete it."""
+        with app.app_context():
+            assert search_addresses('mnot-roy')[0]['street_name'] == 'Mont-Royal'
+            assert search_addresses('xyzzy') == []
+
+    def test_distinct_street_type_borough(self, app, sample_geobase_entries):
+        """Both sides of a street should yield a single completion per borough."""
+        with app.app_context():
+            db.session.add(GeobaseCache(cote_rue_id=1, nom_voie='Saint-Denis', type_voie='Rue',
+                                        cote='Droit', nom_ville='Longueuil'))
+            db.session.commit()
+
+            results = search_addresses('saint-denis')
+
+            assert sorted(r['borough'] for r in results) == ['Longueuil', 'Montréal']
+
+    def test_hot_prefixes_cached(self, app, sample_geobase_entries):
+        """Repeated prefixes should be answered from the LRU cache."""
+        with app.app_context():
+            search_addresses('mont')
+            with patch.object(geobase, '_rank_completions') as mock_rank:
+                results = search_addresses('Mont')
+
+            mock_rank.assert_not_called()
+            assert results[0]['street_name'] == 'Mont-Royal'
+
+
+class TestStreetIndex:
+    """Tests for the in-memory street-name index."""
+
+    def test_word_start_matches(self, app, sample_geobase_entries):
+        """Should match a street by its first or a later word."""
+        with app.app_context():
+            assert find_streets('Saint-Denis') == ['saint denis']
+            assert find_streets('denis') == ['saint denis']
+            assert find_streets('royal') == ['mont royal']
+
+    def test_exact_match_ranked_first(self, app, sample_geobase_entries):
+        """An exact street name should outrank longer streets sharing the prefix."""
+        with app.app_context():
+            db.session.add(GeobaseCache(cote_rue_id=1, nom_voie='Saint-Denis-Garneau',
+                                        debut_adresse=1, fin_adresse=99))
+            db.session.commit()
+            rebuild_street_index()
+
+            assert find_streets('saint denis') == ['saint denis', 'saint denis garneau']
+
+    def test_lookup_does_not_scan_by_name(self, app, sample_geobase_entries):
+        """Lookups should fetch candidate rows by ID, not with ILIKE."""
+        with app.app_context():
+            rebuild_street_index()
+            statements = []
+            listener = lambda conn, cursor, statement, *args: statements.append(statement)
+            event.listen(db.engine, 'before_cursor_execute', listener)
+            try:
+                result = lookup_address('120 avenue Mont-Royal')
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', listener)
+
+            assert result['cote_rue_id'] == 14000001
+            assert not any('LIKE' in statement.upper() for statement in statements)
+
+    def test_rebuilt_when_table_changes(self, app, sample_geobase_entries):
+        """The index should pick up rows added after it was built."""
+        with app.app_context():
+            assert find_streets('rachel') == []
+
+            db.session.add(GeobaseCache(cote_rue_id=2, nom_voie='Rachel',
+                                        debut_adresse=1, fin_adresse=99))
+            db.session.commit()
+            geobase._street_index['checked_at'] = None
+
+            assert find_streets('rachel') == ['rachel']
+
+
+class TestCivicNumberIntervals:
+    """Tests for per-street civic number interval matching."""
+
+    def _add_segments(self, segments):
+        for cote_rue_id, debut, fin, cote in segments:
+            db.session.add(GeobaseCache(cote_rue_id=cote_rue_id, nom_voie='Rachel', type_voie='Rue',
+                                        debut_adresse=debut, fin_adresse=fin, cote=cote))
+        db.session.commit()
+        rebuild_street_index()
+
+    def test_parity_selects_side(self, app):
+        """Odd and even numbers should resolve to opposite sides of the street."""
+        with app.app_context():
+            self._add_segments([(1, 1, 99, 'Droit'), (2, 2, 98, 'Gauche'),
+                                (3, 101, 199, 'Droit'), (4, 100, 198, 'Gauche')])
+
+            assert lookup_address('55 rue Rachel')['cote'] == 'Droit'
+            assert lookup_address('56 rue Rachel')['cote'] == 'Gauche'
+            assert lookup_address('150 rue Rachel')['cote_rue_id'] == 4
+            assert lookup_address('151 rue Rachel')['cote_rue_id'] == 3
+
+    def test_narrowest_overlapping_range_wins(self, app):
+        """Overlapping segments should resolve deterministically to the tightest range."""
+        with app.app_context():
+            self._add_segments([(1, 1, 999, 'Droit'), (2, 201, 299, 'Droit'), (3, 1, 199, 'Droit')])
+
+            assert lookup_address('251 rue Rachel')['cote_rue_id'] == 2
+            assert lookup_address('151 rue Rachel')['cote_rue_id'] == 3
+            assert lookup_address('551 rue Rachel')['cote_rue_id'] == 1
+
+    def test_exact_parity_preferred_over_mixed_range(self, app):
+        """A side matching the parity should beat a range holding both parities."""
+        with app.app_context():
+            self._add_segments([(1, 1, 100, 'Droit'), (2, 2, 100, 'Gauche')])
+
+            assert find_segment('rachel', 50) == GeobaseCache.query.filter_by(cote_rue_id=2).one().id
+            assert lookup_address('51 rue Rachel')['cote_rue_id'] == 1
+
+    def test_number_outside_all_ranges(self, app):
+        """Numbers beyond every segment should not match."""
+        with app.app_context():
+            self._add_segments([(1, 1, 99, 'Droit')])
+
+            assert find_segment('rachel', 101) is None
+            assert find_segment('rachel', 2) is None
+
+
+class TestStreamingRefresh:
+    """Tests for streamed Geobase ingestion."""
+
+    def test_refresh_replaces_cache(self, app, sample_geobase_entries):
+        """Should replace every cached row with the downloaded dataset."""
+        with app.app_context():
+            with _mock_download(GEOBASE_CSV):
+                result = refresh_cache()
+
+            assert result['success'] is True
+            assert result['entries'] == 5
+            assert result['bytes'] == len(GEOBASE_CSV)
+            assert set(result['stages']) == {'download', 'load', 'swap', 'index'}
+            assert GeobaseCache.query.count() == 5
+            assert lookup_address('1250 rue Saint-Denis')['cote_rue_id'] == 4
+
+    def test_inserts_in_batches(self, app):
+        """Rows should be inserted batch by batch, not all at once."""
+        with app.app_context():
+            with _mock_download(GEOBASE_CSV), \
+                 patch.object(geobase, 'INSERT_BATCH_SIZE', 2), \
+                 patch.object(geobase.db.session, 'execute', wraps=geobase.db.session.execute) as mock_execute:
+                refresh_cache()
+
+            batch_sizes = [len(call.args[1]) for call in mock_execute.call_args_list if len(call.args) > 1]
+            assert batch_sizes == [2, 2, 1]
+
+    def test_rows_parsed_lazily(self, tmp_path):
+        """Parsing should be a generator that skips invalid rows."""
+        path = tmp_path / 'geobase.csv'
+        path.write_bytes(GEOBASE_CSV)
+
+        rows = iter_geobase_rows(str(path))
+        assert next(rows)['cote_rue_id'] == 1
+        assert [row['cote_rue_id'] for row in rows] == [2, 3, 4, 5]
+
+    def test_copy_keeps_empty_strings(self, app):
+        """COPY input should keep empty strings apart from NULLs."""
+        row = {column: None for column in geobase.GEOBASE_COLUMNS}
+        row.update(cote_rue_id=7, nom_voie='', type_voie='', cote='', geometry=b'\x01')
+        copied = {}
+
+        def copy_expert(sql, buffer):
+            copied['sql'], copied['data'] = sql, buffer.read()
+
+        cursor = MagicMock()
+        cursor.copy_expert.side_effect = copy_expert
+        with app.app_context(), \
+             patch.object(geobase.db.session, 'connection') as mock_connection:
+            mock_connection.return_value.connection.cursor.return_value = cursor
+            geobase._copy_rows([row], 'geobase_cache')
+
+        fields = dict(zip(geobase.GEOBASE_COLUMNS, copied['data'].rstrip('\r\n').split(',')))
+        assert "NULL '\\N'" in copied['sql']
+        assert fields['nom_voie'] == fields['cote'] == ''
+        assert fields['debut_adresse'] == fields['row_hash'] == '\\N'
+        assert fields['geometry'] == '\\x01'
+
+    def test_failed_load_keeps_previous_rows(self, app, sample_geobase_entries):
+        """A load error should roll back and remove the temp file."""
+        with app.app_context():
+            with _mock_download(GEOBASE_CSV), \
+                 patch.object(geobase, 'load_geobase_rows', side_effect=RuntimeError('boom')), \
+                 patch.object(geobase.os, 'remove', wraps=geobase.os.remove) as mock_remove:
+                result = refresh_cache()
+
+            assert result['success'] is False
+            assert GeobaseCache.query.count() == 3
+            assert mock_remove.call_count == 2  # GeoJSON and CSV temp files
+
+
+class TestGenerationSwap:
+    """Tests for shadow-table Geobase refreshes."""
+
+    def test_consecutive_refreshes(self, app, sample_geobase_entries):
+        """Repeated swaps should not collide on table or index names."""
+        with app.app_context():
+            for _ in range(3):
+                with _mock_download(GEOBASE_CSV):
+                    assert refresh_cache()['success'] is True
+
+            assert GeobaseCache.query.count() == 5
+            assert geobase._table_exists(geobase.GEOBASE_PREVIOUS_TABLE)
+            assert not geobase._table_exists(geobase.GEOBASE_STAGING_TABLE)
+
+    def test_shrunken_dataset_rejected(self, app, sample_geobase_entries):
+        """A generation much smaller than the live one should not be swapped in."""
+        with app.app_context():
+            with _mock_download(GEOBASE_CSV):
+                refresh_cache()
+
+            truncated = b'\n'.join(GEOBASE_CSV.split(b'\n')[:3]) + b'\n'
+            with _mock_download(truncated):
+                result = refresh_cache()
+
+            assert result['success'] is False
+            assert result['previous_entries'] == 5
+            assert GeobaseCache.query.count() == 5
+            assert not geobase._table_exists(geobase.GEOBASE_STAGING_TABLE)
+
+    def test_rollback_restores_previous_generation(self, app, sample_geobase_entries):
+        """Rollback should swap the previous generation back in, and be reversible."""
+        with app.app_context():
+            with _mock_download(GEOBASE_CSV):
+                refresh_cache()
+
+            assert rollback_cache()['entries'] == 3
+            assert lookup_address('1234 Rue Saint-Denis')['cote_rue_id'] == 13811012
+
+            assert rollback_cache()['entries'] == 5
+            assert lookup_address('1250 rue Saint-Denis')['cote_rue_id'] == 4
+
+    def test_rollback_without_previous(self, app, sample_geobase_entries):
+        """Rollback should fail cleanly before the first swap."""
+        with app.app_context():
+            assert rollback_cache()['success'] is False
+            assert GeobaseCache.query.count() == 3
+
+
+def _geobase_csv(rows):
+    """Build a Geobase CSV body from (cote_rue_id, nom_voie, debut, fin) tuples."""
+    lines = ['COTE_RUE_ID,NOM_VOIE,TYPE_F,DEBUT_ADRESSE,FIN_ADRESSE,COTE,NOM_VILLE']
+    lines += [f'{i},{name},Rue,{debut},{fin},Droit,Montréal' for i, name, debut, fin in rows]
+    return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+class TestIncrementalRefresh:
+    """Tests for conditional downloads and row diffing."""
+
+    BASE_ROWS = [(i, f'Street-{i}', 1, 99) for i in range(1, 21)]
+
+    def test_not_modified_is_noop(self, app):
+        """A 304 should skip parsing and send back the stored validators."""
+        with app.app_context():
+            with _mock_download(_geobase_csv(self.BASE_ROWS), headers={'ETag': '"v1"'}):
+                refresh_cache()
+
+            with _mock_download(b'', status_code=304) as mock_get:
+                result = refresh_cache()
+
+            assert mock_get.call_args.kwargs['headers'] == {'If-None-Match': '"v1"'}
+            assert result['mode'] == 'unchanged'
+            assert result['entries'] == 20
+            assert DatasetVersion.query.one().etag == '"v1"'
+
+    def test_identical_file_is_noop(self, app):
+        """Without validators, an identical file should be detected by its hash."""
+        with app.app_context():
+            body = _geobase_csv(self.BASE_ROWS)
+            with _mock_download(body):
+                refresh_cache()
+            with _mock_download(body):
+                result = refresh_cache()
+
+            assert result['mode'] == 'unchanged'
+
+    def test_small_change_applied_as_diff(self, app):
+        """Only inserted, updated and deleted segments should be written."""
+        with app.app_context():
+            with _mock_download(_geobase_csv(self.BASE_ROWS)):
+                assert refresh_cache()['mode'] == 'swap'
+            ids = {row.cote_rue_id: row.id for row in GeobaseCache.query.all()}
+
+            rows = [row for row in self.BASE_ROWS if row[0] != 20]
+            rows[0] = (1, 'Renamed', 1, 99)
+            rows.append((21, 'Street-21', 1, 99))
+            with _mock_download(_geobase_csv(rows)):
+                result = refresh_cache()
+
+            assert result['mode'] == 'diff'
+            assert result['changes'] == {'inserted': 1, 'updated': 1, 'deleted': 1}
+            assert GeobaseCache.query.count() == 20
+            assert GeobaseCache.query.filter_by(cote_rue_id=2).one().id == ids[2]
+            assert lookup_address('51 rue Renamed')['cote_rue_id'] == 1
+            assert GeobaseCache.query.filter_by(cote_rue_id=20).count() == 0
+
+    def test_large_change_swaps_tables(self, app):
+        """Changes above GEOBASE_DIFF_MAX_RATIO should load a new generation."""
+        with app.app_context():
+            with _mock_download(_geobase_csv(self.BASE_ROWS)):
+                refresh_cache()
+
+            rows = [(i, f'Avenue-{i}', 1, 99) for i, _, _, _ in self.BASE_ROWS]
+            with _mock_download(_geobase_csv(rows)):
+                result = refresh_cache()
+
+            assert result['mode'] == 'swap'
+            assert lookup_address('51 rue Avenue-7')['cote_rue_id'] == 7
+            assert GeobaseCache.query.filter_by(cote_rue_id=7).one().nom_voie_norm == 'avenue 7'
+
+
+# Sherbrooke runs west to east; Papineau runs south to north, 1km further east
+GEOMETRY_CSV = (
+    'COTE_RUE_ID,NOM_VOIE,TYPE_F,DEBUT_ADRESSE,FIN_ADRESSE,COTE,NOM_VILLE\n'
+    '1,Sherbrooke,Rue,1,99,Droit,Montréal\n'
+    '2,Sherbrooke,Rue,2,98,Gauche,Montréal\n'
+    '3,Papineau,Avenue,1,99,Droit,Montréal\n'
+    '4,Papineau,Avenue,2,98,Gauche,Montréal\n'
+    '5,Sans-Geometrie,Rue,1,99,Droit,Montréal\n'
+).encode('utf-8')
+
+
+def _side_lines(lines):
+    """GeoJSON FeatureCollection of side lines from {cote_rue_id: coordinates}."""
+    return {'type': 'FeatureCollection', 'features': [
+        {'type': 'Feature', 'properties': {'COTE_RUE_ID': cote_rue_id},
+         'geometry': {'type': 'LineString', 'coordinates': coordinates}}
+        for cote_rue_id, coordinates in lines.items()
+    ]}
+
+
+SHERBROOKE = [[-73.600, 45.500], [-73.590, 45.500]]
+PAPINEAU = [[-73.580, 45.495], [-73.580, 45.505]]
+GEOMETRY_GEOJSON = _side_lines({1: SHERBROOKE, 2: SHERBROOKE, 3: PAPINEAU, 4: PAPINEAU})
+
+
+class TestCoordinateLookup:
+    """Tests for nearest-segment lookups over the STR-tree."""
+
+    @pytest.fixture
+    def geometry_cache(self, app):
+        """Load GEOMETRY_CSV through a normal refresh."""
+        with app.app_context():
+            with _mock_download(GEOMETRY_CSV, geojson=GEOMETRY_GEOJSON):
+                refresh_cache()
+            yield
+
+    def test_geometry_stored_compactly(self, app, geometry_cache):
+        """Side lines should be stored as packed float64 coordinate pairs."""
+        with app.app_context():
+            entry = GeobaseCache.query.filter_by(cote_rue_id=1).one()
+            assert len(entry.geometry) == 2 * 2 * 8
+            assert geobase.decode_geometry(entry.geometry)[1].tolist() == [-73.59, 45.5]
+            assert GeobaseCache.query.filter_by(cote_rue_id=5).one().geometry is None
+
+    def test_geometry_joined_from_geojson(self, app):
+        """Side lines should come from the GeoJSON resource, matched on COTE_RUE_ID."""
+        with app.app_context():
+            with _mock_download(GEOMETRY_CSV, geojson=GEOMETRY_GEOJSON):
+                result = refresh_cache()
+
+            assert result['geometry_entries'] == 4
+
+    def test_missing_geometry_logged(self, app, caplog):
+        """A generation without any side line should be reported as an error."""
+        with app.app_context():
+            with _mock_download(GEOMETRY_CSV):
+                result = refresh_cache()
+
+            assert result['geometry_entries'] == 0
+            assert 'no segment geometry' in caplog.text
+
+    def test_geometry_download_failure_keeps_side_lines(self, app, geometry_cache):
+        """A CSV refresh without the GeoJSON should keep the stored side lines."""
+        changed = GEOMETRY_CSV + '6,Nouvelle,Rue,1,99,Droit,Montréal\n'.encode('utf-8')
+
+        with app.app_context():
+            with _mock_download(changed), \
+                 patch.object(geobase, 'download_geobase_geometries', side_effect=RuntimeError('down')):
+                result = refresh_cache()
+
+            assert result['success'] is True
+            assert result['geometry_source'] == 'stored'
+            assert result['geometry_entries'] == 4
+            assert GeobaseCache.query.count() == 6
+            assert lookup_by_coordinates(45.4998, -73.595)['cote_rue_id'] == 1
+
+    def test_geojson_resource_from_dataset_metadata(self, app):
+        """The GeoJSON URL should come from the dataset's CKAN resources unless configured."""
+        with app.app_context():
+            with _mock_download(GEOMETRY_CSV):
+                assert geobase.geobase_geojson_url() == GEOJSON_URL
+
+            app.config['GEOBASE_GEOJSON_URL'] = 'https://example.com/side-lines.geojson'
+            assert geobase.geobase_geojson_url() == 'https://example.com/side-lines.geojson'
+
+    def test_nearest_street(self, app, geometry_cache):
+        """A point should snap to the closest street."""
+        with app.app_context():
+            result = lookup_by_coordinates(45.5002, -73.581)
+
+            assert result['street_name'] == 'Papineau'
+            assert 75 < result['distance_meters'] < 80
+
+    def test_side_of_street(self, app, geometry_cache):
+        """Points on either side of a shared line should get that side's segment."""
+        with app.app_context():
+            south = lookup_by_coordinates(45.4998, -73.595)
+            north = lookup_by_coordinates(45.5002, -73.595)
+            west = lookup_by_coordinates(45.5010, -73.5802)
+
+            assert (south['cote_rue_id'], south['cote']) == (1, 'Droit')
+            assert (north['cote_rue_id'], north['cote']) == (2, 'Gauche')
+            assert west['cote'] == 'Gauche'
+            assert 20 < north['distance_meters'] < 25
+
+    def test_far_point_returns_none(self, app, geometry_cache):
+        """Points further than MAX_SNAP_METERS from any line should not match."""
+        with app.app_context():
+            assert lookup_by_coordinates(45.52, -73.595) is None
+            assert lookup_by_coordinates(46.81, -71.22) is None
+
+    def test_dispatcher_uses_geobase(self, app, geometry_cache):
+        """The dispatcher should resolve coordinates to a cote_rue_id."""
+        with app.app_context():
+            assert lookup_cote_rue_id_from_coords(45.4998, -73.595) == 1
+
+    def test_index_follows_refresh(self, app, geometry_cache):
+        """A new generation should be picked up by the spatial index."""
+        with app.app_context():
+            assert lookup_by_coordinates(45.4998, -73.595)['cote_rue_id'] == 1
+
+            body = GEOMETRY_CSV.replace(b'1,Sherbrooke', b'11,Sherbrooke')
+            geojson = _side_lines({11: SHERBROOKE, 2: SHERBROOKE, 3: PAPINEAU, 4: PAPINEAU})
+            with _mock_download(body, geojson=geojson):
+                refresh_cache()
+            geobase._spatial_index['checked_at'] = None
+
+            assert lookup_by_coordinates(45.4998, -73.595)['cote_rue_id'] == 11
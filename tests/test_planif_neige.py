@@ -0,0 +1,95 @@
+"""
+Tests for Planif-Neige service
+"""
+
+import pytest
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock
+from app import db
+from app.models import SnowStatusCache
+from app.services.montreal import planif_neige
+from app.services.montreal.planif_neige import get_status_for_street, refresh_snapshot
+
+
+@pytest.fixture
+def reset_snapshot():
+    """Clear the module-level snapshot and rate limiter between tests."""
+    planif_neige._last_api_call = None
+    planif_neige._snapshot['statuses'] = None
+    planif_neige._snapshot['fetched_at'] = None
+    yield
+    planif_neige._last_api_call = None
+    planif_neige._snapshot['statuses'] = None
+    planif_neige._snapshot['fetched_at'] = None
+
+
+@pytest.fixture
+def mock_soap_client():
+    """SOAP client returning a small citywide planification response."""
+    client = MagicMock()
+    client.service.GetPlanificationsForDate.return_value = [
+        SimpleNamespace(COTE_RUE_ID=111, ETAT='planifie', DATE_DEBUT=datetime(2026, 1, 10, 2), DATE_FIN=None),
+        SimpleNamespace(COTE_RUE_ID=222, ETAT='en_cours', DATE_DEBUT=None, DATE_FIN=None),
+        SimpleNamespace(COTE_RUE_ID=333, ETAT='deneige', DATE_DEBUT=None, DATE_FIN=None),
+    ]
+    with patch.object(planif_neige, 'get_soap_client', return_value=client):
+        yield client
+
+
+class TestSnapshotIngestion:
+    """Tests for whole-city snapshot ingestion."""
+
+    def test_refresh_parses_all_segments(self, app, reset_snapshot, mock_soap_client):
+        """Should key every response row by cote_rue_id."""
+        with app.app_context():
+            statuses = refresh_snapshot()
+
+            assert set(statuses) == {111, 222, 333}
+            assert statuses[222]['etat'] == 'en_cours'
+
+    def test_refresh_persists_all_segments(self, app, reset_snapshot, mock_soap_client):
+        """Should write every segment to the status cache."""
+        with app.app_context():
+            refresh_snapshot()
+
+            assert SnowStatusCache.query.count() == 3
+
+    def test_one_api_call_serves_all_streets(self, app, reset_snapshot, mock_soap_client):
+        """Every segment in the cycle should be answered from one API call."""
+        with app.app_context():
+            assert get_status_for_street(111)['etat'] == 'planifie'
+            assert get_status_for_street(222)['etat'] == 'en_cours'
+            assert get_status_for_street(333)['etat'] == 'deneige'
+
+            assert mock_soap_client.service.GetPlanificationsForDate.call_count == 1
+
+    def test_segment_missing_from_snapshot(self, app, reset_snapshot, mock_soap_client):
+        """Segments without a planification should be reported as unknown."""
+        with app.app_context():
+            get_status_for_street(111)
+            result = get_status_for_street(999)
+
+            assert result['etat'] == 'unknown'
+            assert mock_soap_client.service.GetPlanificationsForDate.call_count == 1
+
+    def test_refresh_updates_only_snapshot_segments(self, app, reset_snapshot, mock_soap_client):
+        """Cached segments should be updated in place and others left alone."""
+        with app.app_context():
+            db.session.add_all([SnowStatusCache(cote_rue_id=111, etat='enneige'),
+                                SnowStatusCache(cote_rue_id=444, etat='enneige')])
+            db.session.commit()
+
+            refresh_snapshot()
+
+            etats = dict(db.session.query(SnowStatusCache.cote_rue_id, SnowStatusCache.etat))
+            assert etats == {111: 'planifie', 222: 'en_cours', 333: 'deneige', 444: 'enneige'}
+
+    def test_snapshot_dates_match_cache_format(self, app, reset_snapshot, mock_soap_client):
+        """Snapshot and status cache lookups should both return isoformat dates."""
+        with app.app_context():
+            refresh_snapshot()
+            from_snapshot = planif_neige.get_snapshot_status(111)
+            from_cache = planif_neige.get_cached_status(111)
+
+            assert from_snapshot['date_debut'] == from_cache['date_debut'] == '2026-01-10T02:00:00'
@@ -0,0 +1,243 @@
+"""
+Tests for Quebec City snow checker service
+"""
+
+import pytest
+from datetime import timedelta
+from unittest.mock import patch, MagicMock
+from app.models import StationStreetCache
+from app.services.quebec import snow_checker
+from app.services.quebec.snow_checker import (
+    check_snow_removal,
+    check_snow_removal_batch,
+    get_status_for_location,
+    nearby_stations,
+    warm_station_streets
+)
+
+# Sample Quebec City locations (Sainte-Foy is several kilometres from the others)
+SAINT_ROCH = (46.8139, -71.2245)
+LIMOILOU = (46.8290, -71.2150)
+SAINTE_FOY = (46.7790, -71.2870)
+
+
+def _station(station_no, lat, lon, status='En fonction'):
+    return {
+        'attributes': {'STATION_NO': station_no, 'STATUT': status},
+        'geometry': {'x': lon, 'y': lat}
+    }
+
+
+def _response(features, exceeded=False):
+    response = MagicMock()
+    response.json.return_value = {'features': features, 'exceededTransferLimit': exceeded}
+    return response
+
+
+def _clear_module_state():
+    snow_checker._station_streets.clear()
+    snow_checker._station_streets_loaded = False
+    for key in snow_checker._registry:
+        snow_checker._registry[key] = None
+
+
+@pytest.fixture(autouse=True)
+def reset_module_state():
+    """Clear the station registry and street cache between tests."""
+    _clear_module_state()
+    yield
+    _clear_module_state()
+
+
+@pytest.fixture
+def no_reverse_geocode():
+    """Skip street name lookups."""
+    with patch.object(snow_checker, 'reverse_geocode', return_value='Rue Test') as mock_geocode:
+        yield mock_geocode
+
+
+class TestStationRegistry:
+    """Tests for the local flashing-light station registry."""
+
+    def test_one_query_per_cycle(self, no_reverse_geocode):
+        """All locations in a cycle should be answered from one registry load."""
+        lat, lon = SAINT_ROCH
+        features = [_station('S1', lat + 0.001, lon), _station('S2', *SAINTE_FOY, status='Hors fonction')]
+        locations = {1: SAINT_ROCH, 2: LIMOILOU, 3: SAINTE_FOY}
+
+        with patch.object(snow_checker.requests, 'get', return_value=_response(features)) as mock_get:
+            results = check_snow_removal_batch(locations)
+            check_snow_removal_batch(locations)
+
+        assert mock_get.call_count == 1
+        assert results[1]['has_active_operation'] is True
+        assert results[2]['found'] is False
+        assert results[3]['lights'][0]['station'] == 'S2'
+
+    def test_statuses_refreshed_each_cycle(self, no_reverse_geocode):
+        """Once the status window passes, only statuses should be re-fetched."""
+        lat, lon = SAINT_ROCH
+        with patch.object(snow_checker.requests, 'get',
+                          return_value=_response([_station('S1', lat, lon, status='Hors fonction')])):
+            check_snow_removal_batch({1: SAINT_ROCH})
+
+        snow_checker._registry['statuses_at'] -= timedelta(minutes=10)
+        statuses = _response([{'attributes': {'STATION_NO': 'S1', 'STATUT': 'En fonction'}}])
+        with patch.object(snow_checker.requests, 'get', return_value=statuses) as mock_get:
+            result = check_snow_removal_batch({1: SAINT_ROCH})[1]
+
+        params = mock_get.call_args.kwargs['params']
+        assert params['returnGeometry'] == 'false'
+        assert params['outFields'] == 'STATION_NO,STATUT,OBJECTID'
+        assert result['has_active_operation'] is True
+
+    def test_registry_reloaded_daily(self, no_reverse_geocode):
+        """Geometry should be downloaded again once the registry is a day old."""
+        lat, lon = SAINT_ROCH
+        with patch.object(snow_checker.requests, 'get', return_value=_response([_station('S1', lat, lon)])):
+            check_snow_removal_batch({1: SAINT_ROCH})
+
+        snow_checker._registry['loaded_at'] -= timedelta(hours=25)
+        with patch.object(snow_checker.requests, 'get',
+                          return_value=_response([_station('S9', lat, lon)])) as mock_get:
+            result = check_snow_removal_batch({1: SAINT_ROCH})[1]
+
+        assert mock_get.call_args.kwargs['params']['returnGeometry'] == 'true'
+        assert [l['station'] for l in result['lights']] == ['S9']
+
+    def test_nearby_stations_covers_max_radius(self, no_reverse_geocode):
+        """The grid lookup should include stations just inside the radius in any direction."""
+        lat, lon = SAINT_ROCH
+        offset = 499 / 111320
+        features = [_station(f'S{i}', lat + dlat, lon + dlon) for i, (dlat, dlon) in
+                    enumerate([(offset, 0), (-offset, 0), (0, offset * 1.46), (0, -offset * 1.46)])]
+
+        with patch.object(snow_checker.requests, 'get', return_value=_response(features)):
+            snow_checker.ensure_station_registry()
+
+        assert len(nearby_stations(lat, lon, 500)) == 4
+
+    def test_radius_expands_locally(self, no_reverse_geocode):
+        """A light 350m away should be found at the 400m radius without new queries."""
+        lat, lon = SAINT_ROCH
+        features = [_station('S1', lat + 350 / 111320, lon, status='Hors fonction')]
+
+        with patch.object(snow_checker.requests, 'get', return_value=_response(features)) as mock_get:
+            result = check_snow_removal(lat, lon)
+
+        assert mock_get.call_count == 1
+        assert result['found'] is True
+        assert result['search_radius'] == 400
+        assert result['has_active_operation'] is False
+
+    def test_nothing_within_max_radius(self, no_reverse_geocode):
+        """Lights beyond 500m should not count."""
+        lat, lon = SAINT_ROCH
+        features = [_station('S1', lat + 0.01, lon)]
+
+        with patch.object(snow_checker.requests, 'get', return_value=_response(features)):
+            result = check_snow_removal(lat, lon)
+
+        assert result['found'] is False
+        assert result['search_radius'] == 500
+
+    def test_follows_result_paging(self, no_reverse_geocode):
+        """Should keep fetching while the server reports more results."""
+        lat, lon = SAINT_ROCH
+        pages = [
+            _response([_station('S1', lat + 0.004, lon)], exceeded=True),
+            _response([_station('S2', lat + 0.0005, lon)])
+        ]
+
+        with patch.object(snow_checker.requests, 'get', side_effect=pages) as mock_get:
+            result = check_snow_removal(lat, lon)
+
+        assert mock_get.call_args_list[1].kwargs['params']['resultOffset'] == 1
+        assert result['search_radius'] == 200
+        assert [l['station'] for l in result['lights']] == ['S2']
+
+    def test_paging_stops_on_repeated_page(self):
+        """A layer ignoring resultOffset should end the query instead of looping."""
+        page = [dict(_station('S1', 46.8, -71.2), attributes={'OBJECTID': 1, 'STATION_NO': 'S1'})]
+
+        with patch.object(snow_checker.requests, 'get', return_value=_response(page, exceeded=True)) as mock_get:
+            with pytest.raises(ValueError):
+                snow_checker._query_lights({'where': '1=1'})
+
+        assert mock_get.call_count == 2
+        assert mock_get.call_args.kwargs['params']['orderByFields'] == 'OBJECTID'
+
+    def test_paging_bounded(self):
+        """Paging should stop after LIGHTS_MAX_PAGES pages."""
+        pages = [_response([{'attributes': {'OBJECTID': i}}], exceeded=True) for i in range(3)]
+
+        with patch.object(snow_checker, 'LIGHTS_MAX_PAGES', 3), \
+             patch.object(snow_checker.requests, 'get', side_effect=pages):
+            with pytest.raises(ValueError):
+                snow_checker._query_lights({'where': '1=1'}, out_fields='STATUT')
+
+    def test_station_geocoded_once_per_batch(self, no_reverse_geocode):
+        """A station shared by several locations should be reverse geocoded once."""
+        lat, lon = SAINT_ROCH
+        features = [_station('S1', lat, lon)]
+        locations = {i: (lat + i * 0.0001, lon) for i in range(5)}
+
+        with patch.object(snow_checker.requests, 'get', return_value=_response(features)):
+            check_snow_removal_batch(locations)
+
+        assert no_reverse_geocode.call_count == 1
+
+    def test_failed_cell_reports_errors(self, no_reverse_geocode):
+        """A failed query should mark every location in its cell as an error."""
+        with patch.object(snow_checker.requests, 'get',
+                          side_effect=snow_checker.requests.ConnectionError('down')):
+            results = check_snow_removal_batch({1: SAINT_ROCH, 2: LIMOILOU})
+
+        assert [result['success'] for result in results.values()] == [False, False]
+
+
+class TestStationStreetCache:
+    """Tests for the persistent STATION_NO -> street cache."""
+
+    def test_known_station_not_geocoded(self, app, no_reverse_geocode):
+        """A check near a cached station should make a single HTTP call."""
+        lat, lon = SAINT_ROCH
+        features = [_station('S1', lat, lon)]
+
+        with app.app_context():
+            with patch.object(snow_checker.requests, 'get', return_value=_response(features)) as mock_get:
+                get_status_for_location(lat, lon)
+                snow_checker._station_streets.clear()
+                snow_checker._station_streets_loaded = False
+                status = get_status_for_location(lat, lon)
+
+            assert no_reverse_geocode.call_count == 1
+            assert mock_get.call_count == 1
+            assert StationStreetCache.query.filter_by(station_no='S1').one().street == 'Rue Test'
+            assert status['lights'][0]['street'] == 'Rue Test'
+
+    def test_unknown_street_not_persisted(self, app):
+        """Failed geocodes should be retried later rather than cached."""
+        lat, lon = SAINT_ROCH
+        features = [_station('S1', lat, lon)]
+
+        with app.app_context():
+            with patch.object(snow_checker, 'reverse_geocode', return_value='Unknown'), \
+                 patch.object(snow_checker.requests, 'get', return_value=_response(features)):
+                check_snow_removal(lat, lon)
+
+            assert StationStreetCache.query.count() == 0
+
+    def test_warm_up_geocodes_missing_stations(self, app, no_reverse_geocode):
+        """Bulk warm-up should geocode only stations not already cached."""
+        lat, lon = SAINT_ROCH
+        features = [_station('S1', lat, lon), _station('S2', lat + 0.01, lon)]
+
+        with app.app_context():
+            with patch.object(snow_checker.requests, 'get', return_value=_response(features)):
+                first = warm_station_streets()
+                second = warm_station_streets()
+
+            assert first['geocoded'] == 2
+            assert second['geocoded'] == 0
+            assert StationStreetCache.query.count() == 2
@@ -0,0 +1,386 @@
+"""
+Tests for Montreal waste collection service
+"""
+
+import copy
+import fcntl
+import numpy as np
+import pytest
+import threading
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from app import db
+from app.models import Address, WasteSector, WasteSectorAssignment
+from app.services.montreal import waste
+from app.services.montreal.waste import (
+    find_sector_for_point,
+    find_sectors_for_points,
+    assign_sectors,
+    get_schedule_for_location
+)
+
+
+def _square(x0, y0, size):
+    """Closed square ring with its lower-left corner at (x0, y0)."""
+    return [[x0, y0], [x0 + size, y0], [x0 + size, y0 + size], [x0, y0 + size], [x0, y0]]
+
+
+def _feature(geometry_type, coordinates, sector):
+    return {
+        'type': 'Feature',
+        'geometry': {'type': geometry_type, 'coordinates': coordinates},
+        'properties': {'SECTEUR': sector, 'JOUR_COLLECTE': 'mardi'}
+    }
+
+
+# Sector A has a hole, sector B is a MultiPolygon, sector C fills A's hole
+SECTORS = {
+    'type': 'FeatureCollection',
+    'features': [
+        _feature('Polygon', [_square(-73.70, 45.50, 0.10), _square(-73.67, 45.53, 0.04)], 'A'),
+        _feature('MultiPolygon', [[_square(-73.50, 45.50, 0.05)], [_square(-73.40, 45.60, 0.05)]], 'B'),
+        _feature('Polygon', [_square(-73.67, 45.53, 0.04)], 'C'),
+        _feature('Point', [-73.55, 45.55], 'not a sector'),
+    ]
+}
+
+
+def _add_addresses(subscriber, locations):
+    """Create Montreal addresses at (lat, lon) locations and return their IDs."""
+    addresses = [Address(subscriber_id=subscriber.id, city='montreal', latitude=lat, longitude=lon,
+                         waste_alerts=True) for lat, lon in locations]
+    db.session.add_all(addresses)
+    db.session.commit()
+    return [address.id for address in addresses]
+
+
+def _assigned_days(address_id):
+    """Collection day per type from an address's current sector assignments."""
+    rows = db.session.query(WasteSector.collection_type, WasteSector.day_of_week).join(
+        WasteSectorAssignment, db.and_(
+            WasteSector.collection_type == WasteSectorAssignment.collection_type,
+            WasteSector.sector_id == WasteSectorAssignment.sector_id,
+            WasteSector.dataset_version == WasteSectorAssignment.dataset_version
+        )
+    ).filter(WasteSectorAssignment.address_id == address_id)
+    return dict(rows)
+
+
+def _serve(geojson, etag=None, size=0):
+    """Patch the portal download to return geojson for every dataset (None: portal down)."""
+    def fetch(collection_type, **validators):
+        if geojson is None:
+            return {'status': 'failed', 'bytes': 0, 'seconds': 0.0}
+        return {'status': 'modified', 'geojson': geojson, 'etag': etag,
+                'last_modified': None, 'bytes': size, 'seconds': 0.0}
+
+    return patch.object(waste, 'fetch_waste_dataset', side_effect=fetch)
+
+
+def _clear_waste_cache():
+    for key in waste._waste_cache:
+        waste._waste_cache[key] = None
+    waste._sector_indexes.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_waste_cache():
+    """Clear the module-level dataset cache and sector indexes between tests."""
+    _clear_waste_cache()
+    yield
+    _clear_waste_cache()
+
+
+class TestSectorIndex:
+    """Tests for the spatial sector lookup."""
+
+    def test_polygon(self):
+        """A point inside a plain polygon should get its sector."""
+        assert find_sector_for_point(-73.69, 45.51, SECTORS)['SECTEUR'] == 'A'
+
+    def test_hole(self):
+        """A point in a polygon hole should fall through to the sector filling it."""
+        assert find_sector_for_point(-73.65, 45.55, SECTORS)['SECTEUR'] == 'C'
+
+    def test_multipolygon(self):
+        """Every part of a MultiPolygon should belong to its sector."""
+        assert find_sector_for_point(-73.48, 45.52, SECTORS)['SECTEUR'] == 'B'
+        assert find_sector_for_point(-73.38, 45.62, SECTORS)['SECTEUR'] == 'B'
+
+    def test_outside(self):
+        """Points in no sector, including between MultiPolygon parts, return None."""
+        assert find_sector_for_point(-73.42, 45.57, SECTORS) is None
+        assert find_sector_for_point(-73.90, 45.50, SECTORS) is None
+
+    def test_index_built_once(self):
+        """The index should be reused for the same dataset."""
+        with patch.object(waste, 'build_sector_index', wraps=waste.build_sector_index) as mock_build:
+            find_sector_for_point(-73.69, 45.51, SECTORS)
+            find_sector_for_point(-73.48, 45.52, SECTORS)
+
+        assert mock_build.call_count == 1
+
+    def test_schedule_uses_loaded_indexes(self, app):
+        """Loading the datasets should index them before the first lookup."""
+        with app.app_context():
+            with _serve(SECTORS):
+                waste.load_all_waste_data()
+
+            with patch.object(waste, 'build_sector_index') as mock_build:
+                schedule = get_schedule_for_location(45.51, -73.69)
+
+            mock_build.assert_not_called()
+            assert set(schedule) == set(waste.WASTE_DATASETS)
+            assert schedule['garbage']['day_of_week'] == 'mardi'
+
+
+class TestBatchAssignment:
+    """Tests for vectorized sector assignment."""
+
+    POINTS = [(-73.69, 45.51), (-73.65, 45.55), (-73.48, 45.52), (-73.42, 45.57), (-73.38, 45.62)]
+
+    @pytest.fixture
+    def loaded_sectors(self, app):
+        """SECTORS loaded as every collection type."""
+        with app.app_context():
+            with _serve(SECTORS):
+                waste.load_all_waste_data()
+            yield
+
+    def test_matches_single_lookups(self):
+        """Batch results should equal find_sector_for_point for each point."""
+        lons, lats = zip(*self.POINTS)
+        assert find_sectors_for_points(lons, lats, SECTORS) == \
+            [find_sector_for_point(lon, lat, SECTORS) for lon, lat in self.POINTS]
+
+    def test_overlap_prefers_first_feature(self):
+        """Where sectors overlap, the earlier feature should win."""
+        overlapping = {'features': SECTORS['features'][2:3] + SECTORS['features'][:1]}
+        assert find_sectors_for_points([-73.65], [45.55], overlapping)[0]['SECTEUR'] == 'C'
+        assert find_sectors_for_points([-73.69], [45.51], overlapping)[0]['SECTEUR'] == 'A'
+
+    def test_assign_sectors(self, app, loaded_sectors):
+        """Every location should map to its sector per collection type."""
+        with app.app_context():
+            assignments = assign_sectors({1: (45.51, -73.69), 2: (45.57, -73.42)})
+
+            assert assignments[1]['organic']['SECTEUR'] == 'A'
+            assert set(assignments[1]) == set(waste.WASTE_DATASETS)
+            assert assignments[2] == {}
+
+
+class TestSectorAssignments:
+    """Tests for persisted address-to-sector assignments."""
+
+    def test_assigned_when_dataset_changes(self, app, sample_subscriber):
+        """Loading a new dataset version should re-assign every Montreal address."""
+        with app.app_context():
+            ids = _add_addresses(sample_subscriber, [(45.51, -73.69), (45.55, -73.65), (45.57, -73.42)])
+            with _serve(SECTORS):
+                waste.load_all_waste_data()
+
+            assert WasteSectorAssignment.query.count() == 2 * len(waste.WASTE_DATASETS)
+            assert _assigned_days(ids[0])['garbage'] == 'mardi'
+            assert _assigned_days(ids[2]) == {}
+
+    def test_unchanged_dataset_not_reassigned(self, app, sample_subscriber):
+        """Reloading the same dataset version should leave assignments alone."""
+        with app.app_context():
+            _add_addresses(sample_subscriber, [(45.51, -73.69)])
+            with _serve(SECTORS):
+                waste.load_all_waste_data()
+                with patch.object(waste, '_assignment_rows') as mock_rows:
+                    waste.refresh_waste_data(force=True)
+
+            mock_rows.assert_not_called()
+
+    def test_reminder_lookup_skips_polygons(self, app, sample_subscriber):
+        """Assigned addresses should be matched to the calendar without any point-in-polygon test."""
+        from app.services.waste_calendar import get_addresses_to_notify
+
+        with app.app_context():
+            ids = _add_addresses(sample_subscriber, [(45.51, -73.69)])
+            with _serve(SECTORS):
+                waste.load_all_waste_data()
+            tuesday = datetime.now().date() + timedelta(days=(1 - datetime.now().weekday()) % 7 or 7)
+
+            with patch.object(waste, 'find_sector_ids_for_points') as mock_find:
+                due = get_addresses_to_notify(waste.adjust_for_holiday(
+                    datetime(tuesday.year, tuesday.month, tuesday.day)).date())
+
+            mock_find.assert_not_called()
+            assert [address.id for address, _ in due] == ids
+            assert sorted(due[0][1]) == sorted(waste.WASTE_DATASETS)
+
+    def test_new_address_assigned(self, app, sample_subscriber):
+        """Addresses added after a sync should be assigned from the loaded datasets."""
+        with app.app_context():
+            with _serve(SECTORS):
+                waste.load_all_waste_data()
+            ids = _add_addresses(sample_subscriber, [(45.48, -73.48)])
+
+            assert waste.assign_address_sectors({ids[0]: (45.48, -73.48)}) == 0
+            assert waste.assign_address_sectors({ids[0]: (45.52, -73.48)}) == len(waste.WASTE_DATASETS)
+            assert _assigned_days(ids[0])['green'] == 'mardi'
+
+
+class TestSharedDiskCache:
+    """Tests for the memory-mapped on-disk waste cache."""
+
+    @pytest.fixture
+    def cache_dir(self, app, tmp_path):
+        """Point WASTE_CACHE_DIR at a temporary directory."""
+        app.config['WASTE_CACHE_DIR'] = str(tmp_path)
+        yield tmp_path
+
+    def test_cold_worker_reads_disk(self, app, cache_dir):
+        """A worker with an empty memory cache should not download again."""
+        with app.app_context():
+            with _serve(SECTORS):
+                waste.load_all_waste_data()
+            _clear_waste_cache()
+
+            with patch.object(waste, 'fetch_waste_dataset') as mock_fetch:
+                data = waste.load_all_waste_data()
+
+            mock_fetch.assert_not_called()
+            assert find_sector_for_point(-73.65, 45.55, data['garbage'])['SECTEUR'] == 'C'
+            assert find_sector_for_point(-73.38, 45.62, data['organic'])['SECTEUR'] == 'B'
+
+    def test_index_built_on_first_lookup(self, app, cache_dir):
+        """Loading from disk should not build GEOS geometries until a point is located."""
+        with app.app_context():
+            with _serve(SECTORS):
+                waste.load_all_waste_data()
+
+            data, _ = waste.load_cached_waste_data(str(cache_dir))
+            assert 'index' not in data['garbage']
+
+            find_sector_for_point(-73.65, 45.55, data['garbage'])
+            assert 'index' in data['garbage'] and 'index' not in data['organic']
+
+    def test_arrays_are_memory_mapped(self, app, cache_dir):
+        """Coordinates should be stored as flat float64 arrays and mapped, not read."""
+        with app.app_context():
+            with _serve(SECTORS):
+                waste.load_all_waste_data()
+
+            with patch.object(waste, 'sector_dataset', side_effect=lambda arrays, version, **validators: arrays):
+                data, _ = waste.load_cached_waste_data(str(cache_dir))
+
+            coords = data['garbage']['coords']
+            assert isinstance(coords, np.memmap)
+            assert coords.dtype == np.float64 and coords.shape[1] == 2
+            assert data['garbage']['feature_ids'].tolist() == [0, 1, 2]
+
+    def test_new_version_replaces_old(self, app, cache_dir):
+        """A changed dataset should replace the previous version's files."""
+        with app.app_context():
+            with _serve(SECTORS):
+                waste.load_all_waste_data()
+
+            changed = copy.deepcopy(SECTORS)
+            changed['features'][0]['properties']['SECTEUR'] = 'A2'
+            with _serve(changed):
+                waste.refresh_waste_data(force=True)
+            _clear_waste_cache()
+
+            with patch.object(waste, 'fetch_waste_dataset') as mock_fetch:
+                data = waste.load_all_waste_data()
+
+            mock_fetch.assert_not_called()
+            assert find_sector_for_point(-73.69, 45.51, data['garbage'])['SECTEUR'] == 'A2'
+            assert len([p for p in cache_dir.iterdir() if p.name.startswith('garbage-')]) == 1
+
+    def test_stale_disk_used_when_download_fails(self, app, cache_dir):
+        """An expired disk cache should still be served if the portal is down."""
+        with app.app_context():
+            with _serve(SECTORS):
+                waste.load_all_waste_data()
+            _clear_waste_cache()
+            app.config['WASTE_CACHE_HOURS'] = 0
+
+            with _serve(None):
+                data = waste.load_all_waste_data()
+
+            assert set(data) == set(waste.WASTE_DATASETS)
+
+
+class TestWasteRefresh:
+    """Tests for the concurrent, conditional, single-flight dataset refresh."""
+
+    def test_datasets_fetched_concurrently(self, app):
+        """All datasets should be downloading at the same time."""
+        barrier = threading.Barrier(len(waste.WASTE_DATASETS), timeout=5)
+
+        def fetch(collection_type, **validators):
+            barrier.wait()
+            return {'status': 'modified', 'geojson': SECTORS, 'etag': None,
+                    'last_modified': None, 'bytes': 1000, 'seconds': 0.1}
+
+        with app.app_context():
+            with patch.object(waste, 'fetch_waste_dataset', side_effect=fetch):
+                report = waste.refresh_waste_data()
+
+            assert report['source'] == 'portal'
+            assert report['bytes'] == 1000 * len(waste.WASTE_DATASETS)
+            assert set(report['datasets']) == set(waste.WASTE_DATASETS)
+            assert waste._waste_cache['last_refresh'] is report
+
+    def test_conditional_request_headers(self):
+        """Validators of the held copy should be sent, and a 304 reported as not modified."""
+        with patch.object(waste.requests, 'get') as mock_get:
+            mock_get.return_value.status_code = 304
+            result = waste.fetch_waste_dataset('garbage', etag='"v1"', last_modified='Mon, 12 Oct 2026 00:00:00 GMT')
+
+        headers = mock_get.call_args.kwargs['headers']
+        assert headers == {'If-None-Match': '"v1"', 'If-Modified-Since': 'Mon, 12 Oct 2026 00:00:00 GMT'}
+        assert result['status'] == 'not_modified' and result['bytes'] == 0
+
+    def test_not_modified_keeps_dataset(self, app):
+        """A 304 should keep the loaded dataset and refresh its timestamp."""
+        with app.app_context():
+            with _serve(SECTORS, etag='"v1"'):
+                data = waste.load_all_waste_data()
+            waste._waste_cache['fetched_at'] = datetime.utcnow() - timedelta(days=2)
+
+            not_modified = {'status': 'not_modified', 'bytes': 0, 'seconds': 0.01}
+            with patch.object(waste, 'fetch_waste_dataset', return_value=not_modified) as mock_fetch:
+                report = waste.refresh_waste_data()
+
+            mock_fetch.assert_any_call('garbage', etag='"v1"', last_modified=None)
+            assert report['bytes'] == 0
+            assert waste._waste_cache['data']['garbage'] is data['garbage']
+            assert waste._waste_cache['fetched_at'] > datetime.utcnow() - timedelta(minutes=1)
+
+    def test_stale_data_served_during_refresh(self, app):
+        """Expired data should be returned at once while one background refresh runs."""
+        release = threading.Event()
+
+        with app.app_context():
+            with _serve(SECTORS):
+                data = waste.load_all_waste_data()
+            waste._waste_cache['fetched_at'] = datetime.utcnow() - timedelta(days=2)
+
+            with patch.object(waste, 'refresh_waste_data', side_effect=lambda **kwargs: release.wait(5)) as mock_refresh:
+                assert waste.load_all_waste_data() is data
+                assert waste.load_all_waste_data() is data
+                release.set()
+                waste._refresh_thread.join(5)
+
+            mock_refresh.assert_called_once_with(wait=False)
+
+    def test_other_worker_refreshing(self, app, tmp_path):
+        """A worker holding data should not download while another worker holds the refresh lock."""
+        app.config['WASTE_CACHE_DIR'] = str(tmp_path)
+        with app.app_context():
+            with _serve(SECTORS):
+                waste.load_all_waste_data()
+
+            with open(tmp_path / '.refresh.lock', 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                with patch.object(waste, 'fetch_waste_dataset') as mock_fetch:
+                    report = waste.refresh_waste_data(force=True)
+
+            mock_fetch.assert_not_called()
+            assert report['source'] == 'in_progress'
@@ -0,0 +1,140 @@
+"""
+Tests for the materialized waste collection calendar
+"""
+
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+from app import db
+from app.models import Address, CollectionCalendar, WasteSector, WasteSectorAssignment, WasteZone
+from app.services import waste_calendar
+from app.services.alerts import send_waste_reminders
+from app.services.waste_calendar import (
+    collection_dates,
+    rebuild_collection_calendar,
+    get_addresses_to_notify
+)
+
+START = date(2026, 10, 5)  # Monday of ISO week 41
+
+
+def _address(subscriber, city, **fields):
+    address = Address(subscriber_id=subscriber.id, city=city, latitude=45.5, longitude=-73.6,
+                      waste_alerts=True, **fields)
+    db.session.add(address)
+    db.session.commit()
+    return address.id
+
+
+def _due(collection_date, city=None):
+    """Collection types by address ID for a date."""
+    return {address.id: types for address, types in get_addresses_to_notify(collection_date, city)}
+
+
+class TestCollectionDates:
+    """Tests for calendar date generation."""
+
+    def test_holiday_shifted(self):
+        """A collection on a holiday should move to the next day."""
+        dates = collection_dates(0, START, START + timedelta(days=15))
+
+        # Thanksgiving Monday, Oct 12
+        assert dates == [date(2026, 10, 5), date(2026, 10, 13), date(2026, 10, 19)]
+
+    def test_holiday_not_shifted(self):
+        """Without holiday shifting, dates should stay on their weekday."""
+        dates = collection_dates(0, START, START + timedelta(days=15), shift_holidays=False)
+
+        assert dates == [date(2026, 10, 5), date(2026, 10, 12), date(2026, 10, 19)]
+
+    def test_week_parity(self):
+        """Odd/even week collections should skip the other weeks."""
+        dates = collection_dates(2, START, START + timedelta(days=28), 'even')
+
+        assert dates == [date(2026, 10, 14), date(2026, 10, 28)]
+
+
+class TestAddressesToNotify:
+    """Tests for the calendar join used by reminder runs."""
+
+    def test_quebec_zone(self, app, sample_subscriber):
+        """Quebec addresses should match through their zone's calendar."""
+        with app.app_context():
+            zone = WasteZone(zone_code='QC-A', garbage_day='monday', recycling_week='odd')
+            db.session.add(zone)
+            db.session.commit()
+            address_id = _address(sample_subscriber, 'quebec', waste_zone_id=zone.id)
+            rebuild_collection_calendar(start=START)
+
+            assert _due(date(2026, 10, 5)) == {address_id: ['garbage', 'recycling']}
+            # Montreal's Thanksgiving shift does not apply to Quebec City zones
+            assert _due(date(2026, 10, 12)) == {address_id: ['garbage']}
+            assert _due(date(2026, 10, 13)) == {}
+            assert _due(date(2026, 10, 5), city='montreal') == {}
+
+    def test_montreal_sector_and_fsa(self, app, sample_subscriber):
+        """Assigned addresses should use their sector; others their postal code's FSA."""
+        with app.app_context():
+            db.session.add_all([
+                WasteSector(collection_type='garbage', sector_id=0, dataset_version='v2', day_of_week='jeudi'),
+                WasteSector(collection_type='organic', sector_id=0, dataset_version='v2', day_of_week='mardi'),
+            ])
+            assigned = _address(sample_subscriber, 'montreal', postal_code='H2V 1V5')
+            outdated = _address(sample_subscriber, 'montreal')
+            by_fsa = _address(sample_subscriber, 'montreal', postal_code='H2V 1V5')
+            db.session.add_all([
+                WasteSectorAssignment(address_id=assigned, collection_type='garbage', sector_id=0,
+                                      dataset_version='v2'),
+                WasteSectorAssignment(address_id=assigned, collection_type='organic', sector_id=0,
+                                      dataset_version='v2'),
+                WasteSectorAssignment(address_id=outdated, collection_type='garbage', sector_id=0,
+                                      dataset_version='v1'),
+            ])
+            db.session.commit()
+            rebuild_collection_calendar(start=START)
+
+            # Tuesday of an odd week: organic by sector, FSA H2V garbage only
+            assert _due(date(2026, 10, 6)) == {assigned: ['organic'], by_fsa: ['garbage']}
+            assert _due(date(2026, 10, 15)) == {assigned: ['garbage']}
+            assert sorted(_due(date(2026, 10, 13))[by_fsa]) == ['garbage', 'recycling']
+
+    def test_sector_calendar_rebuilt_per_type(self, app):
+        """Rebuilding one collection type should leave the other calendars alone."""
+        with app.app_context():
+            db.session.add(WasteSector(collection_type='green', sector_id=3, dataset_version='v1',
+                                       day_of_week='lundi'))
+            db.session.commit()
+            rebuild_collection_calendar(start=START)
+            fsa_rows = CollectionCalendar.query.filter_by(scheme='fsa').count()
+
+            WasteSector.query.update({'day_of_week': 'vendredi'})
+            rebuild_collection_calendar(schemes=('sector',), collection_type='green', start=START)
+
+            rows = CollectionCalendar.query.filter_by(scheme='sector', zone='3').all()
+            fridays = collection_dates(4, START, START + timedelta(days=waste_calendar.CALENDAR_DAYS))
+            assert sorted(row.collection_date for row in rows) == fridays
+            assert CollectionCalendar.query.filter_by(scheme='fsa').count() == fsa_rows
+
+
+class TestReminderRun:
+    """Tests for send_waste_reminders driven by the calendar."""
+
+    def test_quebec_reminders(self, app, sample_subscriber):
+        """Only addresses in a zone collected tomorrow should be reminded."""
+        tomorrow = (datetime.utcnow() + timedelta(days=1)).date()
+        day_after = (tomorrow + timedelta(days=1)).strftime('%A').lower()
+
+        with app.app_context():
+            zones = [WasteZone(zone_code='QC-T', garbage_day=tomorrow.strftime('%A').lower()),
+                     WasteZone(zone_code='QC-U', garbage_day=day_after)]
+            db.session.add_all(zones)
+            db.session.commit()
+            due = _address(sample_subscriber, 'quebec', waste_zone_id=zones[0].id)
+            _address(sample_subscriber, 'quebec', waste_zone_id=zones[1].id)
+
+            with patch('app.services.email.send_waste_reminder_quebec',
+                       return_value={'success': True}) as mock_send:
+                result = send_waste_reminders(city='quebec')
+
+            assert result['reminders_sent'] == 1
+            assert mock_send.call_args.args[1].id == due
+            assert mock_send.call_args.args[2] == ['garbage']